@@ -20,387 +20,39 @@ import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import datetime
+import functools
+import os
+
+from srg import (cache, calculo, dependencias, graficos, informes, informes_pdf, lote, montecarlo, recursos,
+                 sensibilidad, sesion, tiempos)
+
+# Tiempos por bloque: panel en la barra lateral con ?admin=1 (o SRG_TIEMPOS=1).
+# Si no se activa, el cronómetro es un objeto vacío y no envuelve nada.
+modo_admin = st.query_params.get("admin") == "1" or os.environ.get("SRG_TIEMPOS") == "1"
+crono = tiempos.cronometro(modo_admin and st.session_state.get("medir_tiempos_input", False))
+crono.marca("BLOQUE 1 — CSS y funciones base")
 # ============================================================
 # 🟦 ESTILOS GLOBALES SRG
 # ============================================================
-st.markdown("""
-<style>
-html, body, [data-testid="stAppViewContainer"] {
-    background-color: #101522 !important;
-    color: #EAF2FF !important;
-}
-
-div[data-testid="stMetricValue"] {
-    color: #00BFFF !important;
-    font-weight: 600 !important;
-}
-div[data-testid="stMetricLabel"] {
-    color: #A8DFFF !important;
-}
-
-input[type="number"], input[type="text"], select, textarea {
-    background-color: #141A2B !important;
-    border: 1px solid #00BFFF !important;
-    color: #EAF2FF !important;
-}
-
-h1, h2, h3, h4 {
-    color: #EAF2FF !important;
-}
-
-.srg-title {
-    background: linear-gradient(135deg, #003366, #0055A4);
-    color: white !important;
-}
-
-button[kind="primary"] {
-    background-color: #0055A4 !important;
-    color: #ffffff !important;
-    border-radius: 6px !important;
-}
-
-button[kind="secondary"] {
-    background-color: #1E3A5F !important;
-    color: #EAF2FF !important;
-}
-
-.srg-box {
-    background-color: #182235 !important;
-    border: 1px solid #00BFFF !important;
-    border-radius: 8px !important;
-    padding: 12px 16px !important;
-    margin-bottom: 12px !important;
-}
-</style>
-""", unsafe_allow_html=True)
 
 st.set_page_config(
     page_title="Simulador de Jubilación SRG",
     page_icon="💼",
     layout="wide"
 )
-st.markdown("""
-<style>
-[data-testid="stMetricValue"] {
-    font-size: 1.4rem !important;
-    color: white !important;
-}
-[data-testid="stMetricLabel"] {
-    font-size: 0.9rem !important;
-    color: #00cc66 !important;
-}
-</style>
-""", unsafe_allow_html=True)
-
-st.markdown("""
-<style>
-
-/* ======== NÚMEROS AZUL FUTURISTA (Cloud + Local) ======== */
-input[type="number"] {
-    color: #00BFFF !important;
-    font-weight: 600 !important;
-}
 
-/* ======== PLACEHOLDER TAMBIÉN AZUL CLARO ======== */
-input[type="number"]::placeholder {
-    color: #A8DFFF !important;
-    opacity: 0.7 !important;
-}
+# estilos/srg.css con las fuentes de fonts/ incrustadas (srg/recursos.py):
+# se prepara una vez por proceso y se inyecta en el <head> una vez por sesión,
+# en lugar de reenviar todo el CSS en cada rerun
+css_global_srg = st.cache_resource(show_spinner=False)(recursos.css_global)
 
-/* ======== INPUTS OSCUROS PARA QUE EL AZUL RESALTE ======== */
-input[type="number"] {
-    background-color: #0C1426 !important;
-    border: 1px solid #00BFFF !important;
-}
-
-</style>
-""", unsafe_allow_html=True)
-
-st.markdown("""
-<style>
-
-/* ======== NÚMEROS AZUL FUTURISTA — Streamlit Cloud ======== */
-input[type="number"], 
-input[type="number"]::-webkit-inner-spin_button, 
-input[type="number"]::-webkit-outer-spin_button {
-    color: #00BFFF !important;
-    font-weight: 600 !important;
-}
-
-/* ======== Forzar color del texto dentro del input ======== */
-div[data-baseweb="input"] input {
-    color: #00BFFF !important;
-}
-
-/* ======== Fondo oscuro y borde neón ======== */
-div[data-baseweb="input"] {
-    background-color: #0C1426 !important;
-    border: 1px solid #00BFFF !important;
-}
-
-</style>
-""", unsafe_allow_html=True)
-
-st.markdown("""
-<style>
-
-/* ======== TOOLTIP: fondo oscuro y texto claro ======== */
-[data-testid="stTooltipHoverTarget"] div {
-    background-color: #0A1A2F !important;
-    color: #EAF2FF !important;
-    border: 1px solid #00BFFF !important;
-    box-shadow: 0 0 12px rgba(0,191,255,0.4);
-    padding: 6px 10px !important;
-    border-radius: 6px !important;
-}
-
-/* ======== ICONO DEL TOOLTIP: azul neón ======== */
-[data-testid="stTooltipIcon"] svg {
-    fill: #00BFFF !important;
-    filter: drop-shadow(0 0 6px rgba(0,191,255,0.6));
-}
-
-/* ======== INPUTS: fondo oscuro uniforme ======== */
-input[type="number"], input[type="text"], select, textarea {
-    background-color: #0C1426 !important;
-    border: 1px solid #00BFFF !important;
-    color: #EAF2FF !important;
-}
-
-/* ======== PLACEHOLDER: texto visible ======== */
-input::placeholder {
-    color: #EAF2FF !important;
-    opacity: 0.6 !important;
-}
-
-</style>
-""", unsafe_allow_html=True)
+if not st.session_state.get("estilos_srg_inyectados"):
+    st.html(recursos.inyector_css(css_global_srg()), unsafe_allow_javascript=True)
+    st.session_state.estilos_srg_inyectados = True
 
 if "mostrar_explicacion" not in st.session_state:
     st.session_state.mostrar_explicacion = False
 
-st.markdown("""
-<style>
-
-/* TOOLTIP: fondo oscuro y texto claro */
-[data-testid="stTooltipHoverTarget"] div {
-    background-color: #0A1A2F !important;
-    color: #EAF2FF !important;
-    border: 1px solid #00BFFF !important;
-    box-shadow: 0 0 12px rgba(0,191,255,0.4);
-    padding: 6px 10px !important;
-    border-radius: 6px !important;
-}
-
-/* ICONO DEL TOOLTIP: azul futurista */
-[data-testid="stTooltipIcon"] svg {
-    fill: #00BFFF !important;
-    filter: drop-shadow(0 0 6px rgba(0,191,255,0.6));
-}
-
-/* INPUTS: fondo oscuro */
-input[type="number"], input[type="text"], select, textarea {
-    background-color: #0C1426 !important;
-    border: 1px solid #00BFFF !important;
-    color: #EAF2FF !important;
-}
-
-/* NÚMEROS: azul futurista */
-input[type="number"] {
-    color: #00BFFF !important;
-    font-weight: 600 !important;
-}
-
-</style>
-""", unsafe_allow_html=True)
-
-st.markdown("""
-<style>
-@import url('https://fonts.googleapis.com/css2?family=Dancing+Script:wght@400;600;700&display=swap');
-
-/* BLOQUE ANTI-FLASH — Fondo oscuro desde el primer frame */
-html, body, #root, section.main, div[data-testid="stAppViewContainer"] {
-    background-color: #05070D !important;
-    background-image: none !important;
-    transition: none !important;
-    color: #EAF2FF !important;
-}
-
-/* TOOLTIP SRG FINAL — Fondo oscuro y texto visible */
-[data-testid="stTooltipHoverTarget"] div,
-[data-testid="stTooltipHoverTarget"]:hover div {
-    background-color: #0A1A2F !important;
-    color: #EAF2FF !important;
-    border: 1px solid #00BFFF !important;
-    box-shadow: 0 0 12px rgba(0,191,255,0.4);
-    padding: 6px 10px !important;
-    border-radius: 6px !important;
-    transition: background-color 0.3s ease-in-out;
-}
-[data-testid="stTooltipHoverTarget"] * {
-    color: #EAF2FF !important;
-    background-color: transparent !important;
-    opacity: 1 !important;
-}
-[data-testid="stTooltipHoverTarget"] p,
-[data-testid="stTooltipHoverTarget"] span,
-[data-testid="stTooltipHoverTarget"] li {
-    color: #EAF2FF !important;
-    font-size: 0.9rem !important;
-    line-height: 1.4 !important;
-}
-
-/* TOOLTIP SRG UNIVERSAL — Hover personalizado */
-.srg-tooltip {
-    position: relative;
-    display: inline-block;
-    cursor: help;
-    color: #00BFFF;
-    font-weight: 500;
-}
-.srg-tooltip .srg-tooltip-text {
-    visibility: hidden;
-    width: 260px;
-    background-color: #0A0F1F;
-    color: #EAF2FF;
-    text-align: left;
-    border-radius: 6px;
-    padding: 10px;
-    border: 1px solid #00BFFF;
-    box-shadow: 0 0 10px rgba(0,191,255,0.4);
-    position: absolute;
-    z-index: 999;
-    top: 24px;
-    left: 0;
-    font-size: 0.85rem;
-}
-.srg-tooltip:hover .srg-tooltip-text {
-    visibility: visible;
-}
-
-/* HEADER SRG */
-.srg-header {
-    padding: 14px 24px;
-    margin-bottom: 18px;
-    background: linear-gradient(135deg, #003366, #0055A4);
-    border-radius: 8px;
-    box-shadow: 0 4px 14px rgba(0,0,0,0.25);
-}
-.srg-header-inner {
-    max-width: 980px;
-    margin: 0 auto;
-    display: flex;
-    justify-content: center;
-    text-align: center;
-}
-.srg-header-title-main {
-    font-family: 'Dancing Script', cursive !important;
-    font-size: 3.2rem;
-    font-weight: 700;
-    color: #ffffff;
-    margin: 0;
-    line-height: 1.1;
-}
-.srg-header-title-sub {
-    font-family: 'Dancing Script', cursive !important;
-    font-size: 1.8rem;
-    font-weight: 400;
-    color: #d0d8e8;
-    margin-top: 6px;
-}
-
-/* TITULOS Y BLOQUES */
-.srg-title {
-    background: linear-gradient(135deg, #003366, #0055A4);
-    color: white !important;
-    padding: 8px 12px;
-    border-radius: 6px;
-    font-size: 1rem;
-    font-weight: 600;
-    margin-bottom: 6px;
-}
-
-/* SELECTBOX Y RADIO SRG OSCUROS */
-div[data-baseweb="select"] > div {
-    background-color: #0A0F1F !important;
-    color: #EAF2FF !important;
-    border: 1px solid #00BFFF !important;
-    border-radius: 6px !important;
-    box-shadow: 0 0 6px rgba(0,191,255,0.3) !important;
-}
-div[data-baseweb="select"] span {
-    color: #EAF2FF !important;
-}
-div[data-baseweb="select"] svg {
-    fill: #00BFFF !important;
-}
-div[data-baseweb="radio"] {
-    background-color: #0A0F1F !important;
-    border: 1px solid #00BFFF !important;
-    border-radius: 6px !important;
-    padding: 6px 10px !important;
-    box-shadow: 0 0 6px rgba(0,191,255,0.3) !important;
-}
-div[data-baseweb="radio"] label {
-    color: #EAF2FF !important;
-    font-size: 0.9rem !important;
-}
-div[data-baseweb="radio"] svg {
-    fill: #00BFFF !important;
-}
-
-/* FOOTER SRG */
-.srg-footer {
-    margin-top: 30px;
-    padding: 16px 12px;
-    background: linear-gradient(135deg, #003366, #0055A4);
-    color: #ffffff;
-    text-align: center;
-    font-size: 0.85rem;
-    border-radius: 6px 6px 0 0;
-}
-.srg-footer a {
-    color: #ffffff;
-    text-decoration: underline;
-}
-</style>
-""", unsafe_allow_html=True)
-srg_css = """
-<style>
-.srg-header-box {
-    background: linear-gradient(90deg, #0b3c5d, #3282b8);
-    color: #ffffff;
-    padding: 18px 22px;
-    border-radius: 10px;
-    margin-bottom: 18px;
-}
-.srg-header-box h4 {
-    margin: 0;
-    font-size: 1.1rem;
-    font-weight: 600;
-}
-.srg-header-box p {
-    margin: 4px 0 0 0;
-    font-size: 0.9rem;
-    opacity: 0.9;
-}
-.srg-card {
-    background-color: #ffffff;
-    border-radius: 10px;
-    padding: 16px 18px;
-    box-shadow: 0 2px 8px rgba(0,0,0,0.06);
-    margin-bottom: 16px;
-}
-.srg-card h4 {
-    margin: 0 0 8px 0;
-    font-size: 1rem;
-    font-weight: 600;
-}
-</style>
-"""
-st.markdown(srg_css, unsafe_allow_html=True)
-
-
 tooltip_fix = """
 <script>
 const observer = new MutationObserver(() => {
@@ -429,20 +81,49 @@ header_html = """
 </div>
 """
 st.markdown(header_html, unsafe_allow_html=True)
-# 🔧 Ajuste visual para títulos dentro de expanders
-st.markdown("""
+
+# Estilo visual SRG (fondo amarillo + encabezado azul + borde dorado + bordes redondeados)
+ESTILO_TABLA_SRG = """
 <style>
-div[data-testid="stExpander"] h1,
-div[data-testid="stExpander"] h2,
-div[data-testid="stExpander"] h3 {
-    font-size: 16px !important;
-    font-weight: 600 !important;
-    margin-top: 4px !important;
-    margin-bottom: 4px !important;
-}
+    .tabla-srg {
+        width: 100%;
+        border-collapse: separate; /* IMPORTANTE para bordes redondeados */
+        border-spacing: 0;         /* elimina huecos entre celdas */
+        font-family: 'Segoe UI', Arial, sans-serif;
+        font-size: 14px;
+        margin-top: 10px;
+        background-color: #fff8dc; /* Fondo amarillo claro */
+        border: 2px solid #d4af37; /* Borde dorado */
+        border-radius: 12px;       /* Bordes redondeados */
+        overflow: hidden;          /* Mantiene redondeo en toda la tabla */
+        box-shadow: 0 4px 10px rgba(0,0,0,0.1);
+    }
+
+    .tabla-srg th {
+        background-color: #0055A4; /* Azul SRG */
+        color: white;
+        text-align: center;
+        padding: 10px;
+        border: 1px solid #ccc;
+        font-weight: 600;
+    }
+
+    .tabla-srg td {
+        text-align: right;
+        padding: 8px 10px;
+        border: 1px solid #ccc;    /* Líneas internas visibles */
+        color: #0A1A2F;
+        background-color: #fff8dc; /* Fondo uniforme */
+    }
+
+    .tabla-srg tr {
+        background-color: #fff8dc; /* Sin alternancia */
+    }
 </style>
-""", unsafe_allow_html=True)
+"""
 
+# Tamaños de página de la tabla mensual del BLOQUE 4
+FILAS_POR_PAGINA = (12, 60, 120)
 
 def calcular_objetivo_y_gastos_futuros(ingresos_hoy, gastos_hoy, pct, inflacion, anos):
     factor = (1 + inflacion/100) ** anos
@@ -509,6 +190,23 @@ def tabla_mensual_y_anual_html(evolucion, anos_hasta_jub):
 
     return "\n".join(filas)
 
+# Etapas del motor con caché por huella de entradas (ver srg/cache.py). La base se
+# memoiza sin el lru_cache de calculo.base_reguladora: una sola caché, con contadores reales
+base_reguladora_srg = crono.envolver(
+    "base_reguladora", cache.memoizar("base_reguladora")(calculo.base_reguladora.__wrapped__))
+resolver_cuota_srg = crono.envolver("cuota", cache.memoizar("cuota")(calculo.resolver_cuota))
+simular_montecarlo_srg = crono.envolver(
+    "montecarlo", cache.memoizar("montecarlo", max_entradas=16)(montecarlo.simular_montecarlo))
+rejilla_sensibilidad_srg = crono.envolver(
+    "sensibilidad", cache.memoizar("sensibilidad", max_entradas=16)(sensibilidad.rejilla_sensibilidad))
+
+# Valores derivados de la sesión (pensión, brecha, plan...): cada uno se recalcula solo
+# si cambió alguna entrada de la que depende (ver srg/dependencias.py)
+if "grafo_srg" not in st.session_state:
+    st.session_state["grafo_srg"] = dependencias.grafo_simulador()
+grafo = st.session_state["grafo_srg"]
+grafo.usar(base=base_reguladora_srg, cuota_ajustada=resolver_cuota_srg)
+
 def marca_agua_srg():
     return """
     <div style="
@@ -538,8 +236,20 @@ def marca_agua_srg():
 # ============================================
 # BLOQUE 2 — INTERFAZ PRINCIPAL (PARTE 1)
 # ============================================
+crono.marca("BLOQUE 2 — Interfaz principal")
+
+# Modo formulario: los datos de los bloques 2 y 3 se envían juntos con un botón
+# y la app recalcula una sola vez, en lugar de un rerun por cada campo tocado.
+# Dentro de un formulario los límites no pueden depender de otros campos (no se
+# conocen hasta enviar), así que usan los límites absolutos y las correcciones
+# de coherencia se aplican al enviar, con un aviso.
+modo_formulario = st.toggle(
+    "Introducir los datos en modo formulario (recalcular al pulsar «Calcular»)",
+    key="modo_formulario_input",
+)
+entrada = st.form("datos_entrada", border=False) if modo_formulario else st.container()
 
-col1, col2, col3, col4 = st.columns(4)
+col1, col2, col3, col4 = entrada.columns(4)
 
 # ===== DATOS PERSONALES =====
 if "edad_actual_input" not in st.session_state:
@@ -562,9 +272,13 @@ with col1:
         key="edad_actual_input"
     )
 
+    if modo_formulario and st.session_state.edad_prevista_jub_input <= edad_actual:
+        st.warning("La edad de jubilación debe ser mayor que tu edad actual. La ajustamos a la mínima posible.")
+        st.session_state.edad_prevista_jub_input = edad_actual + 1
+
     edad_prevista_jub = st.number_input(
         "Edad prevista de jubilación",
-        min_value=edad_actual + 1,
+        min_value=17 if modo_formulario else edad_actual + 1,
         max_value=75,
         value=max(edad_actual + 1, st.session_state.edad_prevista_jub_input),
         help="Edad a la que deseas jubilarte. No puede ser menor o igual que tu edad actual.",
@@ -585,6 +299,7 @@ with col1:
 # Correcciones de coherencia
 if edad_prevista_jub <= edad_actual:
     edad_prevista_jub = edad_actual + 1
+edad_prevista_jub_input = edad_prevista_jub
 if esperanza_vida <= edad_prevista_jub:
     esperanza_vida = edad_prevista_jub + 1
 
@@ -599,6 +314,8 @@ with col2:
     st.caption("Tus años cotizados determinan si puedes acceder a modalidades anticipadas.")
 
     max_cotizables_hoy = max(0, edad_actual - 16)
+    if modo_formulario and st.session_state.anos_cotizados_hoy_input > max_cotizables_hoy:
+        st.warning(f"Con {edad_actual} años puedes haber cotizado como máximo {max_cotizables_hoy}. Lo ajustamos.")
     st.session_state.anos_cotizados_hoy_input = min(
         st.session_state.anos_cotizados_hoy_input, max_cotizables_hoy
     )
@@ -606,13 +323,15 @@ with col2:
     anos_cotizados_hoy = st.number_input(
         "Años cotizados hoy",
         min_value=0,
-        max_value=max_cotizables_hoy,
+        max_value=70 - 16 if modo_formulario else max_cotizables_hoy,
         value=st.session_state.anos_cotizados_hoy_input,
         help="Años cotizados a la Seguridad Social.",
         key="anos_cotizados_hoy_input"
     )
 
     max_anos_futuros = max(0, edad_prevista_jub - edad_actual)
+    if modo_formulario and st.session_state.anos_futuros_input > max_anos_futuros:
+        st.warning(f"Hasta tu jubilación solo quedan {max_anos_futuros} años de cotización. Lo ajustamos.")
     st.session_state.anos_futuros_input = min(
         st.session_state.anos_futuros_input, max_anos_futuros
     )
@@ -620,7 +339,7 @@ with col2:
     anos_futuros = st.number_input(
         "Años que cotizarás desde hoy",
         min_value=0,
-        max_value=max_anos_futuros,
+        max_value=75 - 16 if modo_formulario else max_anos_futuros,
         value=st.session_state.anos_futuros_input,
         help="Años adicionales que seguirás cotizando.",
         key="anos_futuros_input"
@@ -629,13 +348,15 @@ with col2:
 st.markdown('</div>', unsafe_allow_html=True)
 
 # Cálculos base del bloque 2
-anos_totales = anos_cotizados_hoy + anos_futuros
-anos_hasta_jub = max(1, edad_prevista_jub - edad_actual)
+grafo.fijar(edad_actual=edad_actual, edad_prevista_jub=edad_prevista_jub,
+            anos_cotizados_hoy=anos_cotizados_hoy, anos_futuros=anos_futuros)
+anos_totales = grafo["anos_totales"]
+anos_hasta_jub = grafo["anos_hasta_jub"]
 anos_jubilacion = max(1, esperanza_vida - edad_prevista_jub)
 
 
 # ===== TIPO DE JUBILACIÓN =====
-EDAD_LEGAL_2026 = 67
+EDAD_LEGAL_2026 = calculo.EDAD_LEGAL_2026
 
 if "tipo_jubilacion_input" not in st.session_state:
     st.session_state.tipo_jubilacion_input = "Ordinaria"
@@ -647,7 +368,7 @@ with col3:
 
     with st.expander("📘 Selecciona modalidad y requisitos", expanded=False):
 
-        opciones_jub = ["Ordinaria", "Anticipada voluntaria", "Anticipada involuntaria", "Demorada"]
+        opciones_jub = calculo.TIPOS_JUBILACION
         idx_tipo = opciones_jub.index(st.session_state.tipo_jubilacion_input)
 
         tipo_jubilacion = st.radio(
@@ -657,9 +378,8 @@ with col3:
             key="tipo_jubilacion_input"
         )
 
-        modo_valido = True
-        motivo_error = ""
-        coef_ajuste = 1.0
+        meses_anticipo = 1
+        meses_demora = None
 
         # ===== ORDINARIA =====
         if tipo_jubilacion == "Ordinaria":
@@ -669,18 +389,6 @@ with col3:
             **Requisitos:** mínimo 15 años cotizados  
             """)
 
-            # Solo mostrar validaciones si el usuario ya introdujo datos reales
-            if anos_totales > 0:
-                if anos_totales < 15:
-                    modo_valido = False
-                    motivo_error = "Para la jubilación ordinaria necesitas al menos 15 años cotizados."
-
-                elif edad_prevista_jub < EDAD_LEGAL_2026:
-                    st.warning(
-                        "La edad prevista es inferior a la edad legal. "
-                        "Con estos datos, **pasarías a una jubilación anticipada voluntaria** con penalización."
-                    )
-
         # ===== ANTICIPADA VOLUNTARIA =====
         elif tipo_jubilacion == "Anticipada voluntaria":
             st.markdown("""
@@ -689,26 +397,7 @@ with col3:
             **Requisitos:** 35 años cotizados  
             """)
 
-            if anos_totales > 0 and anos_totales < 35:
-                modo_valido = False
-                motivo_error = "Para la anticipada voluntaria necesitas 35 años cotizados."
-
             meses_anticipo = st.number_input("Meses de anticipo", 1, 24, 1)
-            edad_prevista_jub = EDAD_LEGAL_2026 - meses_anticipo / 12
-
-            if edad_prevista_jub < 63:
-                modo_valido = False
-                motivo_error = "La anticipada voluntaria solo puede aplicarse desde los 63 años."
-
-            def coef_voluntaria(anos, meses):
-                trimestres = meses // 3
-                if anos < 38.5: red = 0.0525
-                elif anos < 41.5: red = 0.0475
-                elif anos < 44.5: red = 0.0425
-                else: red = 0.0325
-                return 1 - red * trimestres
-
-            coef_ajuste = coef_voluntaria(anos_totales, meses_anticipo)
 
         # ===== ANTICIPADA INVOLUNTARIA =====
         elif tipo_jubilacion == "Anticipada involuntaria":
@@ -718,26 +407,7 @@ with col3:
             **Requisitos:** 33 años cotizados  
             """)
 
-            if anos_totales > 0 and anos_totales < 33:
-                modo_valido = False
-                motivo_error = "Para la anticipada involuntaria necesitas 33 años cotizados."
-
             meses_anticipo = st.number_input("Meses de anticipo", 1, 48, 1)
-            edad_prevista_jub = EDAD_LEGAL_2026 - meses_anticipo / 12
-
-            if edad_prevista_jub < 61:
-                modo_valido = False
-                motivo_error = "La anticipada involuntaria solo puede aplicarse desde los 61 años."
-
-            def coef_involuntaria(anos, meses):
-                trimestres = meses // 3
-                if anos < 38.5: red = 0.075
-                elif anos < 41.5: red = 0.070
-                elif anos < 44.5: red = 0.065
-                else: red = 0.055
-                return 1 - red * trimestres
-
-            coef_ajuste = coef_involuntaria(anos_totales, meses_anticipo)
 
         # ===== DEMORADA =====
         elif tipo_jubilacion == "Demorada":
@@ -747,27 +417,24 @@ with col3:
             **Bonificación:** +4% por cada año de demora  
             """)
 
-            if anos_totales > 0 and anos_totales < 15:
-                modo_valido = False
-                motivo_error = "Para la jubilación demorada necesitas al menos 15 años cotizados."
-
-            elif edad_actual < 60:
-                modo_valido = False
-                motivo_error = "La jubilación demorada solo aplica si ya estás próximo a la edad legal."
-
-            else:
+            # La demora solo se puede elegir si se cumplen los requisitos previos
+            if not (0 < anos_totales < 15) and edad_actual >= 60:
                 meses_demora = st.number_input("Meses de demora", 1, 120, 1)
-                anos_demora = meses_demora / 12
-                coef_ajuste = 1 + anos_demora * 0.04
-                edad_prevista_jub = EDAD_LEGAL_2026 + anos_demora
 
-                st.metric("Meses de demora", f"{meses_demora} meses")
-                st.metric("Bonificación aplicada", f"+{(coef_ajuste - 1) * 100:.1f}%")
-                st.metric("Edad prevista de jubilación", f"{edad_prevista_jub:.1f} años")
+        grafo.fijar(tipo_jubilacion=tipo_jubilacion, meses_anticipo=meses_anticipo, meses_demora=meses_demora or 1)
+        modo_valido, motivo_error, coef_ajuste, edad_prevista_jub = grafo["modalidad"]
 
-                if edad_prevista_jub <= EDAD_LEGAL_2026:
-                    modo_valido = False
-                    motivo_error = "La edad prevista debe ser mayor que la edad legal."
+        # Solo mostrar validaciones si el usuario ya introdujo datos reales
+        if tipo_jubilacion == "Ordinaria" and anos_totales >= 15 and edad_prevista_jub < EDAD_LEGAL_2026:
+            st.warning(
+                "La edad prevista es inferior a la edad legal. "
+                "Con estos datos, **pasarías a una jubilación anticipada voluntaria** con penalización."
+            )
+
+        if meses_demora is not None:
+            st.metric("Meses de demora", f"{meses_demora} meses")
+            st.metric("Bonificación aplicada", f"+{(coef_ajuste - 1) * 100:.1f}%")
+            st.metric("Edad prevista de jubilación", f"{edad_prevista_jub:.1f} años")
 
         # ===== WARNING SRG (POSICIÓN CORRECTA) =====
         if not modo_valido:
@@ -836,6 +503,8 @@ with col4:
     if "gastos_input" not in st.session_state:
         st.session_state.gastos_input = 0
 
+    if modo_formulario and st.session_state.gastos_input > ingresos:
+        st.warning("Has indicado más gastos que ingresos. Ajustamos los gastos al máximo igual a tus ingresos.")
     st.session_state.gastos_input = min(st.session_state.gastos_input, ingresos)
 
     gastos = st.number_input(
@@ -865,13 +534,13 @@ if "gastos" not in locals():
 # ============================================
 # BLOQUE 3 — PENSIÓN, OBJETIVO Y BRECHA (VERSIÓN PULIDA SRG)
 # ============================================
+crono.marca("BLOQUE 3 — Pensión, objetivo y brecha")
 
 # Límites reales de la Seguridad Social para 2026
-PENSION_MAX_2026 = 3359.60
-BASE_MAX_ESPANA_2026 = 4720
-EXTRA_REVAL = 0.00115
+PENSION_MAX_2026 = calculo.PENSION_MAX_2026
+BASE_MAX_ESPANA_2026 = calculo.BASE_MAX_ESPANA_2026
 
-colA, colB, colC, colD = st.columns(4)
+colA, colB, colC, colD = entrada.columns(4)
 
 # ============================================================
 # 🟦 1. PENSIÓN E INFLACIÓN — SOLO BASE REGULADORA SRG
@@ -918,21 +587,9 @@ with colA:
     # -----------------------------
     # CÁLCULO AUTOMÁTICO SRG
     # -----------------------------
-    meses_totales = 29 * 12
-    bases = []
-    for i in range(meses_totales):
-        anos_pasados = (meses_totales - 1 - i) / 12
-        salario_estimado = salario_actual / ((1 + crecimiento_salarial/100) ** anos_pasados) if salario_actual > 0 else 0
-        bases.append(salario_estimado)
-
-    bases_actualizadas = []
-    for i, base_i in enumerate(bases):
-        anos_pasados = (meses_totales - 1 - i) / 12
-        factor_ipc = (1 + ipc_actualizacion/100) ** anos_pasados
-        bases_actualizadas.append(base_i * factor_ipc)
-
-    mejores_322 = sorted(bases_actualizadas)[24:]
-    base = sum(mejores_322) / 322 if len(mejores_322) == 322 else (sum(mejores_322) / max(1, len(mejores_322)))
+    grafo.fijar(salario_actual=salario_actual, crecimiento_salarial=crecimiento_salarial,
+                ipc_actualizacion=ipc_actualizacion)
+    base = grafo["base"]
 
     # Límite legal
     if base > BASE_MAX_ESPANA_2026:
@@ -1004,17 +661,9 @@ with colA:
 # ============================================================
 # 🟦 2. RESUMEN PENSIÓN — EXPLICACIONES COLOQUIALES
 # ============================================================
-pct = min(1.0, anos_totales / 37) if modo_valido else 0.0
-base_reguladora_ajustada = min(base, BASE_MAX_ESPANA_2026)
-pension_hoy = base_reguladora_ajustada * pct * coef_ajuste
-pension_futura_sin_tope = pension_hoy * ((1 + reval/100) ** anos_hasta_jub)
-
-# Límite legal real: pensión máxima actualizada a futuro
-pension_max_futura = PENSION_MAX_2026 * ((1 + inflacion/100 + EXTRA_REVAL) ** anos_hasta_jub)
-
-# 🔧 Ajuste automático al límite legal
-limite_aplicado = pension_futura_sin_tope > pension_max_futura
-pension_futura = pension_max_futura if limite_aplicado else pension_futura_sin_tope
+# Límite legal real: pensión máxima actualizada a futuro, con ajuste automático
+grafo.fijar(inflacion=inflacion, reval=reval)
+pct, pension_hoy, pension_futura_sin_tope, limite_aplicado, pension_futura = grafo["pension"]
 
 with colB:
     st.markdown('<div class="srg-title">Resumen pensión</div>', unsafe_allow_html=True)
@@ -1189,18 +838,16 @@ with colC:
         key="porcentaje_mantenimiento_input"
     )
 
-    # Inflación anual y años hasta jubilación (ajusta nombres si en tu código son otros)
-    # inflacion_anual debe estar definida antes (slider o input)
-    # anos_hasta_jub = edad_prevista_jub - edad_actual debe existir antes
-    factor_inflacion = (1 + inflacion / 100) ** anos_hasta_jub
+    grafo.fijar(ingresos_hoy=ingresos_hoy, gastos_hoy=gastos_hoy, porcentaje_mantenimiento=porcentaje_mantenimiento,
+                modo_nivel_vida=modo_nivel_vida)
+    factor_inflacion, nivel_vida_futuro_objetivo, nivel_vida_futuro_gastos = grafo["nivel_vida"]
+    nivel_vida_futuro = grafo["nivel_vida_futuro"]
 
     if "Objetivo económico" in modo_nivel_vida:
         nivel_vida_hoy = ingresos_hoy * (porcentaje_mantenimiento / 100)
     else:
         nivel_vida_hoy = gastos_hoy * (porcentaje_mantenimiento / 100)
 
-    nivel_vida_futuro = nivel_vida_hoy * factor_inflacion
-
     st.metric("Lo que necesitarás cada mes al jubilarte", f"{nivel_vida_futuro:,.0f} €")
 
     # ============================
@@ -1252,15 +899,6 @@ En el año de tu jubilación, esto equivale a:
 **{nivel_vida_futuro:,.0f} € / mes**
         """)
 
-# ============================================================
-# 🟩 CÁLCULO DEL NIVEL DE VIDA FUTURO — BASES PARA LA BRECHA
-# ============================================================
-
-pct_nivel_vida = porcentaje_mantenimiento
-
-nivel_vida_futuro_objetivo = ingresos_hoy * (pct_nivel_vida / 100) * factor_inflacion
-nivel_vida_futuro_gastos = gastos_hoy * (pct_nivel_vida / 100) * factor_inflacion
-
 # ============================================================
 # 🟦 4. BRECHA — EXPLICACIONES COLOQUIALES
 # ============================================================
@@ -1279,13 +917,11 @@ with colD:
     # LÓGICA DEL SELECTOR
     # ============================
     if modo_brecha == "Objetivo económico":
-        nivel_usado = nivel_vida_futuro_objetivo
         texto_modo = (
             "Tu nivel de vida futuro se calcula a partir de tus ingresos actuales, "
             "actualizados a precios del año en que te jubiles."
         )
     else:
-        nivel_usado = nivel_vida_futuro_gastos
         texto_modo = (
             "Tu nivel de vida futuro se calcula a partir de tus gastos actuales, "
             "actualizados a precios del año en que te jubiles."
@@ -1294,7 +930,9 @@ with colD:
     # ============================
     # CÁLCULO DE BRECHA
     # ============================
-    brecha = max(0.0, nivel_usado - pension_futura)
+    grafo.fijar(modo_brecha=modo_brecha)
+    nivel_usado = grafo["nivel_usado"]
+    brecha = grafo["brecha"]
 
     # ============================
     # VISUALIZACIÓN SRG
@@ -1326,7 +964,8 @@ La brecha es la diferencia entre esas dos cifras:
 **Brecha mensual:** {brecha:,.0f} € / mes
         """)
 
-
+if modo_formulario:
+    entrada.form_submit_button("Calcular", type="primary", width="stretch")
 
 
 import pandas as pd
@@ -1336,8 +975,23 @@ import plotly.graph_objects as go
 # ============================================================
 # BLOQUE 4 — SIMULACIÓN DE AHORRO PERSONALIZADA SRG
 # ============================================================
-
-st.markdown("""
+crono.marca("BLOQUE 4 — Simulación de ahorro")
+# BLOQUE 4 y los informes son fragmentos: al tocar la cuota, la rentabilidad o
+# los datos del cliente solo se vuelven a ejecutar ellos. Pensión, brecha y demás
+# resultados de los bloques 1–3 se leen tal como quedaron en el último rerun completo.
+
+def cerrar_fragmento(nombre):
+    # Fin de un rerun solo del fragmento: log de sus tiempos y, en modo admin, resumen al pie
+    resumen = crono.finalizar(fragmento=nombre)
+    if modo_admin and resumen is not None:
+        st.caption(f"⏱️ Rerun del fragmento «{nombre}»: {resumen['total_ms']:,.1f} ms · "
+                   + ", ".join(f"{k} {v['n']}× {v['ms']:,.1f} ms" for k, v in resumen["llamadas"].items()))
+
+
+@st.fragment
+def bloque_ahorro():
+    rerun_fragmento = crono.abrir_fragmento("BLOQUE 4 — Simulación de ahorro")
+    st.markdown("""
 <div style='background: linear-gradient(90deg, #0f3b73 0%, #1e5aa8 100%);
             border-radius: 8px; padding: 10px 18px; text-align: center;
             font-family: "Poppins", "Segoe UI", sans-serif; color: #ffffff;'>
@@ -1351,369 +1005,478 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-# ============================================================
-# 🟦 PANEL ALINEADO SRG — RESUMEN DE TU SITUACIÓN ACTUAL
-# ============================================================
+    # ============================================================
+    # 🟦 PANEL ALINEADO SRG — RESUMEN DE TU SITUACIÓN ACTUAL
+    # ============================================================
 
-fila1_col1, fila1_col2, fila1_col3 = st.columns(3)
+    fila1_col1, fila1_col2, fila1_col3 = st.columns(3)
 
-with fila1_col1:
-    st.markdown("### 💰 Pensión futura estimada")
-    st.markdown(f"<h2 style='color:#00cc66; margin-top:-10px;'>{pension_futura:,.0f} €</h2>", unsafe_allow_html=True)
+    with fila1_col1:
+        st.markdown("### 💰 Pensión futura estimada")
+        st.markdown(f"<h2 style='color:#00cc66; margin-top:-10px;'>{pension_futura:,.0f} €</h2>", unsafe_allow_html=True)
 
-with fila1_col2:
-    st.markdown("### 🏠 Nivel de vida futuro")
-    st.markdown(f"<h2 style='color:#00cc66; margin-top:-10px;'>{nivel_vida_futuro:,.0f} €</h2>", unsafe_allow_html=True)
+    with fila1_col2:
+        st.markdown("### 🏠 Nivel de vida futuro")
+        st.markdown(f"<h2 style='color:#00cc66; margin-top:-10px;'>{nivel_vida_futuro:,.0f} €</h2>", unsafe_allow_html=True)
 
-with fila1_col3:
-    st.markdown("### 📉 Brecha mensual")
-    st.markdown(f"<h2 style='color:#00cc66; margin-top:-10px;'>{brecha:,.0f} €</h2>", unsafe_allow_html=True)
+    with fila1_col3:
+        st.markdown("### 📉 Brecha mensual")
+        st.markdown(f"<h2 style='color:#00cc66; margin-top:-10px;'>{brecha:,.0f} €</h2>", unsafe_allow_html=True)
 
 
-fila2_col1, fila2_col2, fila2_col3 = st.columns(3)
+    fila2_col1, fila2_col2, fila2_col3 = st.columns(3)
 
-with fila2_col1:
-    st.markdown("### ⏳ Años hasta tu jubilación")
-    st.markdown(f"<h2 style='color:#00cc66; margin-top:-10px;'>{anos_hasta_jub}</h2>", unsafe_allow_html=True)
+    with fila2_col1:
+        st.markdown("### ⏳ Años hasta tu jubilación")
+        st.markdown(f"<h2 style='color:#00cc66; margin-top:-10px;'>{anos_hasta_jub}</h2>", unsafe_allow_html=True)
 
-with fila2_col2:
-    st.markdown("### 📈 Inflación anual estimada")
-    st.markdown(f"<h2 style='color:#00cc66; margin-top:-10px;'>{inflacion:.1f} %</h2>", unsafe_allow_html=True)
+    with fila2_col2:
+        st.markdown("### 📈 Inflación anual estimada")
+        st.markdown(f"<h2 style='color:#00cc66; margin-top:-10px;'>{inflacion:.1f} %</h2>", unsafe_allow_html=True)
 
-capital_objetivo = brecha * 12 * anos_hasta_jub
-with fila2_col3:
-    st.markdown("### 🎯 Capital objetivo aproximado")
-    st.markdown(f"<h2 style='color:#00cc66; margin-top:-10px;'>{capital_objetivo:,.0f} €</h2>", unsafe_allow_html=True)
+    capital_objetivo = grafo["capital_objetivo"]
+    with fila2_col3:
+        st.markdown("### 🎯 Capital objetivo aproximado")
+        st.markdown(f"<h2 style='color:#00cc66; margin-top:-10px;'>{capital_objetivo:,.0f} €</h2>", unsafe_allow_html=True)
 
-st.markdown("<hr style='border:1px solid #1e3a5f; margin-top:15px; margin-bottom:15px;'>", unsafe_allow_html=True)
+    st.markdown("<hr style='border:1px solid #1e3a5f; margin-top:15px; margin-bottom:15px;'>", unsafe_allow_html=True)
 
 
-# ============================================================
-# 🟦 3. PARÁMETROS DEL PLAN — INTELIGENTE SRG
-# ============================================================
+    # ============================================================
+    # 🟦 3. PARÁMETROS DEL PLAN — INTELIGENTE SRG
+    # ============================================================
 
-st.markdown("""
+    st.markdown("""
 <div class='srg-box'>
     <h4>Parámetros del plan de ahorro</h4>
     <p>El simulador SRG adapta automáticamente tu plan según exista brecha o no.</p>
 </div>
 """, unsafe_allow_html=True)
 
-rentabilidad_base = 4.0  # valor por defecto si aún no se ha definido
-inflacion_base = inflacion
-
-# ============================================================
-# 🟦 CASO 1 — HAY BRECHA → calcular cuota recomendada
-# ============================================================
-
-if brecha > 0:
-
-    st.error("Tu pensión no cubre tu nivel de vida futuro.")
-    st.info("💡 Vamos a calcular la cuota mensual recomendada para cubrir tu brecha.")
-
-    colA, colB = st.columns(2)
-    with colA:
-        aportacion_inicial = st.number_input("Aportación inicial (€)", min_value=0.0, value=0.0, step=100.0)
-    with colB:
-        rentabilidad = st.number_input("Rentabilidad media anual (%)", min_value=0.0, value=rentabilidad_base, step=0.1)
-        inflacion_media = st.number_input("Inflación media anual (%)", min_value=0.0, value=inflacion_base, step=0.1)
+    rentabilidad_base = 4.0  # valor por defecto si aún no se ha definido
+    inflacion_base = inflacion
 
-else:
     # ============================================================
-    # 🟦 CASO 2 — NO HAY BRECHA → modo libre
+    # 🟦 CASO 1 — HAY BRECHA → calcular cuota recomendada
     # ============================================================
-    st.success("Tu pensión cubrirá tu nivel de vida. No aparece brecha mensual.")
-    st.info("Puedes diseñar un plan de ahorro voluntario para tus objetivos personales.")
-
-    colA, colB = st.columns(2)
-    with colA:
-        aportacion_inicial = st.number_input("Aportación inicial (€)", min_value=0.0, value=1000.0, step=100.0)
-        rentabilidad = st.number_input("Rentabilidad media anual (%)", min_value=0.0, value=rentabilidad_base, step=0.1)
-    with colB:
-        inflacion_media = st.number_input("Inflación media anual (%)", min_value=0.0, value=inflacion_base, step=0.1)
-
-# ============================================================
-# 🔥 SINCRONIZACIÓN COMPLETA DE CUOTAS SRG
-# ============================================================
 
-r_mensual = rentabilidad / 100 / 12
-n_meses = anos_hasta_jub * 12
-capital_objetivo = brecha * 12 * anos_hasta_jub
+    if brecha > 0:
 
-# ============================================================
-# 🟦 Cuota recomendada y entrada manual
-# ============================================================
-
-if brecha > 0:
-    cuota_recomendada = (
-        (capital_objetivo - aportacion_inicial * (1 + r_mensual) ** n_meses) * r_mensual
-    ) / ((1 + r_mensual) ** n_meses - 1)
+        st.error("Tu pensión no cubre tu nivel de vida futuro.")
+        st.info("💡 Vamos a calcular la cuota mensual recomendada para cubrir tu brecha.")
 
-    st.info(f"💡 Cuota mensual recomendada para cubrir tu brecha: **{cuota_recomendada:,.0f} €**")
-    st.caption("La cuota recomendada es la aportación teórica necesaria para cubrir tu brecha mensual según tus datos actuales.")
+        colA, colB = st.columns(2)
+        with colA:
+            aportacion_inicial = st.number_input("Aportación inicial (€)", min_value=0.0, value=0.0, step=100.0)
+        with colB:
+            rentabilidad = st.number_input("Rentabilidad media anual (%)", min_value=0.0, value=rentabilidad_base, step=0.1)
+            inflacion_media = st.number_input("Inflación media anual (%)", min_value=0.0, value=inflacion_base, step=0.1)
 
-else:
-    cuota_recomendada = 150.0
-
-cuota_mensual = st.number_input(
-    "Cuota mensual (€)",
-    min_value=0.0,
-    value=float(cuota_recomendada),
-    step=50.0,
-    key="cuota_mensual_srg"
-)
-
-if cuota_mensual < 80:
-    st.warning("⚠️ En los productos Ocaso, la cuota mínima permitida es de **80 €**.")
-    cuota_mensual = 80.0
-# ============================================================
-# 🟦 Función de simulación
-# ============================================================
+    else:
+        # ============================================================
+        # 🟦 CASO 2 — NO HAY BRECHA → modo libre
+        # ============================================================
+        st.success("Tu pensión cubrirá tu nivel de vida. No aparece brecha mensual.")
+        st.info("Puedes diseñar un plan de ahorro voluntario para tus objetivos personales.")
+
+        colA, colB = st.columns(2)
+        with colA:
+            aportacion_inicial = st.number_input("Aportación inicial (€)", min_value=0.0, value=1000.0, step=100.0)
+            rentabilidad = st.number_input("Rentabilidad media anual (%)", min_value=0.0, value=rentabilidad_base, step=0.1)
+        with colB:
+            inflacion_media = st.number_input("Inflación media anual (%)", min_value=0.0, value=inflacion_base, step=0.1)
 
-def simular_plan(cuota, aportacion_extra, rentabilidad_anual, inflacion_anual):
-    r = rentabilidad_anual / 100 / 12
-    inf_mensual = inflacion_anual / 100 / 12
-    n = anos_hasta_jub * 12
-
-    capital = aportacion_extra
-    historial = []
-
-    for mes in range(1, n + 1):
-        capital_inicio = capital
-        intereses = capital * r
-        capital += intereses + cuota
-
-        factor_inflacion = (1 + inf_mensual) ** mes
-        capital_ajustado = capital / factor_inflacion
-
-        historial.append({
-            "Mes": mes,
-            "Aportación mensual (€)": cuota,
-            "Capital inicio (€)": capital_inicio,
-            "Intereses ganados (€)": intereses,
-            "Capital final (€)": capital,
-            "Capital ajustado por inflación (€)": capital_ajustado
-        })
+    # ============================================================
+    # 🔥 SINCRONIZACIÓN COMPLETA DE CUOTAS SRG
+    # ============================================================
 
-    df = pd.DataFrame(historial)
-    total_aportado = aportacion_extra + cuota * n
-    beneficio_intereses = capital - total_aportado
-    capital_ajustado_final = df["Capital ajustado por inflación (€)"].iloc[-1]
-    rentabilidad_neta = (capital / total_aportado - 1) * 100 if total_aportado > 0 else 0
+    grafo.fijar(aportacion_inicial=aportacion_inicial, rentabilidad=rentabilidad, inflacion_media=inflacion_media)
+    n_meses = grafo["n_meses"]
 
-    return df, capital, total_aportado, beneficio_intereses, capital_ajustado_final, rentabilidad_neta
-# ============================================================
-# 🟦 Ajuste automático (referencia)
-# ============================================================
+    # ============================================================
+    # 🟦 Cuota recomendada y entrada manual
+    # ============================================================
 
-def ajustar_cuota(capital_objetivo, aportacion_inicial, rentabilidad_anual, inflacion_anual):
-    r_mensual_local = rentabilidad_anual / 100 / 12
-    n_meses_local = anos_hasta_jub * 12
+    cuota_recomendada = grafo["cuota_recomendada"]
+    if brecha > 0:
+        st.info(f"💡 Cuota mensual recomendada para cubrir tu brecha: **{cuota_recomendada:,.0f} €**")
+        st.caption("La cuota recomendada es la aportación teórica necesaria para cubrir tu brecha mensual según tus datos actuales.")
 
-    cuota = (
-        (capital_objetivo - aportacion_inicial * (1 + r_mensual_local) ** n_meses_local) * r_mensual_local
-    ) / ((1 + r_mensual_local) ** n_meses_local - 1)
+    cuota_mensual = st.number_input(
+        "Cuota mensual (€)",
+        min_value=0.0,
+        value=float(cuota_recomendada),
+        step=50.0,
+        key="cuota_mensual_srg"
+    )
 
-    paso = 10.0
-    for _ in range(500):
-        df_tmp, _, _, _, capital_ajustado_final_tmp, _ = simular_plan(
-            cuota, aportacion_inicial, rentabilidad_anual, inflacion_anual
-        )
-        diferencia = capital_objetivo - capital_ajustado_final_tmp
-        if abs(diferencia) < 50:
-            break
-        cuota += paso if diferencia > 0 else -paso
+    if cuota_mensual < calculo.CUOTA_MINIMA:
+        st.warning("⚠️ En los productos Ocaso, la cuota mínima permitida es de **80 €**.")
+        cuota_mensual = calculo.CUOTA_MINIMA
+    # ============================================================
+    # 🟦 Función de simulación
+    # ============================================================
 
-    return cuota
+    @cache.memoizar("simulacion")
+    def tabla_plan(cuota, aportacion_extra, rentabilidad_anual, inflacion_anual, meses):
+        plan = calculo.simular_plan(cuota, aportacion_extra, rentabilidad_anual, inflacion_anual, meses)
+
+        df = pd.DataFrame({
+            "Mes": plan.meses,
+            "Aportación mensual (€)": np.full(len(plan.meses), cuota, dtype=float),
+            "Capital inicio (€)": plan.capital_inicio,
+            "Intereses ganados (€)": plan.intereses,
+            "Capital final (€)": plan.capital,
+            "Capital ajustado por inflación (€)": plan.capital_ajustado
+        })
 
-cuota_ajustada = ajustar_cuota(capital_objetivo, aportacion_inicial, rentabilidad, inflacion_media)
+        return (df, plan.capital_final, plan.total_aportado, plan.beneficio_intereses,
+                plan.capital_ajustado_final, plan.rentabilidad_neta)
 
-if cuota_ajustada < 80:
-    cuota_ajustada = 80.0
+    tabla_plan = crono.envolver("simulacion", tabla_plan)
+    # ============================================================
+    # 🟦 Ajuste automático (referencia)
+    # ============================================================
 
-st.info(f"🔧 Cuota ajustada automáticamente (referencia): **{cuota_ajustada:,.0f} €**")
-st.caption("La cuota ajustada se calcula iterando el modelo SRG para alcanzar exactamente el capital objetivo, considerando inflación y rentabilidad.")
-# ============================================================
-# 🟦 Cuota real (la que manda)
-# ============================================================
+    cuota_ajustada, iteraciones_cuota = grafo["cuota_ajustada"]
 
-cuota_real = cuota_mensual
+    if cuota_ajustada < calculo.CUOTA_MINIMA:
+        cuota_ajustada = calculo.CUOTA_MINIMA
 
-# ============================================================
-# 🔄 Recalcular automáticamente al cambiar la cuota
-# ============================================================
+    st.info(f"🔧 Cuota ajustada automáticamente (referencia): **{cuota_ajustada:,.0f} €**")
+    st.caption("La cuota ajustada se calcula resolviendo el modelo SRG para alcanzar exactamente el capital objetivo, considerando inflación y rentabilidad.")
+    # ============================================================
+    # 🟦 Cuota real (la que manda)
+    # ============================================================
 
-def actualizar_simulacion():
-    df, capital_final, total_aportado, beneficio_intereses, capital_ajustado_final, rentabilidad_neta = simular_plan(
-        cuota_real, aportacion_inicial, rentabilidad, inflacion_media
+    cuota_real = cuota_mensual
+
+    # Entradas que determinan la simulación, el gráfico y las tablas
+    clave_plan = (cuota_real, aportacion_inicial, rentabilidad, inflacion_media, n_meses)
+
+    # Escenario completo con los datos de la pantalla (para los cálculos del paquete srg)
+    escenario_actual = calculo.Escenario(
+        edad_actual=edad_actual,
+        edad_prevista_jub=edad_prevista_jub_input,
+        esperanza_vida=esperanza_vida,
+        anos_cotizados_hoy=anos_cotizados_hoy,
+        anos_futuros=anos_futuros,
+        tipo_jubilacion=tipo_jubilacion,
+        meses_anticipo=meses_anticipo,
+        meses_demora=meses_demora or 1,
+        ingresos=ingresos,
+        gastos=gastos,
+        salario_actual=salario_actual,
+        crecimiento_salarial=crecimiento_salarial,
+        ipc_actualizacion=ipc_actualizacion,
+        inflacion=inflacion,
+        reval=reval,
+        modo_nivel_vida=modo_nivel_vida,
+        porcentaje_mantenimiento=porcentaje_mantenimiento,
+        modo_brecha=modo_brecha,
+        aportacion_inicial=aportacion_inicial,
+        rentabilidad=rentabilidad,
+        inflacion_media=inflacion_media,
+        cuota_mensual=cuota_real,
     )
-    st.session_state["df"] = df
-    st.session_state["capital_final"] = capital_final
-    st.session_state["total_aportado"] = total_aportado
-    st.session_state["beneficio_intereses"] = beneficio_intereses
-    st.session_state["capital_ajustado_final"] = capital_ajustado_final
-    st.session_state["rentabilidad_neta"] = rentabilidad_neta
-
-actualizar_simulacion()
-
-df = st.session_state["df"]
-capital_final = st.session_state["capital_final"]
-total_aportado = st.session_state["total_aportado"]
-beneficio_intereses = st.session_state["beneficio_intereses"]
-capital_ajustado_final = st.session_state["capital_ajustado_final"]
-rentabilidad_neta = st.session_state["rentabilidad_neta"]
-# ============================================================
-# 🟩 Mensaje de cumplimiento del objetivo
-# ============================================================
 
-if capital_final >= capital_objetivo:
-    st.success(
-        f"🎯 Con una cuota de {cuota_real:,.0f} €, tu capital estimado ({capital_final:,.0f} €) "
-        f"supera el capital objetivo ({capital_objetivo:,.0f} €). ¡Cumples tu objetivo de ahorro!"
-    )
-elif capital_final >= capital_objetivo * 0.95:
-    st.info(
-        f"✅ Estás muy cerca de cumplir tu objetivo: tu capital estimado ({capital_final:,.0f} €) "
-        f"alcanza el 95 % del capital objetivo ({capital_objetivo:,.0f} €)."
-    )
-else:
-    st.warning(
-        f"⚠️ Con esta cuota ({cuota_real:,.0f} €), tu capital estimado ({capital_final:,.0f} €) "
-        f"no llega al objetivo ({capital_objetivo:,.0f} €). Considera aumentar tu aportación."
-    )
-# ============================================================
-# 🟦 Gráfico SRG
-# ============================================================
+    # ============================================================
+    # 🔄 Recalcular automáticamente al cambiar la cuota
+    # ============================================================
 
-fig = go.Figure()
-fig.add_trace(go.Scatter(x=df["Mes"], y=df["Capital final (€)"], mode="lines",
-                         name="Ahorro con crecimiento", line=dict(color="green", width=3)))
-fig.add_trace(go.Scatter(x=df["Mes"], y=aportacion_inicial + df["Aportación mensual (€)"].cumsum(),
-                         mode="lines", name="Ahorro aportado", line=dict(color="blue", width=2)))
-fig.add_trace(go.Scatter(x=df["Mes"], y=df["Capital ajustado por inflación (€)"],
-                         mode="lines", name="Ahorro ajustado por inflación",
-                         line=dict(color="red", dash="dot", width=2)))
-
-fig.update_layout(height=450, template="plotly_white")
-st.plotly_chart(fig, use_container_width=True)
-# ============================================================
-# 🟨 Tabla mensual SRG con estilo visual igual al informe (dentro de expander)
-# ============================================================
+    # El grafo guarda el resultado compacto (float32, sin DataFrame) y solo lo recalcula si
+    # cambia clave_plan; las tablas se construyen al mostrarlas, desde la caché "simulacion"
+    grafo.fijar(cuota_mensual=cuota_real)
+    resultado_plan = grafo["plan"]
+    capital_final = resultado_plan.capital_final
+    total_aportado = resultado_plan.total_aportado
+    beneficio_intereses = resultado_plan.beneficio_intereses
+    capital_ajustado_final = resultado_plan.capital_ajustado_final
+    rentabilidad_neta = resultado_plan.rentabilidad_neta
+
+    # Log de lo recalculado en el bloque 4 (en un rerun del fragmento, solo esto)
+    grafo.registrar("BLOQUE 4")
+    # ============================================================
+    # 🟩 Mensaje de cumplimiento del objetivo
+    # ============================================================
 
-# Convertimos el DataFrame a HTML con formato y estilo SRG
-tabla_html = df.round(2).to_html(index=False)
+    if capital_final >= capital_objetivo:
+        st.success(
+            f"🎯 Con una cuota de {cuota_real:,.0f} €, tu capital estimado ({capital_final:,.0f} €) "
+            f"supera el capital objetivo ({capital_objetivo:,.0f} €). ¡Cumples tu objetivo de ahorro!"
+        )
+    elif capital_final >= capital_objetivo * 0.95:
+        st.info(
+            f"✅ Estás muy cerca de cumplir tu objetivo: tu capital estimado ({capital_final:,.0f} €) "
+            f"alcanza el 95 % del capital objetivo ({capital_objetivo:,.0f} €)."
+        )
+    else:
+        st.warning(
+            f"⚠️ Con esta cuota ({cuota_real:,.0f} €), tu capital estimado ({capital_final:,.0f} €) "
+            f"no llega al objetivo ({capital_objetivo:,.0f} €). Considera aumentar tu aportación."
+        )
+    # ============================================================
+    # 🟦 Gráfico SRG
+    # ============================================================
+    crono.marca("BLOQUE 4 — Gráfico y análisis")
+
+    # Las series se reducen con LTTB a max_puntos por traza y pasan como arrays tipados
+    @cache.memoizar("figura", max_entradas=32)
+    def figura_plan(cuota, aportacion_extra, rentabilidad_anual, inflacion_anual, meses,
+                    max_puntos=graficos.MAX_PUNTOS):
+        df = tabla_plan(cuota, aportacion_extra, rentabilidad_anual, inflacion_anual, meses)[0]
+        mes = df["Mes"].to_numpy()
+
+        fig = go.Figure()
+        fig.add_trace(graficos.traza(mes, df["Capital final (€)"].to_numpy(), max_puntos, mode="lines",
+                                     name="Ahorro con crecimiento", line=dict(color="green", width=3)))
+        fig.add_trace(graficos.traza(mes, aportacion_extra + df["Aportación mensual (€)"].cumsum().to_numpy(),
+                                     max_puntos, mode="lines", name="Ahorro aportado",
+                                     line=dict(color="blue", width=2)))
+        fig.add_trace(graficos.traza(mes, df["Capital ajustado por inflación (€)"].to_numpy(), max_puntos,
+                                     mode="lines", name="Ahorro ajustado por inflación",
+                                     line=dict(color="red", dash="dot", width=2)))
+        fig.update_layout(height=450, template="plotly_white")
+        return fig
+
+    figura_plan = crono.envolver("figura", figura_plan)
+    fig = figura_plan(*clave_plan)
 
-# Aplicamos el estilo visual SRG (fondo amarillo + encabezado azul + borde dorado + bordes redondeados)
-tabla_html = f"""
-<style>
-    .tabla-srg {{
-        width: 100%;
-        border-collapse: separate; /* IMPORTANTE para bordes redondeados */
-        border-spacing: 0;         /* elimina huecos entre celdas */
-        font-family: 'Segoe UI', Arial, sans-serif;
-        font-size: 14px;
-        margin-top: 10px;
-        background-color: #fff8dc; /* Fondo amarillo claro */
-        border: 2px solid #d4af37; /* Borde dorado */
-        border-radius: 12px;       /* Bordes redondeados */
-        overflow: hidden;          /* Mantiene redondeo en toda la tabla */
-        box-shadow: 0 4px 10px rgba(0,0,0,0.1);
-    }}
+    # ============================================================
+    # 🟪 Modo Monte Carlo (rentabilidad e inflación aleatorias)
+    # ============================================================
 
-    .tabla-srg th {{
-        background-color: #0055A4; /* Azul SRG */
-        color: white;
-        text-align: center;
-        padding: 10px;
-        border: 1px solid #ccc;
-        font-weight: 600;
-    }}
+    def grafico_abanico(resultado_mc):
+        # Bandas de percentiles del capital nominal y real, de fuera hacia dentro
+        fig_mc = go.Figure()
+        meses_mc = resultado_mc.meses
+        n_bandas = len(resultado_mc.percentiles)
+        for bandas, color, nombre in (
+            (resultado_mc.bandas_nominal, "0,128,0", "nominal"),
+            (resultado_mc.bandas_real, "200,0,0", "real"),
+        ):
+            for i in range(n_bandas // 2):
+                bajo, alto = resultado_mc.percentiles[i], resultado_mc.percentiles[-1 - i]
+                fig_mc.add_trace(graficos.traza(meses_mc, bandas[-1 - i], mode="lines",
+                                                line=dict(width=0), showlegend=False, hoverinfo="skip"))
+                fig_mc.add_trace(graficos.traza(meses_mc, bandas[i], mode="lines", line=dict(width=0),
+                                                fill="tonexty", fillcolor=f"rgba({color},{0.15 + 0.15 * i})",
+                                                name=f"P{bajo}–P{alto} {nombre}"))
+            fig_mc.add_trace(graficos.traza(meses_mc, bandas[n_bandas // 2], mode="lines",
+                                            line=dict(color=f"rgb({color})", width=2),
+                                            name=f"Mediana {nombre}"))
+        fig_mc.add_hline(y=capital_objetivo, line=dict(color="gray", dash="dash"),
+                         annotation_text="Capital objetivo")
+        fig_mc.update_layout(height=450, template="plotly_white")
+        return fig_mc
+
+    modo_montecarlo = st.toggle(
+        "Modo Monte Carlo (rentabilidad e inflación aleatorias)",
+        value=False,
+        key="modo_montecarlo_input",
+        help="Simula miles de escenarios de mercado e inflación alrededor de las medias indicadas."
+    )
 
-    .tabla-srg td {{
-        text-align: right;
-        padding: 8px 10px;
-        border: 1px solid #ccc;    /* Líneas internas visibles */
-        color: #0A1A2F;
-        background-color: #fff8dc; /* Fondo uniforme */
-    }}
+    if modo_montecarlo:
+        col_mc1, col_mc2, col_mc3 = st.columns(3)
+        with col_mc1:
+            volatilidad_mc = st.number_input("Volatilidad anual de la rentabilidad (%)", min_value=0.0,
+                                             max_value=40.0, value=8.0, step=0.5, key="volatilidad_mc_input")
+        with col_mc2:
+            volatilidad_inflacion_mc = st.number_input("Volatilidad anual de la inflación (%)", min_value=0.0,
+                                                       max_value=10.0, value=1.0, step=0.1,
+                                                       key="volatilidad_inflacion_mc_input")
+        with col_mc3:
+            trayectorias_mc = st.number_input("Número de escenarios", min_value=100, max_value=100_000,
+                                              value=2000, step=500, key="trayectorias_mc_input")
+
+        resultado_mc = simular_montecarlo_srg(
+            cuota_real, aportacion_inicial, rentabilidad, inflacion_media, n_meses,
+            capital_objetivo=capital_objetivo,
+            volatilidad_anual=volatilidad_mc,
+            volatilidad_inflacion=volatilidad_inflacion_mc,
+            n_trayectorias=int(trayectorias_mc),
+            semilla=0,
+        )
 
-    .tabla-srg tr {{
-        background-color: #fff8dc; /* Sin alternancia */
-    }}
-</style>
+        col_fig, col_mc = st.columns(2)
+        with col_fig:
+            st.plotly_chart(fig, use_container_width=True)
+        with col_mc:
+            st.plotly_chart(grafico_abanico(resultado_mc), use_container_width=True)
+
+        col_p1, col_p2, col_p3 = st.columns(3)
+        col_p1.metric("Capital final mediano", f"{resultado_mc.percentil(50):,.0f} €")
+        col_p2.metric("Capital real (P5 – P95)",
+                      f"{resultado_mc.percentil(5, real=True):,.0f} – {resultado_mc.percentil(95, real=True):,.0f} €")
+        col_p3.metric("Probabilidad de alcanzar el objetivo", f"{resultado_mc.prob_objetivo * 100:.0f} %")
+    else:
+        st.plotly_chart(fig, use_container_width=True)
 
-<table class="tabla-srg">
-{tabla_html.split('<table border="1" class="dataframe">')[1].split('</table>')[0]}
-</table>
-"""
+    # ============================================================
+    # 🟪 Análisis de sensibilidad (rentabilidad × inflación × edad)
+    # ============================================================
 
-# Mostramos la tabla dentro de un expander para evitar scroll infinito
-with st.expander("Ver detalle mes a mes del plan de ahorro"):
-    st.markdown(tabla_html, unsafe_allow_html=True)
+    modo_sensibilidad = st.toggle(
+        "Análisis de sensibilidad",
+        value=False,
+        key="modo_sensibilidad_input",
+        help="¿Y si la rentabilidad fuera otra, la inflación distinta o te jubilaras a otra edad?"
+    )
 
-# ============================================================
-# 🟦 Datos del cliente para informes
-# ============================================================
+    if modo_sensibilidad:
+        col_s1, col_s2, col_s3 = st.columns(3)
+        with col_s1:
+            rango_rent = st.slider("Rentabilidad anual (%)", 0.0, 12.0, (1.0, 7.0), step=0.5, key="rango_rent_input")
+        with col_s2:
+            rango_infl = st.slider("Inflación anual (%)", 0.0, 8.0, (1.0, 4.0), step=0.25, key="rango_infl_input")
+        with col_s3:
+            rango_edad = st.slider("Edad de jubilación", min(edad_actual + 1, 75), 75,
+                                   (min(max(edad_actual + 1, 63), 75), 75), key="rango_edad_input")
+
+        rentabilidades_s = np.arange(rango_rent[0], rango_rent[1] + 1e-9, 0.5)
+        inflaciones_s = np.arange(rango_infl[0], rango_infl[1] + 1e-9, 0.25)
+        edades_s = np.arange(rango_edad[0], rango_edad[1] + 1)
+
+        resultado_s = rejilla_sensibilidad_srg(escenario_actual, rentabilidades_s, inflaciones_s, edades_s)
+
+        metricas_s = {
+            "Cuota necesaria (€)": resultado_s.cuota_ajustada,
+            "Cuota recomendada (€)": resultado_s.cuota_recomendada,
+            "Brecha mensual (€)": resultado_s.brecha,
+            "Capital objetivo (€)": resultado_s.capital_objetivo,
+        }
+        col_s4, col_s5 = st.columns(2)
+        with col_s4:
+            metrica_s = st.selectbox("Resultado a mostrar", list(metricas_s), key="metrica_sensibilidad_input")
+        valores_s = metricas_s[metrica_s]
+
+        if metrica_s.startswith("Cuota"):
+            # Rentabilidad × inflación para una edad concreta
+            with col_s5:
+                edad_s = st.select_slider("Edad de jubilación mostrada", options=list(edades_s),
+                                          value=int(np.clip(edad_prevista_jub_input, edades_s[0], edades_s[-1])),
+                                          key="edad_sensibilidad_input")
+            z_s = valores_s[:, :, list(edades_s).index(edad_s)]
+            y_s, titulo_y = rentabilidades_s, "Rentabilidad anual (%)"
+        else:
+            # La brecha y el capital objetivo no dependen de la rentabilidad: edad × inflación
+            z_s = valores_s[0].T
+            y_s, titulo_y = edades_s, "Edad de jubilación"
+
+        fig_s = go.Figure(go.Heatmap(
+            z=z_s, x=inflaciones_s, y=y_s, colorscale="RdYlGn_r",
+            colorbar=dict(title="€"),
+            hovertemplate="Inflación %{x:.2f} %<br>" + titulo_y + " %{y}<br>%{z:,.0f} €<extra></extra>",
+        ))
+        fig_s.update_layout(height=450, template="plotly_white",
+                            xaxis_title="Inflación anual (%)", yaxis_title=titulo_y)
+        st.plotly_chart(fig_s, use_container_width=True)
+    # ============================================================
+    # 🟨 Tabla mensual SRG con estilo visual igual al informe (dentro de expander)
+    # ============================================================
+    crono.marca("BLOQUE 4 — Tabla mensual")
+
+    @cache.memoizar("tabla_evolucion", max_entradas=32)
+    def tabla_evolucion_html(cuota, aportacion_extra, rentabilidad_anual, inflacion_anual, meses):
+        df = tabla_plan(cuota, aportacion_extra, rentabilidad_anual, inflacion_anual, meses)[0]
+        return df.round(2).to_html(index=False)
+
+    @cache.memoizar("tabla_html", max_entradas=64)
+    def tabla_mensual_html(cuota, aportacion_extra, rentabilidad_anual, inflacion_anual, meses, pagina, filas_pagina):
+        # Solo se convierte a HTML la página visible, con el formato y estilo SRG
+        df = tabla_plan(cuota, aportacion_extra, rentabilidad_anual, inflacion_anual, meses)[0]
+        inicio = pagina * filas_pagina
+        tabla_html = df.iloc[inicio:inicio + filas_pagina].round(2).to_html(index=False, border=0, classes="tabla-srg")
+        return ESTILO_TABLA_SRG + tabla_html
+
+    # Mostramos la tabla paginada dentro de un expander para evitar scroll infinito.
+    # Mientras está cerrado no se genera nada.
+    detalle_mensual = st.expander("Ver detalle mes a mes del plan de ahorro",
+                                  key="detalle_mensual", on_change="rerun")
+    with detalle_mensual:
+        if detalle_mensual.open:
+            col_filas, col_pagina = st.columns(2)
+            with col_filas:
+                filas_pagina = st.selectbox("Filas por página", FILAS_POR_PAGINA, index=1,
+                                            key="filas_tabla_mensual_input")
+            n_paginas = max(1, -(-n_meses // filas_pagina))
+            # Si el plan se acorta, la página guardada puede quedar fuera de rango
+            if st.session_state.get("pagina_tabla_mensual_input", 1) > n_paginas:
+                st.session_state.pagina_tabla_mensual_input = n_paginas
+            with col_pagina:
+                pagina = st.number_input(f"Página (de {n_paginas})", min_value=1, max_value=n_paginas,
+                                         step=1, key="pagina_tabla_mensual_input")
+
+            inicio_pagina = (pagina - 1) * filas_pagina
+            st.caption(f"Meses {inicio_pagina + 1}–{min(inicio_pagina + filas_pagina, n_meses)} de {n_meses}")
+            st.markdown(tabla_mensual_html(*clave_plan, pagina - 1, filas_pagina), unsafe_allow_html=True)
+
+    @st.fragment
+    def seccion_informes():
+        # ============================================================
+        # 🟦 Datos del cliente para informes
+        # ============================================================
+        rerun_informes = crono.abrir_fragmento("Informes")
+        crono.marca("Informes")
 
-st.markdown("""
+        st.markdown("""
 <div class='srg-box'>
     <h4>Datos del cliente</h4>
 </div>
 """, unsafe_allow_html=True)
 
-col1, col2 = st.columns(2)
-with col1:
-    nombre_cliente = st.text_input("Nombre del cliente", value="Cliente SRG")
-    apellido_cliente = st.text_input("Apellidos", value="")
-with col2:
-    telefono_cliente = st.text_input("Teléfono", value="")
-    email_cliente = st.text_input("Email", value="")
-
-fecha_actual = datetime.date.today().strftime("%d/%m/%Y")
-# ============================================================
-# 🟦 Explicaciones SRG para informes
-# ============================================================
-
-explicaciones = {
-    "exp_base_reguladora": "La base reguladora es la media de tus bases de cotización...",
-    "exp_pension": "Tu pensión futura se calcula aplicando el porcentaje...",
-    "exp_nivel_vida": "Tu nivel de vida futuro se obtiene inflando tus gastos...",
-    "exp_brecha": "La brecha es la diferencia entre pensión futura y nivel de vida...",
-    "exp_capital_objetivo": "El capital objetivo es la brecha mensual multiplicada por años...",
-    "exp_plan_ahorro": "El plan SRG calcula automáticamente la cuota necesaria...",
-    "exp_grafico": "La gráfica muestra ahorro aportado, crecimiento e inflación...",
-    "exp_tabla": "La tabla evolutiva muestra aportación, intereses y capital..."
-}
-# ============================================================
-# 🟦 Contexto para informes
-# ============================================================
-
-contexto_pdf = {
-    "nombre_cliente": f"{nombre_cliente} {apellido_cliente}",
-    "telefono": telefono_cliente,
-    "email": email_cliente,
-    "fecha": fecha_actual,
-    "pension_futura": pension_futura,
-    "nivel_vida": nivel_vida_futuro,
-    "brecha": brecha,
-    "cuota_recomendada": cuota_real,
-    "capital_final": capital_final,
-    "capital_objetivo": capital_objetivo,
-    "capital_ajustado_final": capital_ajustado_final,
-    "rentabilidad_neta": rentabilidad_neta,
-    "rentabilidad": rentabilidad,
-    "inflacion_media": inflacion_media,
-    "tabla_evolucion": df.round(2).to_html(index=False),
-}
-contexto_pdf.update(explicaciones)
-# ============================================================
-# 🟦 Función Informe Cliente SRG — lenguaje cotidiano
-# ============================================================
-
-def informe_cliente(contexto, fig):
-    grafica_html = fig.to_html(include_plotlyjs='cdn') if fig else ""
-
-    return f"""
+        col1, col2 = st.columns(2)
+        with col1:
+            nombre_cliente = st.text_input("Nombre del cliente", value="Cliente SRG")
+            apellido_cliente = st.text_input("Apellidos", value="")
+        with col2:
+            telefono_cliente = st.text_input("Teléfono", value="")
+            email_cliente = st.text_input("Email", value="")
+
+        fecha_actual = datetime.date.today().strftime("%d/%m/%Y")
+        # ============================================================
+        # 🟦 Explicaciones SRG para informes
+        # ============================================================
+
+        explicaciones = {
+            "exp_base_reguladora": "La base reguladora es la media de tus bases de cotización...",
+            "exp_pension": "Tu pensión futura se calcula aplicando el porcentaje...",
+            "exp_nivel_vida": "Tu nivel de vida futuro se obtiene inflando tus gastos...",
+            "exp_brecha": "La brecha es la diferencia entre pensión futura y nivel de vida...",
+            "exp_capital_objetivo": "El capital objetivo es la brecha mensual multiplicada por años...",
+            "exp_plan_ahorro": "El plan SRG calcula automáticamente la cuota necesaria...",
+            "exp_grafico": "La gráfica muestra ahorro aportado, crecimiento e inflación...",
+            "exp_tabla": "La tabla evolutiva muestra aportación, intereses y capital..."
+        }
+        # ============================================================
+        # 🟦 Contexto para informes
+        # ============================================================
+
+        contexto_pdf = {
+            "nombre_cliente": f"{nombre_cliente} {apellido_cliente}",
+            "telefono": telefono_cliente,
+            "email": email_cliente,
+            "fecha": fecha_actual,
+            "pension_futura": pension_futura,
+            "nivel_vida": nivel_vida_futuro,
+            "brecha": brecha,
+            "cuota_recomendada": cuota_real,
+            "capital_final": capital_final,
+            "capital_objetivo": capital_objetivo,
+            "capital_ajustado_final": capital_ajustado_final,
+            "rentabilidad_neta": rentabilidad_neta,
+            "rentabilidad": rentabilidad,
+            "inflacion_media": inflacion_media,
+        }
+        contexto_pdf.update(explicaciones)
+        # ============================================================
+        # 🟦 Función Informe Cliente SRG — lenguaje cotidiano
+        # ============================================================
+
+        def informe_cliente(contexto, grafica_html):
+
+            return f"""
     <html>
     <head>
         <meta charset="UTF-8">
@@ -1870,14 +1633,13 @@ def informe_cliente(contexto, fig):
     """
 
 
-# ============================================================
-# 🟦 Función Informe Técnico SRG — Agente
-# ============================================================
+        # ============================================================
+        # 🟦 Función Informe Técnico SRG — Agente
+        # ============================================================
 
-def informe_agente(contexto, fig):
-    grafica_html = fig.to_html(include_plotlyjs='cdn') if fig else ""
+        def informe_agente(contexto, grafica_html):
 
-    return f"""
+            return f"""
     <html>
     <head>
         <meta charset="UTF-8">
@@ -2051,17 +1813,65 @@ def informe_agente(contexto, fig):
     </html>
     """
 
-# ============================================================
-# 🟦 BLOQUE FINAL SRG — VISTA PREVIA Y DESCARGAS
-# ============================================================
-
-html_cliente_recom = informe_cliente(contexto_pdf, fig)
-html_agente_recom = informe_agente(contexto_pdf, fig)
-
-bytes_cliente_recom = html_cliente_recom.encode("utf-8")
-bytes_agente_recom = html_agente_recom.encode("utf-8")
+        # ============================================================
+        # 🟦 BLOQUE FINAL SRG — VISTA PREVIA Y DESCARGAS
+        # ============================================================
+
+        # Los informes solo se generan al abrir la vista previa o al pulsar descargar.
+        # El gráfico se serializa una vez y lo comparten los dos informes.
+
+        # En modo compacto la tabla y el gráfico van a resolución anual, el gráfico es SVG
+        # (o Plotly con el bundle incrustado una vez) y el CSS se minifica: sin CDN.
+
+        @cache.memoizar("grafica_html", max_entradas=16)
+        def grafica_html_plan(cuota, aportacion_extra, rentabilidad_anual, inflacion_anual, meses,
+                              formato=informes.FORMATO_COMPLETO):
+            if formato == informes.FORMATO_COMPLETO:
+                return figura_plan(cuota, aportacion_extra, rentabilidad_anual, inflacion_anual, meses).to_html(include_plotlyjs='cdn')
+
+            plan = calculo.simular_plan(cuota, aportacion_extra, rentabilidad_anual, inflacion_anual, meses)
+            meses_anuales, series = informes.series_anuales(plan)
+            if formato == informes.FORMATO_OFFLINE:
+                return informes.grafico_plotly_div(meses_anuales, series)
+            return informes.grafico_svg(meses_anuales, series)
+
+        @cache.memoizar("tabla_evolucion_anual", max_entradas=32)
+        def tabla_evolucion_anual_html(cuota, aportacion_extra, rentabilidad_anual, inflacion_anual, meses):
+            # Una fila por año (cierre de cada año y último mes) en lugar de una por mes
+            df = tabla_plan(cuota, aportacion_extra, rentabilidad_anual, inflacion_anual, meses)[0]
+            filas = informes.indices_anuales(len(df))[1:] - 1
+            return df.iloc[filas].round(2).to_html(index=False)
+
+        def informe_srg(nombre, funcion_informe, contexto, clave_plan_informe, formato=informes.FORMATO_COMPLETO):
+            # Devuelve (html, bytes) del informe, cacheado por la huella del escenario y el formato.
+            # La tabla de evolución ya queda determinada por clave_plan, así que no entra en la huella.
+            def producir():
+                if formato == informes.FORMATO_COMPLETO:
+                    tabla = tabla_evolucion_html(*clave_plan_informe)
+                else:
+                    tabla = tabla_evolucion_anual_html(*clave_plan_informe)
+                contexto_completo = dict(contexto, tabla_evolucion=tabla)
+                html = funcion_informe(contexto_completo, grafica_html_plan(*clave_plan_informe, formato=formato))
+                if formato != informes.FORMATO_COMPLETO:
+                    html = informes.compactar_html(html, incluir_plotly=formato == informes.FORMATO_OFFLINE)
+                return html, html.encode("utf-8")
+
+            return cache.obtener(nombre, cache.huella(contexto, clave_plan_informe, formato), producir, max_entradas=16)
+
+        informe_srg = crono.envolver("informe_html", informe_srg)
+
+        def bytes_informe(nombre, funcion_informe, contexto, clave_plan_informe, formato=informes.FORMATO_COMPLETO):
+            return informe_srg(nombre, funcion_informe, contexto, clave_plan_informe, formato)[1]
+
+        # PDF nativo con ReportLab, sin pasar por el navegador
+        @cache.memoizar("informe_pdf", max_entradas=16)
+        def informe_pdf_srg(tipo, contexto, cuota, aportacion_extra, rentabilidad_anual, inflacion_anual, meses):
+            plan = calculo.simular_plan(cuota, aportacion_extra, rentabilidad_anual, inflacion_anual, meses)
+            return informes_pdf.informe_pdf(tipo, contexto, plan)
+
+        informe_pdf_srg = crono.envolver("informe_pdf", informe_pdf_srg)
 
-st.markdown("""
+        st.markdown("""
 <div style="
     background: linear-gradient(135deg, #003366, #0055A4);
     color: white;
@@ -2075,35 +1885,122 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-col_cli, col_ag = st.columns(2)
+        formato_informe = st.radio(
+            "Formato de los informes",
+            options=list(informes.FORMATOS),
+            format_func=informes.FORMATOS.get,
+            horizontal=True,
+            key="formato_informe_input",
+        )
 
-with col_cli:
-    st.markdown("### Informe Cliente SRG")
-    st.caption("Versión explicada en lenguaje cotidiano para el cliente.")
+        col_cli, col_ag = st.columns(2)
 
-    with st.expander("Vista previa del informe"):
-        st.components.v1.html(html_cliente_recom, height=350, scrolling=True)
+        with col_cli:
+            st.markdown("### Informe Cliente SRG")
+            st.caption("Versión explicada en lenguaje cotidiano para el cliente.")
 
-    st.download_button(
-        label="📄 Descargar Informe Cliente",
-        data=bytes_cliente_recom,
-        file_name="Informe_Cliente_SRG.html",
-        mime="text/html"
-    )
+            vista_cliente = st.expander("Vista previa del informe", key="vista_informe_cliente", on_change="rerun")
+            with vista_cliente:
+                if vista_cliente.open:
+                    html_cliente_recom, _ = informe_srg("informe_cliente", informe_cliente, contexto_pdf, clave_plan, formato_informe)
+                    st.components.v1.html(html_cliente_recom, height=350, scrolling=True)
+
+            st.download_button(
+                label="📄 Descargar Informe Cliente",
+                data=functools.partial(bytes_informe, "informe_cliente", informe_cliente, contexto_pdf, clave_plan,
+                                       formato_informe),
+                file_name="Informe_Cliente_SRG.html",
+                mime="text/html"
+            )
+            st.download_button(
+                label="📕 Descargar Informe Cliente (PDF)",
+                data=functools.partial(informe_pdf_srg, "cliente", contexto_pdf, *clave_plan),
+                file_name="Informe_Cliente_SRG.pdf",
+                mime="application/pdf"
+            )
 
-with col_ag:
-    st.markdown("### Informe Técnico SRG — Agente")
-    st.caption("Versión técnica con cálculos y metodología SRG.")
+        with col_ag:
+            st.markdown("### Informe Técnico SRG — Agente")
+            st.caption("Versión técnica con cálculos y metodología SRG.")
+
+            vista_agente = st.expander("Vista previa del informe", key="vista_informe_agente", on_change="rerun")
+            with vista_agente:
+                if vista_agente.open:
+                    html_agente_recom, _ = informe_srg("informe_agente", informe_agente, contexto_pdf, clave_plan, formato_informe)
+                    st.components.v1.html(html_agente_recom, height=350, scrolling=True)
+
+            st.download_button(
+                label="📄 Descargar Informe Técnico",
+                data=functools.partial(bytes_informe, "informe_agente", informe_agente, contexto_pdf, clave_plan,
+                                       formato_informe),
+                file_name="Informe_Agente_SRG.html",
+                mime="text/html"
+            )
+            st.download_button(
+                label="📕 Descargar Informe Técnico (PDF)",
+                data=functools.partial(informe_pdf_srg, "agente", contexto_pdf, *clave_plan),
+                file_name="Informe_Agente_SRG.pdf",
+                mime="application/pdf"
+            )
+        if rerun_informes:
+            cerrar_fragmento("informes")
 
-    with st.expander("Vista previa del informe"):
-        st.components.v1.html(html_agente_recom, height=350, scrolling=True)
+    seccion_informes()
+    if rerun_fragmento:
+        cerrar_fragmento("bloque_ahorro")
+
+
+# Log de los nodos del grafo recalculados en los bloques 1–3
+grafo.registrar("BLOQUES 1-3")
+bloque_ahorro()
+
+# ============================================================
+# 🟦 Informes masivos de cartera (ZIP)
+# ============================================================
+crono.marca("Informes masivos")
+
+# Las columnas del CSV son las de calculo.Escenario (edad_actual es obligatoria)
+# más nombre, telefono y email opcionales. Los PDF se escriben en un ZIP temporal
+# a medida que se generan; el ZIP se guarda en la sesión y se puede descargar hasta
+# que se genera otro lote o se cierra la sesión (lote.ZipTemporal).
+with st.expander("Informes masivos de cartera (ZIP)"):
+    fichero_cartera = st.file_uploader("Tabla de clientes (CSV)", type="csv", key="cartera_csv_input")
+    if fichero_cartera is not None and st.button("Generar informes de la cartera", key="generar_lote"):
+        tabla_cartera = pd.read_csv(fichero_cartera)
+        barra_lote = st.progress(0.0, text="Generando informes…")
+
+        def progreso_lote(hechos, total, informes_por_segundo):
+            barra_lote.progress(hechos / total,
+                                text=f"{hechos} / {total} clientes · {informes_por_segundo:,.1f} informes/s")
+
+        zip_anterior = st.session_state.pop("zip_lote", None)
+        if zip_anterior is not None:
+            zip_anterior.borrar()
+        zip_nuevo = lote.ZipTemporal()
+        try:
+            zip_nuevo.resultado = lote.generar_zip(tabla_cartera, zip_nuevo.ruta, trabajadores=lote.trabajadores_app(),
+                                                   progreso=progreso_lote)
+        except BaseException:
+            zip_nuevo.borrar()
+            raise
+        st.session_state["zip_lote"] = zip_nuevo
+
+    zip_lote = st.session_state.get("zip_lote")
+    if zip_lote is not None and zip_lote.existe():
+        resultado_lote = zip_lote.resultado
+        col_l1, col_l2, col_l3 = st.columns(3)
+        col_l1.metric("Informes generados", f"{resultado_lote.n_informes:,}")
+        col_l2.metric("Velocidad", f"{resultado_lote.informes_por_segundo:,.1f} informes/s")
+        col_l3.metric("Memoria máxima", f"{max(resultado_lote.rss_max_mb, resultado_lote.rss_max_trabajadores_mb):,.0f} MB")
+        # Solo se lee del disco al pulsar el botón
+        st.download_button(
+            label="🗂️ Descargar ZIP de informes",
+            data=zip_lote.leer,
+            file_name="Informes_Cartera_SRG.zip",
+            mime="application/zip",
+            key="descargar_zip_lote"
+        )
 
-    st.download_button(
-        label="📄 Descargar Informe Técnico",
-        data=bytes_agente_recom,
-        file_name="Informe_Agente_SRG.html",
-        mime="text/html"
-    )
 st.markdown("""
 <div style="
     width:100%;
@@ -2120,3 +2017,39 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# ============================================================
+# 🟦 Panel de administración: tiempos por bloque
+# ============================================================
+
+# Presupuesto de memoria por sesión: si se supera se descarta lo que se regenera en el siguiente rerun
+# (aquí, el grafo de dependencias con el plan compacto)
+bytes_sesion, _ = sesion.aplicar_presupuesto(st.session_state, descartables=("grafo_srg",))
+
+resumen_tiempos = crono.finalizar(n_meses=int(anos_hasta_jub) * 12, bytes_sesion=bytes_sesion)
+if modo_admin:
+    with st.sidebar:
+        st.markdown("### 🧠 Estado de sesión")
+        st.metric("Tamaño del estado de sesión", f"{bytes_sesion / 1024:,.1f} KB",
+                  f"presupuesto {sesion.PRESUPUESTO_SESION_KB:,} KB", delta_color="off")
+        st.markdown("### ⏱️ Tiempos por bloque")
+        st.toggle("Medir tiempos de cada rerun", key="medir_tiempos_input")
+        if resumen_tiempos is not None:
+            st.metric("Rerun completo", f"{resumen_tiempos['total_ms']:,.1f} ms")
+            st.dataframe(
+                pd.DataFrame({"Bloque": list(resumen_tiempos["bloques_ms"]),
+                              "ms": list(resumen_tiempos["bloques_ms"].values())}),
+                hide_index=True,
+            )
+            st.dataframe(
+                pd.DataFrame({"Llamada": list(resumen_tiempos["llamadas"]),
+                              "Veces": [m["n"] for m in resumen_tiempos["llamadas"].values()],
+                              "ms": [m["ms"] for m in resumen_tiempos["llamadas"].values()]}),
+                hide_index=True,
+            )
+        st.markdown("### 🔗 Valores recalculados")
+        st.dataframe(
+            pd.DataFrame({"Origen": [r["origen"] for r in reversed(grafo.historial)],
+                          "Entradas cambiadas": [", ".join(r["entradas"]) for r in reversed(grafo.historial)],
+                          "Nodos recalculados": [", ".join(r["recalculados"]) for r in reversed(grafo.historial)]}),
+            hide_index=True,
+        )
@@ -0,0 +1,104 @@
+# ============================================================
+# BENCHMARK PARALELO SRG — escalado de la cartera con procesos
+# ============================================================
+#
+# Calcula la misma cartera sintética con 1, 2, ... N procesos
+# (srg.paralelo) y muestra el tiempo y la aceleración respecto a un
+# proceso. Los tiempos se guardan en JSON junto con el commit, como
+# bench_srg.py:
+#
+#   python benchmarks/bench_paralelo.py
+#   python benchmarks/bench_paralelo.py --clientes 2000000 --trabajadores 1 2 4 8 --tam-trozo 100000
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import numpy as np  # noqa: E402
+
+from benchmarks.bench_srg import CARPETA_RESULTADOS, commit_actual  # noqa: E402
+from srg import calculo, cartera, paralelo  # noqa: E402
+
+
+def cartera_sintetica(n, semilla=0):
+    rng = np.random.default_rng(semilla)
+    edad_actual = rng.integers(20, 65, n)
+    return {
+        "edad_actual": edad_actual,
+        "edad_prevista_jub": np.minimum(edad_actual + rng.integers(1, 25, n), 75),
+        "anos_cotizados_hoy": np.minimum(rng.integers(0, 40, n), edad_actual - 16),
+        "anos_futuros": rng.integers(0, 30, n),
+        "tipo_jubilacion": rng.choice(calculo.TIPOS_JUBILACION, n),
+        "meses_anticipo": rng.integers(1, 25, n),
+        "ingresos": rng.uniform(800, 6000, n),
+        "gastos": rng.uniform(500, 5000, n),
+        "salario_actual": rng.uniform(1000, 6000, n),
+        "rentabilidad": rng.uniform(1, 7, n),
+    }
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Escalado de srg.paralelo con el número de procesos")
+    parser.add_argument("--clientes", type=int, default=1_000_000)
+    parser.add_argument("--trabajadores", type=int, nargs="+", default=None,
+                        help="por defecto 1, 2, 4... hasta os.cpu_count()")
+    parser.add_argument("--tam-trozo", type=int, default=paralelo.TAM_TROZO)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--salida", type=Path, default=None)
+    args = parser.parse_args(argumentos)
+
+    nucleos = os.cpu_count() or 1
+    trabajadores = args.trabajadores or sorted({min(2 ** i, nucleos) for i in range(nucleos.bit_length() + 1)})
+    tabla = cartera_sintetica(args.clientes)
+
+    # Referencia: el motor vectorizado en un solo proceso, sin memoria compartida
+    referencia = cartera.calcular_cartera(tabla)
+    resultados = {}
+    for n in trabajadores:
+        tiempos = []
+        for _ in range(args.repeticiones):
+            inicio = time.perf_counter()
+            resultado = paralelo.calcular_cartera_paralelo(tabla, trabajadores=n, tam_trozo=args.tam_trozo)
+            tiempos.append(time.perf_counter() - inicio)
+        if not np.allclose(resultado.capital_final, referencia.capital_final):
+            raise RuntimeError(f"Con {n} procesos el resultado no coincide con cartera.calcular_cartera")
+        resultados[n] = {"mediana_s": statistics.median(tiempos), "min_s": min(tiempos), "max_s": max(tiempos)}
+
+    base = resultados[trabajadores[0]]["mediana_s"] * trabajadores[0]
+    print(f"{args.clientes:,} clientes · trozos de {args.tam_trozo:,} · {nucleos} núcleos\n")
+    for n, medida in resultados.items():
+        medida["clientes_por_segundo"] = args.clientes / medida["mediana_s"]
+        medida["aceleracion"] = base / medida["mediana_s"]
+        print(f"  {n:>3} procesos  {medida['mediana_s']:7.3f} s  {medida['clientes_por_segundo']:>12,.0f} clientes/s"
+              f"  ×{medida['aceleracion']:.2f}")
+
+    commit = commit_actual()
+    fecha = datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+    documento = {
+        "commit": commit,
+        "fecha": fecha,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "nucleos": nucleos,
+        "clientes": args.clientes,
+        "tam_trozo": args.tam_trozo,
+        "resultados": resultados,
+    }
+    salida = args.salida or CARPETA_RESULTADOS / f"{fecha[:10]}_{commit}_paralelo.json"
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    salida.write_text(json.dumps(documento, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nResultados guardados en {salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+# ============================================================
+# BENCHMARKS SRG — motor, informes y rerun completo de la app
+# ============================================================
+#
+# Mide cada etapa en horizontes de 1 a 57 años y guarda los tiempos en
+# JSON (benchmarks/resultados/) junto con el commit, para poder comparar
+# ejecuciones entre commits:
+#
+#   python benchmarks/bench_srg.py
+#   python benchmarks/bench_srg.py --sin-app --repeticiones 20
+#   python benchmarks/bench_srg.py --comparar benchmarks/resultados/<anterior>.json
+#
+# Las funciones que viven en app_backup3.py (tabla_mensual_y_anual_html,
+# informe_cliente, informe_agente...) se extraen del script con ast y se
+# ejecutan sin sus decoradores de caché, para medir su coste real.
+
+import argparse
+import ast
+import datetime
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import numpy as np  # noqa: E402
+
+from srg import cache, calculo, graficos, informes, informes_pdf  # noqa: E402
+
+RUTA_APP = RAIZ / "app_backup3.py"
+CARPETA_RESULTADOS = Path(__file__).resolve().parent / "resultados"
+
+HORIZONTES = (1, 5, 10, 20, 30, 40, 50, 57)
+FUNCIONES_APP = ("calcular_evolucion_mensual", "tabla_mensual_y_anual_html", "tabla_plan", "figura_plan",
+                 "informe_cliente", "informe_agente")
+
+# Escenario fijo de referencia (el horizonte es lo único que varía)
+RENTABILIDAD = 5.0
+INFLACION = 2.0
+APORTACION_INICIAL = 1000.0
+CUOTA = 250.0
+CAPITAL_OBJETIVO_ANUAL = 12_000.0
+
+
+# ============================================================
+# 🟦 Utilidades
+# ============================================================
+
+def cronometrar(funcion, repeticiones):
+    # Tiempos en ms: una llamada de calentamiento y luego `repeticiones` medidas
+    funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return {
+        "mediana_ms": statistics.median(tiempos),
+        "min_ms": min(tiempos),
+        "max_ms": max(tiempos),
+        "repeticiones": repeticiones,
+    }
+
+
+def funciones_app(nombres=FUNCIONES_APP):
+    # Compila solo las funciones pedidas del script de Streamlit, sin decoradores
+    import pandas as pd
+    import plotly.graph_objects as go
+
+    arbol = ast.parse(RUTA_APP.read_text(encoding="utf-8"))
+    # Se buscan también dentro de los fragmentos (funciones anidadas en bloque_ahorro...)
+    definiciones = {}
+    for nodo in ast.walk(arbol):
+        if isinstance(nodo, ast.FunctionDef) and nodo.name in nombres:
+            definiciones.setdefault(nodo.name, nodo)
+    definiciones = list(definiciones.values())
+    for definicion in definiciones:
+        definicion.decorator_list = []
+    espacio = {"np": np, "pd": pd, "go": go, "calculo": calculo, "graficos": graficos, "informes": informes}
+    exec(compile(ast.Module(body=definiciones, type_ignores=[]), str(RUTA_APP), "exec"), espacio)
+    faltan = set(nombres) - set(espacio)
+    if faltan:
+        raise RuntimeError(f"No se encuentran en {RUTA_APP.name}: {sorted(faltan)}")
+    return espacio
+
+
+def commit_actual():
+    try:
+        salida = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                                text=True, check=True)
+        return salida.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocido"
+
+
+def contexto_informe(plan, anos):
+    brecha = CAPITAL_OBJETIVO_ANUAL / 12
+    return {
+        "nombre_cliente": "Cliente Benchmark", "telefono": "", "email": "", "fecha": "01/01/2026",
+        "pension_futura": 1500.0, "nivel_vida": 1500.0 + brecha, "brecha": brecha,
+        "cuota_recomendada": plan.cuota, "capital_final": plan.capital_final,
+        "capital_objetivo": CAPITAL_OBJETIVO_ANUAL * anos, "capital_ajustado_final": plan.capital_ajustado_final,
+        "rentabilidad_neta": plan.rentabilidad_neta, "rentabilidad": RENTABILIDAD, "inflacion_media": INFLACION,
+        "exp_base_reguladora": "", "exp_pension": "", "exp_nivel_vida": "", "exp_brecha": "",
+        "exp_capital_objetivo": "", "exp_plan_ahorro": "", "exp_grafico": "", "exp_tabla": "",
+    }
+
+
+def comprobar_graficos():
+    # Una serie más larga que UMBRAL_WEBGL va en WebGL aunque se reduzca a MAX_PUNTOS
+    meses = np.arange(1, graficos.UMBRAL_WEBGL + 2)
+    larga = graficos.traza(meses, np.sqrt(meses))
+    corta = graficos.traza(meses[:graficos.UMBRAL_WEBGL], np.sqrt(meses[:graficos.UMBRAL_WEBGL]))
+    if larga.type != "scattergl" or len(larga.x) != graficos.MAX_PUNTOS:
+        raise RuntimeError(f"Serie de {len(meses)} puntos: {larga.type} con {len(larga.x)} puntos")
+    if corta.type != "scatter":
+        raise RuntimeError(f"Serie de {graficos.UMBRAL_WEBGL} puntos: {corta.type}")
+
+
+# ============================================================
+# 🟦 Benchmarks
+# ============================================================
+
+def bench_motor(horizontes, repeticiones):
+    resultados = {"simular_plan": {}, "ajustar_cuota": {}, "base_reguladora": {}}
+    base_sin_cache = calculo.base_reguladora.__wrapped__
+    for anos in horizontes:
+        n_meses = anos * 12
+        capital_objetivo = CAPITAL_OBJETIVO_ANUAL * anos
+        resultados["simular_plan"][anos] = cronometrar(
+            lambda: calculo.simular_plan(CUOTA, APORTACION_INICIAL, RENTABILIDAD, INFLACION, n_meses), repeticiones)
+        resultados["ajustar_cuota"][anos] = cronometrar(
+            lambda: calculo.ajustar_cuota(capital_objetivo, APORTACION_INICIAL, RENTABILIDAD, INFLACION, n_meses),
+            repeticiones)
+        # La base reguladora siempre usa los 348 meses previos: no depende del horizonte
+        resultados["base_reguladora"][anos] = cronometrar(lambda: base_sin_cache(2500.0, 3.0, 2.5), repeticiones)
+    return resultados
+
+
+def bench_informes(horizontes, repeticiones):
+    app = funciones_app()
+    resultados = {"tabla_mensual_y_anual_html": {}, "informe_cliente": {}, "informe_agente": {},
+                  "informe_cliente_compacto": {}, "informe_cliente_pdf": {}}
+    for anos in horizontes:
+        n_meses = anos * 12
+        clave_plan = (CUOTA, APORTACION_INICIAL, RENTABILIDAD, INFLACION, n_meses)
+        plan = calculo.simular_plan(*clave_plan)
+        contexto = contexto_informe(plan, anos)
+        evolucion = app["calcular_evolucion_mensual"](anos, RENTABILIDAD, INFLACION, CUOTA)
+
+        def informe_html(funcion):
+            # Tabla de evolución + gráfica serializada + plantilla, como informe_srg en la app
+            df = app["tabla_plan"](*clave_plan)[0]
+            tabla = df.round(2).to_html(index=False)
+            grafica = app["figura_plan"](*clave_plan).to_html(include_plotlyjs="cdn")
+            return funcion(dict(contexto, tabla_evolucion=tabla), grafica)
+
+        def informe_compacto():
+            meses, series = informes.series_anuales(plan)
+            df = app["tabla_plan"](*clave_plan)[0]
+            tabla = df.iloc[informes.indices_anuales(len(df))[1:] - 1].round(2).to_html(index=False)
+            html = app["informe_cliente"](dict(contexto, tabla_evolucion=tabla), informes.grafico_svg(meses, series))
+            return informes.compactar_html(html)
+
+        resultados["tabla_mensual_y_anual_html"][anos] = cronometrar(
+            lambda: app["tabla_mensual_y_anual_html"](evolucion, anos), repeticiones)
+        resultados["informe_cliente"][anos] = cronometrar(lambda: informe_html(app["informe_cliente"]), repeticiones)
+        resultados["informe_agente"][anos] = cronometrar(lambda: informe_html(app["informe_agente"]), repeticiones)
+        resultados["informe_cliente_compacto"][anos] = cronometrar(informe_compacto, repeticiones)
+        resultados["informe_cliente_pdf"][anos] = cronometrar(
+            lambda: informes_pdf.informe_pdf("cliente", contexto, plan), repeticiones)
+    return resultados
+
+
+def bench_app(horizontes, repeticiones):
+    # Rerun completo con AppTest: "frio" tras vaciar las cachés de srg y "caliente"
+    # repitiendo las mismas entradas
+    from streamlit.testing.v1 import AppTest
+
+    resultados = {"app_rerun_frio": {}, "app_rerun_caliente": {}}
+    for anos in horizontes:
+        edad_actual = max(16, calculo.EDAD_LEGAL_2026 - anos)
+        frio, caliente = [], []
+        for _ in range(repeticiones):
+            at = AppTest.from_file(str(RUTA_APP), default_timeout=120)
+            at.run()
+            at.number_input(key="edad_actual_input").set_value(edad_actual)
+            at.number_input(key="edad_prevista_jub_input").set_value(edad_actual + anos)
+            cache.limpiar()
+            inicio = time.perf_counter()
+            at.run()
+            frio.append((time.perf_counter() - inicio) * 1000)
+            inicio = time.perf_counter()
+            at.run()
+            caliente.append((time.perf_counter() - inicio) * 1000)
+            if at.exception:
+                raise RuntimeError(f"La app falla con un horizonte de {anos} años: {at.exception}")
+        for nombre, tiempos in (("app_rerun_frio", frio), ("app_rerun_caliente", caliente)):
+            resultados[nombre][anos] = {"mediana_ms": statistics.median(tiempos), "min_ms": min(tiempos),
+                                        "max_ms": max(tiempos), "repeticiones": repeticiones}
+    return resultados
+
+
+# ============================================================
+# 🟦 Comparación y salida
+# ============================================================
+
+def comparar(actual, anterior, umbral=1.2):
+    # Imprime la relación actual / anterior de las medianas y marca las regresiones
+    print(f"\nComparación con {anterior['commit']} ({anterior['fecha']}):")
+    for nombre, por_horizonte in actual["resultados"].items():
+        previo = anterior["resultados"].get(nombre, {})
+        for anos, medida in por_horizonte.items():
+            if str(anos) not in previo:
+                continue
+            relacion = medida["mediana_ms"] / max(previo[str(anos)]["mediana_ms"], 1e-9)
+            marca = "  ⚠️ regresión" if relacion > umbral else ""
+            print(f"  {nombre:<28} {anos:>3} años  ×{relacion:5.2f}{marca}")
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del simulador SRG")
+    parser.add_argument("--horizontes", type=int, nargs="+", default=list(HORIZONTES))
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--repeticiones-app", type=int, default=3)
+    parser.add_argument("--sin-app", action="store_true", help="no medir el rerun completo con AppTest")
+    parser.add_argument("--salida", type=Path, default=None)
+    parser.add_argument("--comparar", type=Path, default=None, help="JSON de una ejecución anterior")
+    args = parser.parse_args(argumentos)
+
+    comprobar_graficos()
+    resultados = {}
+    resultados.update(bench_motor(args.horizontes, args.repeticiones))
+    resultados.update(bench_informes(args.horizontes, args.repeticiones))
+    if not args.sin_app:
+        resultados.update(bench_app(args.horizontes, args.repeticiones_app))
+
+    commit = commit_actual()
+    fecha = datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+    documento = {
+        "commit": commit,
+        "fecha": fecha,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "horizontes": args.horizontes,
+        "resultados": resultados,
+    }
+
+    for nombre, por_horizonte in resultados.items():
+        medianas = "  ".join(f"{anos}a:{m['mediana_ms']:.3f}" for anos, m in por_horizonte.items())
+        print(f"{nombre:<28} {medianas}  (ms)")
+
+    salida = args.salida or CARPETA_RESULTADOS / f"{fecha[:10]}_{commit}.json"
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    salida.write_text(json.dumps(documento, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nResultados guardados en {salida}")
+
+    if args.comparar:
+        comparar(documento, json.loads(args.comparar.read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+# ============================================================
+# Paquete SRG — cálculo del simulador de jubilación sin interfaz
+# ============================================================
+
+from .calculo import (
+    BASE_MAX_ESPANA_2026,
+    CUOTA_MINIMA,
+    EDAD_LEGAL_2026,
+    PENSION_MAX_2026,
+    Escenario,
+    PlanAhorro,
+    ResultadoEscenario,
+    ajustar_cuota,
+    base_reguladora,
+    bases_reguladoras,
+    calcular_escenario,
+    resolver_cuota,
+    simular_plan,
+)
+from .cartera import ResultadoCartera, calcular_cartera, trayectorias_cartera
+from .montecarlo import ResultadoMonteCarlo, simular_montecarlo
+from .sensibilidad import ResultadoSensibilidad, rejilla_sensibilidad
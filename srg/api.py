@@ -0,0 +1,238 @@
+# ============================================================
+# API SRG — servicio HTTP local para llamar al simulador
+# ============================================================
+#
+# Expone el motor del paquete srg por HTTP (JSON), sin Streamlit:
+#
+#   POST /pension   escenario → pensión pública estimada
+#   POST /brecha    escenario → nivel de vida, brecha y capital objetivo
+#   POST /plan      {cuota, aportacion_inicial, rentabilidad, inflacion, meses} → plan de ahorro
+#   POST /cuota     {capital_objetivo, aportacion_inicial, rentabilidad, inflacion, meses} → cuota
+#   POST /lote      {"escenarios": [escenario, ...]} → resultados por columnas (srg.cartera)
+#   GET  /salud     estado del servicio y de sus cachés
+#
+# Un escenario es un objeto con los campos de calculo.Escenario (los que
+# falten toman su valor por defecto; los rangos admitidos están en
+# entrada.LIMITES_ESCENARIO). Los datos fuera de rango y los resultados
+# que no son números finitos devuelven 422. El servidor es asíncrono: la
+# lectura y el cálculo van a un hilo, y las peticiones idénticas que
+# llegan mientras otra igual se está calculando esperan su resultado en
+# lugar de repetirlo. Los resultados quedan además en las cachés de
+# srg.cache.
+#
+#   python -m srg.api --host 127.0.0.1 --port 8000
+
+import argparse
+import asyncio
+import json
+
+import numpy as np
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from . import cache, calculo, cartera, informes
+from .entrada import (LIMITES_ESCENARIO, ErrorEntrada, columnas_escenarios, leer_escenario, numero,
+                      sin_campos_extra)
+
+CAMPOS_PLAN = ("cuota", "aportacion_inicial", "rentabilidad", "inflacion", "meses")
+CAMPOS_CUOTA = ("capital_objetivo", "aportacion_inicial", "rentabilidad", "inflacion", "meses")
+MAX_MESES = 100 * 12
+MAX_PORCENTAJE = 100
+MAX_CAPITAL = 1_000_000_000
+MAX_ESCENARIOS_LOTE = 100_000
+
+
+# ============================================================
+# 🟦 Lectura de la petición (errores → 422, ver srg/entrada.py)
+# ============================================================
+
+def _tipos_y_meses(datos):
+    return (numero(datos, "rentabilidad", minimo=-100, maximo=MAX_PORCENTAJE),
+            numero(datos, "inflacion", minimo=-100, maximo=MAX_PORCENTAJE),
+            numero(datos, "meses", entero=True, minimo=1, maximo=MAX_MESES))
+
+
+def leer_plan(datos):
+    sin_campos_extra(datos, CAMPOS_PLAN)
+    return (numero(datos, "cuota", minimo=0, maximo=LIMITES_ESCENARIO["cuota_mensual"][1]),
+            numero(datos, "aportacion_inicial", minimo=0, maximo=LIMITES_ESCENARIO["aportacion_inicial"][1]),
+            *_tipos_y_meses(datos))
+
+
+def leer_cuota(datos):
+    sin_campos_extra(datos, CAMPOS_CUOTA)
+    return (numero(datos, "capital_objetivo", minimo=0, maximo=MAX_CAPITAL),
+            numero(datos, "aportacion_inicial", minimo=0, maximo=LIMITES_ESCENARIO["aportacion_inicial"][1]),
+            *_tipos_y_meses(datos))
+
+
+def leer_lote(datos):
+    sin_campos_extra(datos, ("escenarios",))
+    escenarios = datos.get("escenarios")
+    if not isinstance(escenarios, list) or not escenarios:
+        raise ErrorEntrada("'escenarios' debe ser una lista no vacía")
+    if len(escenarios) > MAX_ESCENARIOS_LOTE:
+        raise ErrorEntrada(f"Como máximo {MAX_ESCENARIOS_LOTE} escenarios por lote")
+    # Se validan como escenarios sueltos y se pasan a columnas para srg.cartera
+    return columnas_escenarios([leer_escenario(e) for e in escenarios])
+
+
+# ============================================================
+# 🟦 Cálculos (se ejecutan en un hilo)
+# ============================================================
+
+@cache.memoizar("api_escenario", max_entradas=1024)
+def resultado_escenario(escenario):
+    return calculo.calcular_escenario(escenario)
+
+
+def pension(escenario):
+    r = resultado_escenario(escenario)
+    return {
+        "modo_valido": r.modo_valido, "motivo_error": r.motivo_error, "coef_ajuste": r.coef_ajuste,
+        "edad_prevista_jub": r.edad_prevista_jub, "anos_totales": r.anos_totales,
+        "anos_hasta_jub": r.anos_hasta_jub, "base": r.base, "pct": r.pct, "pension_hoy": r.pension_hoy,
+        "pension_futura_sin_tope": r.pension_futura_sin_tope, "limite_aplicado": r.limite_aplicado,
+        "pension_futura": r.pension_futura,
+    }
+
+
+def brecha(escenario):
+    r = resultado_escenario(escenario)
+    return {
+        "pension_futura": r.pension_futura, "factor_inflacion": r.factor_inflacion,
+        "nivel_vida_futuro": r.nivel_vida_futuro, "nivel_vida_futuro_objetivo": r.nivel_vida_futuro_objetivo,
+        "nivel_vida_futuro_gastos": r.nivel_vida_futuro_gastos, "brecha": r.brecha,
+        "capital_objetivo": r.capital_objetivo, "cuota_recomendada": r.cuota_recomendada,
+        "cuota_ajustada": r.cuota_ajustada,
+    }
+
+
+@cache.memoizar("api_plan", max_entradas=256)
+def plan(cuota, aportacion_inicial, rentabilidad, inflacion, meses):
+    p = calculo.simular_plan(cuota, aportacion_inicial, rentabilidad, inflacion, meses)
+    meses_anuales, (crecimiento, aportado, ajustado) = informes.series_anuales(p)
+    return {
+        "capital_final": p.capital_final, "total_aportado": p.total_aportado,
+        "beneficio_intereses": p.beneficio_intereses, "capital_ajustado_final": p.capital_ajustado_final,
+        "rentabilidad_neta": p.rentabilidad_neta,
+        # Evolución a resolución anual, como los informes compactos
+        "evolucion": {"mes": meses_anuales, "capital": crecimiento, "aportado": aportado,
+                      "capital_ajustado": ajustado},
+    }
+
+
+def cuota(capital_objetivo, aportacion_inicial, rentabilidad, inflacion, meses):
+    valor, iteraciones = calculo.resolver_cuota(capital_objetivo, aportacion_inicial, rentabilidad, inflacion, meses)
+    return {"cuota_ajustada": max(valor, calculo.CUOTA_MINIMA), "cuota_sin_minimo": valor,
+            "iteraciones": iteraciones}
+
+
+def lote(tabla):
+    resultado = cartera.calcular_cartera(tabla)
+    return {"n": len(resultado), "columnas": resultado.como_dict()}
+
+
+# ============================================================
+# 🟦 Agrupación de peticiones idénticas en curso
+# ============================================================
+
+class Agrupador:
+    # La primera petición con una clave lanza el cálculo como tarea; las que llegan
+    # con la misma clave mientras tanto esperan esa misma tarea. Si un cliente se
+    # desconecta, el cálculo sigue para los demás (shield).
+    def __init__(self):
+        self._en_curso = {}
+        self.agrupadas = 0
+
+    async def ejecutar(self, clave, funcion, *args):
+        tarea = self._en_curso.get(clave)
+        if tarea is None:
+            tarea = asyncio.ensure_future(run_in_threadpool(funcion, *args))
+            self._en_curso[clave] = tarea
+            tarea.add_done_callback(lambda t: self._terminar(clave, t))
+        else:
+            self.agrupadas += 1
+        return await asyncio.shield(tarea)
+
+    def _terminar(self, clave, tarea):
+        del self._en_curso[clave]
+        if not tarea.cancelled():
+            tarea.exception()  # marcada como leída aunque ya nadie la espere
+
+
+# ============================================================
+# 🟦 Respuestas
+# ============================================================
+
+def _a_json(valor):
+    if isinstance(valor, np.ndarray):
+        return valor.tolist()
+    if isinstance(valor, np.generic):
+        return valor.item()
+    raise TypeError(f"No se puede serializar {type(valor).__name__}")
+
+
+class RespuestaJSON(JSONResponse):
+    # Igual que JSONResponse pero admite arrays y escalares de NumPy
+    def render(self, contenido):
+        try:
+            texto = json.dumps(contenido, default=_a_json, ensure_ascii=False, allow_nan=False,
+                               separators=(",", ":"))
+        except ValueError:  # NaN o infinito: JSON no los admite
+            raise ErrorEntrada("Con estos datos el resultado no es un número finito")
+        return texto.encode("utf-8")
+
+
+def _endpoint(nombre, leer, calcular, agrupador):
+    def procesar(cuerpo):
+        argumentos = leer(json.loads(cuerpo))
+        return calcular(*(argumentos if isinstance(argumentos, tuple) else (argumentos,)))
+
+    async def endpoint(peticion):
+        cuerpo = await peticion.body()
+        # Misma ruta y mismo cuerpo → mismo cálculo (la lectura y validación también se agrupan)
+        try:
+            resultado = await agrupador.ejecutar((nombre, cuerpo), procesar, cuerpo)
+            return RespuestaJSON(resultado)  # dentro del try: un resultado no finito es un 422
+        except json.JSONDecodeError:
+            return RespuestaJSON({"error": "El cuerpo no es JSON válido"}, status_code=400)
+        except (KeyError, ValueError) as error:  # incluye entrada.ErrorEntrada
+            return RespuestaJSON({"error": str(error)}, status_code=422)
+    endpoint.__name__ = nombre
+    return endpoint
+
+
+def crear_app():
+    agrupador = Agrupador()
+
+    async def salud(peticion):
+        return RespuestaJSON({"estado": "ok", "agrupadas": agrupador.agrupadas, "caches": cache.estadisticas()})
+
+    rutas = [
+        Route("/pension", _endpoint("pension", leer_escenario, pension, agrupador), methods=["POST"]),
+        Route("/brecha", _endpoint("brecha", leer_escenario, brecha, agrupador), methods=["POST"]),
+        Route("/plan", _endpoint("plan", leer_plan, plan, agrupador), methods=["POST"]),
+        Route("/cuota", _endpoint("cuota", leer_cuota, cuota, agrupador), methods=["POST"]),
+        Route("/lote", _endpoint("lote", leer_lote, lote, agrupador), methods=["POST"]),
+        Route("/salud", salud, methods=["GET"]),
+    ]
+    app = Starlette(routes=rutas)
+    app.state.agrupador = agrupador
+    return app
+
+
+def main(argumentos=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="API HTTP local del simulador SRG")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argumentos)
+    uvicorn.run(crear_app(), host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
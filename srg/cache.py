@@ -0,0 +1,147 @@
+# ============================================================
+# CACHÉ SRG — memoización por etapa con LRU, TTL y contadores
+# ============================================================
+#
+# Cada etapa cara (base reguladora, simulación, cuota, gráfico, tabla,
+# informes) tiene su propia caché, identificada por nombre y compartida
+# por todo el proceso. Como vive en este módulo y no en el script de
+# Streamlit, sobrevive a los reruns. Los valores se comparten entre
+# sesiones: quien los use no debe modificarlos.
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, is_dataclass
+
+import numpy as np
+
+MAX_ENTRADAS = 128
+TTL_SEGUNDOS = 3600
+
+
+# ============================================================
+# 🟦 Huella normalizada de las entradas
+# ============================================================
+
+def _normalizar(valor):
+    # Convierte el valor en una estructura estable: mismos datos → misma huella
+    if is_dataclass(valor) and not isinstance(valor, type):
+        return (type(valor).__name__, _normalizar(asdict(valor)))
+    if isinstance(valor, dict):
+        return tuple(sorted((str(k), _normalizar(v)) for k, v in valor.items()))
+    if isinstance(valor, (list, tuple)):
+        return tuple(_normalizar(v) for v in valor)
+    if isinstance(valor, np.ndarray):
+        return ("ndarray", valor.dtype.str, valor.shape, hashlib.sha1(np.ascontiguousarray(valor).tobytes()).hexdigest())
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if isinstance(valor, bool) or valor is None or isinstance(valor, str):
+        return valor
+    if isinstance(valor, (int, float)):
+        # 5 y 5.0 son la misma entrada; se ignora el ruido de coma flotante
+        return float(f"{float(valor):.12g}")
+    return repr(valor)
+
+
+def huella(*args, **kwargs):
+    texto = repr((_normalizar(args), _normalizar(kwargs)))
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+# ============================================================
+# 🟦 Caché por etapa
+# ============================================================
+
+class CacheEtapa:
+    def __init__(self, nombre, max_entradas=MAX_ENTRADAS, ttl=TTL_SEGUNDOS):
+        self.nombre = nombre
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, producir):
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None:
+                valor, creado = entrada
+                if self.ttl is None or ahora - creado < self.ttl:
+                    self._datos.move_to_end(clave)
+                    self.aciertos += 1
+                    return valor
+                del self._datos[clave]
+                self.expulsiones += 1
+            self.fallos += 1
+
+        # Se calcula fuera del lock para no bloquear otras sesiones
+        valor = producir()
+
+        with self._lock:
+            self._datos[clave] = (valor, time.monotonic())
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+                self.expulsiones += 1
+        return valor
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._datos),
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "expulsiones": self.expulsiones,
+                "tasa_aciertos": self.aciertos / total if total else 0.0,
+            }
+
+
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def etapa(nombre, max_entradas=MAX_ENTRADAS, ttl=TTL_SEGUNDOS):
+    # Devuelve (y crea la primera vez) la caché de una etapa
+    with _CACHES_LOCK:
+        if nombre not in _CACHES:
+            _CACHES[nombre] = CacheEtapa(nombre, max_entradas, ttl)
+        return _CACHES[nombre]
+
+
+def obtener(nombre, clave, producir, **opciones):
+    return etapa(nombre, **opciones).obtener(clave, producir)
+
+
+def memoizar(nombre, max_entradas=MAX_ENTRADAS, ttl=TTL_SEGUNDOS):
+    # Decorador: la clave es la huella de los argumentos, no la función, así que
+    # redefinirla en cada rerun del script sigue usando la misma caché.
+    def decorador(funcion):
+        def envoltura(*args, **kwargs):
+            return obtener(nombre, huella(*args, **kwargs), lambda: funcion(*args, **kwargs),
+                           max_entradas=max_entradas, ttl=ttl)
+        envoltura.__name__ = funcion.__name__
+        envoltura.__wrapped__ = funcion
+        return envoltura
+    return decorador
+
+
+def estadisticas():
+    with _CACHES_LOCK:
+        caches = list(_CACHES.values())
+    return {c.nombre: c.estadisticas() for c in caches}
+
+
+def limpiar():
+    with _CACHES_LOCK:
+        caches = list(_CACHES.values())
+    for c in caches:
+        c.limpiar()
@@ -0,0 +1,463 @@
+# ============================================================
+# MOTOR DE CÁLCULO SRG — sin Streamlit, pandas ni Plotly
+# ============================================================
+#
+# Todas las fórmulas del simulador (base reguladora, coeficientes,
+# pensión, brecha, capital objetivo, plan de ahorro y cuota) en
+# funciones puras sobre NumPy. La app de Streamlit, los procesos por
+# lotes y los benchmarks llaman a este módulo directamente.
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+import numpy as np
+
+# Límites reales de la Seguridad Social para 2026
+EDAD_LEGAL_2026 = 67
+PENSION_MAX_2026 = 3359.60
+BASE_MAX_ESPANA_2026 = 4720
+EXTRA_REVAL = 0.00115
+
+MESES_BASE_REGULADORA = 29 * 12
+MEJORES_BASES = 322
+
+CUOTA_MINIMA = 80.0
+CUOTA_SIN_BRECHA = 150.0
+
+TIPOS_JUBILACION = ["Ordinaria", "Anticipada voluntaria", "Anticipada involuntaria", "Demorada"]
+MODOS_NIVEL_VIDA = ["Objetivo económico (sobre ingresos)", "Gastos reales (sobre gastos)"]
+MODOS_BRECHA = ["Objetivo económico", "Gastos reales"]
+
+
+# ============================================================
+# 🟦 Base reguladora
+# ============================================================
+
+def bases_reguladoras(salario_actual, crecimiento_salarial, ipc_actualizacion):
+    # Acepta escalares o arrays de clientes (cualquier forma compatible por broadcasting)
+    # y devuelve una base reguladora por cliente.
+    salario = np.asarray(salario_actual, dtype=float)[..., None]
+    crecimiento = np.asarray(crecimiento_salarial, dtype=float)[..., None]
+    ipc = np.asarray(ipc_actualizacion, dtype=float)[..., None]
+
+    # Salario hacia atrás con el crecimiento salarial y actualizado con el IPC:
+    # salario / (1+g)^años · (1+ipc)^años, con una fila de 348 meses por cliente
+    anos_pasados = (MESES_BASE_REGULADORA - 1 - np.arange(MESES_BASE_REGULADORA)) / 12
+    factor = ((1 + ipc / 100) / (1 + crecimiento / 100)) ** anos_pasados
+    bases_actualizadas = np.where(salario > 0, salario * factor, 0.0)
+
+    descartadas = MESES_BASE_REGULADORA - MEJORES_BASES
+    mejores = np.partition(bases_actualizadas, descartadas, axis=-1)[..., descartadas:]
+    return mejores.mean(axis=-1)
+
+
+@lru_cache(maxsize=256)
+def base_reguladora(salario_actual, crecimiento_salarial, ipc_actualizacion):
+    return float(bases_reguladoras(salario_actual, crecimiento_salarial, ipc_actualizacion))
+
+
+# ============================================================
+# 🟦 Modalidades de jubilación
+# ============================================================
+
+# Tramos de años cotizados (límites superiores) y reducción por trimestre de anticipo en cada tramo
+TRAMOS_COTIZACION = (38.5, 41.5, 44.5)
+REDUCCION_VOLUNTARIA = (0.0525, 0.0475, 0.0425, 0.0325)
+REDUCCION_INVOLUNTARIA = (0.075, 0.070, 0.065, 0.055)
+BONIFICACION_DEMORA_ANUAL = 0.04
+
+# Meses de anticipo o demora cubiertos por TABLA_COEFICIENTES (la app llega a 120 de demora)
+MESES_TABLA = 120
+
+
+def tramo_cotizacion(anos):
+    # Índice del tramo de REDUCCION_* (acepta escalares o arrays)
+    return np.searchsorted(TRAMOS_COTIZACION, anos, side="right")
+
+
+def coef_voluntaria(anos, meses):
+    return 1 - REDUCCION_VOLUNTARIA[tramo_cotizacion(anos)] * (meses // 3)
+
+
+def coef_involuntaria(anos, meses):
+    return 1 - REDUCCION_INVOLUNTARIA[tramo_cotizacion(anos)] * (meses // 3)
+
+
+def coef_demorada(meses_demora):
+    return 1 + meses_demora / 12 * BONIFICACION_DEMORA_ANUAL
+
+
+def _tabla_coeficientes():
+    # coef_ajuste[tipo, tramo, meses] para cada tipo de TIPOS_JUBILACION, tramo de
+    # cotización y 0..MESES_TABLA meses (de anticipo, o de demora en la demorada)
+    meses = np.arange(MESES_TABLA + 1)
+    trimestres = meses // 3
+    tabla = np.ones((len(TIPOS_JUBILACION), len(TRAMOS_COTIZACION) + 1, MESES_TABLA + 1))
+    tabla[TIPOS_JUBILACION.index("Anticipada voluntaria")] = 1 - np.outer(REDUCCION_VOLUNTARIA, trimestres)
+    tabla[TIPOS_JUBILACION.index("Anticipada involuntaria")] = 1 - np.outer(REDUCCION_INVOLUNTARIA, trimestres)
+    tabla[TIPOS_JUBILACION.index("Demorada")] = coef_demorada(meses.astype(float))
+    tabla.setflags(write=False)
+    return tabla
+
+
+TABLA_COEFICIENTES = _tabla_coeficientes()
+
+
+def evaluar_modalidad(tipo_jubilacion, anos_totales, edad_actual, edad_prevista_jub,
+                      meses_anticipo=1, meses_demora=1):
+    # Devuelve (modo_valido, motivo_error, coef_ajuste, edad_prevista_jub efectiva)
+    modo_valido = True
+    motivo_error = ""
+    coef_ajuste = 1.0
+
+    if tipo_jubilacion == "Ordinaria":
+        if anos_totales > 0 and anos_totales < 15:
+            modo_valido = False
+            motivo_error = "Para la jubilación ordinaria necesitas al menos 15 años cotizados."
+
+    elif tipo_jubilacion == "Anticipada voluntaria":
+        if anos_totales > 0 and anos_totales < 35:
+            modo_valido = False
+            motivo_error = "Para la anticipada voluntaria necesitas 35 años cotizados."
+
+        edad_prevista_jub = EDAD_LEGAL_2026 - meses_anticipo / 12
+        if edad_prevista_jub < 63:
+            modo_valido = False
+            motivo_error = "La anticipada voluntaria solo puede aplicarse desde los 63 años."
+
+        coef_ajuste = coef_voluntaria(anos_totales, meses_anticipo)
+
+    elif tipo_jubilacion == "Anticipada involuntaria":
+        if anos_totales > 0 and anos_totales < 33:
+            modo_valido = False
+            motivo_error = "Para la anticipada involuntaria necesitas 33 años cotizados."
+
+        edad_prevista_jub = EDAD_LEGAL_2026 - meses_anticipo / 12
+        if edad_prevista_jub < 61:
+            modo_valido = False
+            motivo_error = "La anticipada involuntaria solo puede aplicarse desde los 61 años."
+
+        coef_ajuste = coef_involuntaria(anos_totales, meses_anticipo)
+
+    elif tipo_jubilacion == "Demorada":
+        if anos_totales > 0 and anos_totales < 15:
+            modo_valido = False
+            motivo_error = "Para la jubilación demorada necesitas al menos 15 años cotizados."
+
+        elif edad_actual < 60:
+            modo_valido = False
+            motivo_error = "La jubilación demorada solo aplica si ya estás próximo a la edad legal."
+
+        else:
+            coef_ajuste = coef_demorada(meses_demora)
+            edad_prevista_jub = EDAD_LEGAL_2026 + meses_demora / 12
+
+            if edad_prevista_jub <= EDAD_LEGAL_2026:
+                modo_valido = False
+                motivo_error = "La edad prevista debe ser mayor que la edad legal."
+
+    else:
+        raise ValueError(f"Tipo de jubilación desconocido: {tipo_jubilacion!r}")
+
+    return modo_valido, motivo_error, coef_ajuste, edad_prevista_jub
+
+
+# ============================================================
+# 🟦 Pensión, nivel de vida y brecha
+# ============================================================
+
+def calcular_pension(base, anos_totales, coef_ajuste, reval, inflacion, anos_hasta_jub, modo_valido=True):
+    # Devuelve (pct, pension_hoy, pension_futura_sin_tope, limite_aplicado, pension_futura)
+    pct = min(1.0, anos_totales / 37) if modo_valido else 0.0
+    base_reguladora_ajustada = min(base, BASE_MAX_ESPANA_2026)
+    pension_hoy = base_reguladora_ajustada * pct * coef_ajuste
+    pension_futura_sin_tope = pension_hoy * ((1 + reval/100) ** anos_hasta_jub)
+
+    # Límite legal real: pensión máxima actualizada a futuro
+    pension_max_futura = PENSION_MAX_2026 * ((1 + inflacion/100 + EXTRA_REVAL) ** anos_hasta_jub)
+
+    limite_aplicado = pension_futura_sin_tope > pension_max_futura
+    pension_futura = pension_max_futura if limite_aplicado else pension_futura_sin_tope
+    return pct, pension_hoy, pension_futura_sin_tope, limite_aplicado, pension_futura
+
+
+def calcular_nivel_vida(ingresos, gastos, porcentaje_mantenimiento, inflacion, anos_hasta_jub):
+    # Devuelve (factor_inflacion, nivel_vida_futuro_objetivo, nivel_vida_futuro_gastos)
+    factor_inflacion = (1 + inflacion / 100) ** anos_hasta_jub
+    nivel_vida_futuro_objetivo = ingresos * (porcentaje_mantenimiento / 100) * factor_inflacion
+    nivel_vida_futuro_gastos = gastos * (porcentaje_mantenimiento / 100) * factor_inflacion
+    return factor_inflacion, nivel_vida_futuro_objetivo, nivel_vida_futuro_gastos
+
+
+def calcular_brecha(nivel_vida_futuro, pension_futura):
+    return max(0.0, nivel_vida_futuro - pension_futura)
+
+
+def calcular_capital_objetivo(brecha, anos_hasta_jub):
+    return brecha * 12 * anos_hasta_jub
+
+
+# ============================================================
+# 🟦 Plan de ahorro
+# ============================================================
+
+@dataclass
+class PlanAhorro:
+    cuota: float
+    aportacion_inicial: float
+    meses: np.ndarray
+    capital_inicio: np.ndarray
+    intereses: np.ndarray
+    capital: np.ndarray
+    capital_ajustado: np.ndarray
+    capital_final: float
+    total_aportado: float
+    beneficio_intereses: float
+    capital_ajustado_final: float
+    rentabilidad_neta: float
+
+    def aportado_acumulado(self):
+        return self.aportacion_inicial + self.cuota * self.meses
+
+
+def simular_plan(cuota, aportacion_extra, rentabilidad_anual, inflacion_anual, n_meses):
+    r = rentabilidad_anual / 100 / 12
+    inf_mensual = inflacion_anual / 100 / 12
+    n = int(n_meses)
+
+    # Factores de crecimiento acumulados: (1 + r)^mes y (1 + inf)^mes para mes = 0..n
+    meses = np.arange(n + 1)
+    factor_capital = (1 + r) ** meses
+    factor_inflacion = (1 + inf_mensual) ** meses[1:]
+
+    # Capital al cierre de cada mes: A·(1+r)^m + cuota·Σ(1+r)^k, k = 0..m-1
+    if r != 0:
+        suma_cuotas = (factor_capital - 1) / r
+    else:
+        suma_cuotas = meses.astype(float)
+    capital_path = aportacion_extra * factor_capital + cuota * suma_cuotas
+
+    capital_inicio = capital_path[:-1]
+    capital_cierre = capital_path[1:]
+    intereses = capital_inicio * r
+    capital_ajustado = capital_cierre / factor_inflacion
+
+    capital = float(capital_path[-1])
+    total_aportado = aportacion_extra + cuota * n
+    beneficio_intereses = capital - total_aportado
+    capital_ajustado_final = float(capital_ajustado[-1])
+    rentabilidad_neta = (capital / total_aportado - 1) * 100 if total_aportado > 0 else 0
+
+    return PlanAhorro(
+        cuota=cuota,
+        aportacion_inicial=aportacion_extra,
+        meses=meses[1:],
+        capital_inicio=capital_inicio,
+        intereses=intereses,
+        capital=capital_cierre,
+        capital_ajustado=capital_ajustado,
+        capital_final=capital,
+        total_aportado=total_aportado,
+        beneficio_intereses=beneficio_intereses,
+        capital_ajustado_final=capital_ajustado_final,
+        rentabilidad_neta=rentabilidad_neta,
+    )
+
+
+def cuota_recomendada(capital_objetivo, aportacion_inicial, rentabilidad_anual, n_meses):
+    # Valor futuro de una renta periódica: CR = (CO − A·(1+r)^n)·r / ((1+r)^n − 1)
+    r = rentabilidad_anual / 100 / 12
+    if r == 0:
+        return (capital_objetivo - aportacion_inicial) / n_meses
+    return (
+        (capital_objetivo - aportacion_inicial * (1 + r) ** n_meses) * r
+    ) / ((1 + r) ** n_meses - 1)
+
+
+def capital_real_final(cuota, aportacion_inicial, rentabilidad_anual, inflacion_anual, n_meses):
+    # Mismo modelo que simular_plan, pero solo el último mes y sin arrays.
+    # Devuelve el capital ajustado por inflación y su derivada respecto a la cuota.
+    r = rentabilidad_anual / 100 / 12
+    inf_mensual = inflacion_anual / 100 / 12
+
+    factor_capital = (1 + r) ** n_meses
+    factor_inflacion = (1 + inf_mensual) ** n_meses
+    suma_cuotas = (factor_capital - 1) / r if r != 0 else float(n_meses)
+
+    valor = (aportacion_inicial * factor_capital + cuota * suma_cuotas) / factor_inflacion
+    pendiente = suma_cuotas / factor_inflacion
+    return valor, pendiente
+
+
+def resolver_cuota(capital_objetivo, aportacion_inicial, rentabilidad_anual, inflacion_anual, n_meses,
+                   tolerancia=0.01, max_iter=20):
+    # Newton sobre el capital real final. Como es lineal en la cuota,
+    # converge en un paso; las iteraciones se devuelven para instrumentación.
+    cuota = 0.0
+    for iteraciones in range(1, max_iter + 1):
+        valor, pendiente = capital_real_final(cuota, aportacion_inicial, rentabilidad_anual, inflacion_anual, n_meses)
+        diferencia = capital_objetivo - valor
+        if abs(diferencia) < tolerancia or pendiente == 0:
+            break
+        cuota += diferencia / pendiente
+
+    return cuota, iteraciones
+
+
+def ajustar_cuota(capital_objetivo, aportacion_inicial, rentabilidad_anual, inflacion_anual, n_meses):
+    cuota, _ = resolver_cuota(capital_objetivo, aportacion_inicial, rentabilidad_anual, inflacion_anual, n_meses)
+    return cuota
+
+
+# ============================================================
+# 🟦 Escenario completo
+# ============================================================
+
+@dataclass
+class Escenario:
+    # Datos personales y cotización
+    edad_actual: int = 40
+    edad_prevista_jub: int = 67
+    esperanza_vida: int = 85
+    anos_cotizados_hoy: int = 0
+    anos_futuros: int = 0
+    tipo_jubilacion: str = "Ordinaria"
+    meses_anticipo: int = 1
+    meses_demora: int = 1
+
+    # Ingresos, gastos y base reguladora
+    ingresos: float = 0.0
+    gastos: float = 0.0
+    salario_actual: float = 0.0
+    crecimiento_salarial: float = 3.0
+    ipc_actualizacion: float = 2.5
+    inflacion: float = 2.4
+    reval: float = 2.8
+
+    # Nivel de vida y brecha
+    modo_nivel_vida: str = MODOS_NIVEL_VIDA[0]
+    porcentaje_mantenimiento: float = 100.0
+    modo_brecha: str = MODOS_BRECHA[0]
+
+    # Plan de ahorro (None = mismo valor por defecto que la app)
+    aportacion_inicial: float = None
+    rentabilidad: float = 4.0
+    inflacion_media: float = None
+    cuota_mensual: float = None
+
+
+@dataclass
+class ResultadoEscenario:
+    escenario: Escenario
+    anos_totales: int
+    anos_hasta_jub: int
+    anos_jubilacion: int
+    modo_valido: bool
+    motivo_error: str
+    coef_ajuste: float
+    edad_prevista_jub: float
+    base: float
+    pct: float
+    pension_hoy: float
+    pension_futura_sin_tope: float
+    limite_aplicado: bool
+    pension_futura: float
+    factor_inflacion: float
+    nivel_vida_futuro: float
+    nivel_vida_futuro_objetivo: float
+    nivel_vida_futuro_gastos: float
+    brecha: float
+    capital_objetivo: float
+    aportacion_inicial: float
+    inflacion_media: float
+    cuota_recomendada: float
+    cuota_ajustada: float
+    iteraciones_cuota: int
+    cuota_aplicada: float
+    plan: PlanAhorro = field(repr=False)
+
+
+def calcular_escenario(esc):
+    # Encadena pensión → brecha → capital objetivo → cuota → plan con las
+    # mismas reglas y valores por defecto que la app.
+    edad_prevista_jub = max(esc.edad_prevista_jub, esc.edad_actual + 1)
+    esperanza_vida = max(esc.esperanza_vida, edad_prevista_jub + 1)
+    gastos = min(esc.gastos, esc.ingresos)
+
+    anos_totales = esc.anos_cotizados_hoy + esc.anos_futuros
+    anos_hasta_jub = max(1, edad_prevista_jub - esc.edad_actual)
+    anos_jubilacion = max(1, esperanza_vida - edad_prevista_jub)
+
+    modo_valido, motivo_error, coef_ajuste, edad_efectiva = evaluar_modalidad(
+        esc.tipo_jubilacion, anos_totales, esc.edad_actual, edad_prevista_jub,
+        esc.meses_anticipo, esc.meses_demora
+    )
+
+    base = base_reguladora(esc.salario_actual, esc.crecimiento_salarial, esc.ipc_actualizacion)
+    base = min(base, BASE_MAX_ESPANA_2026)
+
+    pct, pension_hoy, pension_futura_sin_tope, limite_aplicado, pension_futura = calcular_pension(
+        base, anos_totales, coef_ajuste, esc.reval, esc.inflacion, anos_hasta_jub, modo_valido
+    )
+
+    factor_inflacion, nivel_objetivo, nivel_gastos = calcular_nivel_vida(
+        esc.ingresos, gastos, esc.porcentaje_mantenimiento, esc.inflacion, anos_hasta_jub
+    )
+    nivel_vida_futuro = nivel_objetivo if "Objetivo económico" in esc.modo_nivel_vida else nivel_gastos
+    nivel_usado = nivel_objetivo if esc.modo_brecha == "Objetivo económico" else nivel_gastos
+
+    brecha = calcular_brecha(nivel_usado, pension_futura)
+    capital_objetivo = calcular_capital_objetivo(brecha, anos_hasta_jub)
+
+    # Plan de ahorro
+    n_meses = anos_hasta_jub * 12
+    if esc.aportacion_inicial is not None:
+        aportacion_inicial = esc.aportacion_inicial
+    else:
+        aportacion_inicial = 0.0 if brecha > 0 else 1000.0
+    inflacion_media = esc.inflacion if esc.inflacion_media is None else esc.inflacion_media
+
+    if brecha > 0:
+        recomendada = cuota_recomendada(capital_objetivo, aportacion_inicial, esc.rentabilidad, n_meses)
+    else:
+        recomendada = CUOTA_SIN_BRECHA
+
+    cuota_aplicada = recomendada if esc.cuota_mensual is None else esc.cuota_mensual
+    cuota_aplicada = max(cuota_aplicada, CUOTA_MINIMA)
+
+    cuota_ajustada, iteraciones_cuota = resolver_cuota(
+        capital_objetivo, aportacion_inicial, esc.rentabilidad, inflacion_media, n_meses
+    )
+    cuota_ajustada = max(cuota_ajustada, CUOTA_MINIMA)
+
+    plan = simular_plan(cuota_aplicada, aportacion_inicial, esc.rentabilidad, inflacion_media, n_meses)
+
+    return ResultadoEscenario(
+        escenario=esc,
+        anos_totales=anos_totales,
+        anos_hasta_jub=anos_hasta_jub,
+        anos_jubilacion=anos_jubilacion,
+        modo_valido=modo_valido,
+        motivo_error=motivo_error,
+        coef_ajuste=coef_ajuste,
+        edad_prevista_jub=edad_efectiva,
+        base=base,
+        pct=pct,
+        pension_hoy=pension_hoy,
+        pension_futura_sin_tope=pension_futura_sin_tope,
+        limite_aplicado=limite_aplicado,
+        pension_futura=pension_futura,
+        factor_inflacion=factor_inflacion,
+        nivel_vida_futuro=nivel_vida_futuro,
+        nivel_vida_futuro_objetivo=nivel_objetivo,
+        nivel_vida_futuro_gastos=nivel_gastos,
+        brecha=brecha,
+        capital_objetivo=capital_objetivo,
+        aportacion_inicial=aportacion_inicial,
+        inflacion_media=inflacion_media,
+        cuota_recomendada=recomendada,
+        cuota_ajustada=cuota_ajustada,
+        iteraciones_cuota=iteraciones_cuota,
+        cuota_aplicada=cuota_aplicada,
+        plan=plan,
+    )
@@ -0,0 +1,303 @@
+# ============================================================
+# CARTERA SRG — simulación por lotes de todos los clientes
+# ============================================================
+#
+# Mismas reglas que calculo.calcular_escenario, pero sobre columnas de
+# NumPy (un elemento por cliente) y sin bucles por cliente. La tabla de
+# entrada puede ser un dict de arrays, un DataFrame o un array
+# estructurado; las columnas se llaman igual que los campos de Escenario
+# y las que falten toman el valor por defecto de Escenario.
+
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+from . import calculo
+
+# Tamaño de bloque para las operaciones clientes × meses
+TAM_BLOQUE = 4096
+
+_POR_DEFECTO = {f.name: f.default for f in fields(calculo.Escenario)}
+ORDINARIA, VOLUNTARIA, INVOLUNTARIA, DEMORADA = range(len(calculo.TIPOS_JUBILACION))
+
+
+def columna(tabla, nombre, n=None):
+    # Columna `nombre` de la tabla como array; si falta, n copias del valor por defecto de
+    # Escenario (o KeyError si no se da n). La usan también srg.lote y srg.paralelo
+    nombres = getattr(getattr(tabla, "dtype", None), "names", None)
+    presente = nombre in nombres if nombres is not None else nombre in tabla
+    if presente:
+        return np.asarray(tabla[nombre])
+    if n is None:
+        raise KeyError(f"Falta la columna obligatoria {nombre!r}")
+    return np.full(n, _POR_DEFECTO[nombre])
+
+
+def codigos(valores, opciones):
+    # Convierte una columna de textos (o ya de códigos enteros) en índices de `opciones`
+    valores = np.asarray(valores)
+    if valores.dtype.kind in "iu":
+        return valores.astype(np.intp)
+    unicos, inverso = np.unique(valores.astype(str), return_inverse=True)
+    desconocidos = [u for u in unicos if u not in opciones]
+    if desconocidos:
+        raise ValueError(f"Valores desconocidos: {desconocidos!r}")
+    return np.array([opciones.index(u) for u in unicos], dtype=np.intp)[inverso]
+
+
+def _opcional(valores, por_defecto):
+    # Columnas opcionales: NaN o None toman el valor por defecto de cada cliente
+    valores = np.asarray(valores, dtype=float)
+    return np.where(np.isnan(valores), por_defecto, valores)
+
+
+# ============================================================
+# 🟦 Bloques vectorizados
+# ============================================================
+
+def bases_reguladoras_cartera(salario_actual, crecimiento_salarial, ipc_actualizacion, tam_bloque=TAM_BLOQUE):
+    # La base es lineal en el salario, así que basta con calcular el factor medio
+    # de las 322 mejores bases una vez por cada par (crecimiento, IPC) distinto.
+    salario = np.asarray(salario_actual, dtype=float)
+    pares = np.column_stack(np.broadcast_arrays(
+        np.asarray(crecimiento_salarial, dtype=float).ravel(),
+        np.asarray(ipc_actualizacion, dtype=float).ravel(),
+    ))
+    unicos, inverso = np.unique(pares, axis=0, return_inverse=True)
+
+    factor = np.empty(len(unicos))
+    for inicio in range(0, len(unicos), tam_bloque):
+        bloque = unicos[inicio:inicio + tam_bloque]
+        factor[inicio:inicio + tam_bloque] = calculo.bases_reguladoras(1.0, bloque[:, 0], bloque[:, 1])
+
+    return np.where(salario > 0, salario * factor[inverso.ravel()], 0.0)
+
+
+def coeficientes_ajuste(tipo, anos_totales, meses):
+    # Un único gather en calculo.TABLA_COEFICIENTES por (tipo, tramo de cotización, meses).
+    # Los meses fuera de la tabla (o no enteros) se calculan con las fórmulas, también por columnas.
+    meses = np.asarray(meses)
+    tramo = calculo.tramo_cotizacion(anos_totales)
+    indice = np.clip(meses, 0, calculo.MESES_TABLA).astype(np.intp)
+    coef = calculo.TABLA_COEFICIENTES[tipo, tramo, indice]
+    fuera = indice != meses
+    if fuera.any():
+        tipo, tramo, meses = (np.broadcast_to(v, coef.shape)[fuera] for v in (tipo, tramo, meses))
+        trimestres = meses // 3
+        coef[fuera] = np.select(
+            [tipo == DEMORADA, tipo == VOLUNTARIA, tipo == INVOLUNTARIA],
+            [calculo.coef_demorada(meses),
+             1 - np.asarray(calculo.REDUCCION_VOLUNTARIA)[tramo] * trimestres,
+             1 - np.asarray(calculo.REDUCCION_INVOLUNTARIA)[tramo] * trimestres],
+            default=1.0,
+        )
+    return coef
+
+
+def evaluar_modalidades(tipo_jubilacion, anos_totales, edad_actual, meses_anticipo, meses_demora):
+    # Versión por columnas de calculo.evaluar_modalidad: devuelve (modo_valido, coef_ajuste)
+    tipo = codigos(tipo_jubilacion, calculo.TIPOS_JUBILACION)
+    anos = np.asarray(anos_totales, dtype=float)
+    ordinaria, voluntaria, involuntaria, demorada = (tipo == i for i in range(4))
+    con_datos = anos > 0
+
+    edad_anticipada = calculo.EDAD_LEGAL_2026 - np.asarray(meses_anticipo) / 12
+    demora_valida = demorada & ~(con_datos & (anos < 15)) & (np.asarray(edad_actual) >= 60)
+
+    invalido = (
+        (ordinaria & con_datos & (anos < 15))
+        | (voluntaria & ((con_datos & (anos < 35)) | (edad_anticipada < 63)))
+        | (involuntaria & ((con_datos & (anos < 33)) | (edad_anticipada < 61)))
+        | (demorada & ~demora_valida)
+        | (demora_valida & (np.asarray(meses_demora) <= 0))
+    )
+
+    # La demorada que no se aplica se queda en 1.0, como la ordinaria
+    tipo_coef = np.where(demorada & ~demora_valida, ORDINARIA, tipo)
+    coef_ajuste = coeficientes_ajuste(tipo_coef, anos, np.where(demorada, meses_demora, meses_anticipo))
+    return ~invalido, coef_ajuste
+
+
+def cuotas_recomendadas(capital_objetivo, aportacion_inicial, rentabilidad_anual, n_meses):
+    r = np.asarray(rentabilidad_anual, dtype=float) / 100 / 12
+    factor = (1 + r) ** n_meses
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cuota = (capital_objetivo - aportacion_inicial * factor) * r / (factor - 1)
+    return np.where(r == 0, (capital_objetivo - aportacion_inicial) / n_meses, cuota)
+
+
+def _factores_plan(rentabilidad_anual, inflacion_anual, n_meses):
+    r = np.asarray(rentabilidad_anual, dtype=float) / 100 / 12
+    inf_mensual = np.asarray(inflacion_anual, dtype=float) / 100 / 12
+    factor_capital = (1 + r) ** n_meses
+    factor_inflacion = (1 + inf_mensual) ** n_meses
+    with np.errstate(divide="ignore", invalid="ignore"):
+        suma_cuotas = np.where(r != 0, (factor_capital - 1) / r, n_meses)
+    return factor_capital, factor_inflacion, suma_cuotas
+
+
+def cuotas_ajustadas(capital_objetivo, aportacion_inicial, rentabilidad_anual, inflacion_anual, n_meses):
+    # Solución exacta de calculo.resolver_cuota para todos los clientes a la vez
+    factor_capital, factor_inflacion, suma_cuotas = _factores_plan(rentabilidad_anual, inflacion_anual, n_meses)
+    return (capital_objetivo * factor_inflacion - aportacion_inicial * factor_capital) / suma_cuotas
+
+
+def simular_planes(cuota, aportacion_inicial, rentabilidad_anual, inflacion_anual, n_meses,
+                   meses_max=None, dtype=np.float64, tam_bloque=TAM_BLOQUE):
+    # Trayectorias clientes × meses (mes 1..meses_max). A partir del horizonte de cada
+    # cliente el capital se mantiene en su valor final. Devuelve (capital, capital_ajustado).
+    # Se calcula en bloques de tam_bloque clientes: los intermedios en float64 son de un
+    # bloque y solo las dos matrices de salida (en `dtype`) ocupan la cartera entera.
+    cuota, aportacion, rentabilidad, inflacion, n_meses = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in
+          (cuota, aportacion_inicial, rentabilidad_anual, inflacion_anual, n_meses))
+    )
+    if meses_max is None:
+        meses_max = int(n_meses.max(initial=1))
+
+    n = len(cuota)
+    capital = np.empty((n, meses_max), dtype=dtype)
+    capital_ajustado = np.empty((n, meses_max), dtype=dtype)
+    mes = np.arange(1, meses_max + 1)
+    for inicio in range(0, n, tam_bloque):
+        bloque = slice(inicio, inicio + tam_bloque)
+        meses = np.minimum(mes, n_meses[bloque, None])
+        r = (rentabilidad[bloque] / 100 / 12)[:, None]
+        inf_mensual = (inflacion[bloque] / 100 / 12)[:, None]
+
+        factor_capital = (1 + r) ** meses
+        with np.errstate(divide="ignore", invalid="ignore"):
+            suma_cuotas = np.where(r != 0, (factor_capital - 1) / r, meses)
+        capital_bloque = aportacion[bloque, None] * factor_capital + cuota[bloque, None] * suma_cuotas
+        capital[bloque] = capital_bloque
+        capital_ajustado[bloque] = capital_bloque / (1 + inf_mensual) ** meses
+    return capital, capital_ajustado
+
+
+# ============================================================
+# 🟦 Cartera completa
+# ============================================================
+
+@dataclass
+class ResultadoCartera:
+    anos_totales: np.ndarray
+    anos_hasta_jub: np.ndarray
+    modo_valido: np.ndarray
+    coef_ajuste: np.ndarray
+    base: np.ndarray
+    pension_hoy: np.ndarray
+    pension_futura: np.ndarray
+    limite_aplicado: np.ndarray
+    nivel_vida_futuro_objetivo: np.ndarray
+    nivel_vida_futuro_gastos: np.ndarray
+    brecha: np.ndarray
+    capital_objetivo: np.ndarray
+    aportacion_inicial: np.ndarray
+    rentabilidad: np.ndarray
+    inflacion_media: np.ndarray
+    cuota_recomendada: np.ndarray
+    cuota_ajustada: np.ndarray
+    cuota_aplicada: np.ndarray
+    capital_final: np.ndarray
+    total_aportado: np.ndarray
+    capital_ajustado_final: np.ndarray
+
+    def __len__(self):
+        return len(self.brecha)
+
+    def como_dict(self):
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+
+def calcular_cartera(tabla):
+    edad_actual = columna(tabla, "edad_actual").astype(float)
+    n = len(edad_actual)
+
+    def col(nombre):
+        return columna(tabla, nombre, n)
+
+    edad_prevista_jub = np.maximum(col("edad_prevista_jub"), edad_actual + 1)
+    ingresos = col("ingresos").astype(float)
+    gastos = np.minimum(col("gastos").astype(float), ingresos)
+
+    anos_totales = col("anos_cotizados_hoy") + col("anos_futuros")
+    anos_hasta_jub = np.maximum(1, edad_prevista_jub - edad_actual).astype(int)
+    n_meses = anos_hasta_jub * 12
+
+    modo_valido, coef_ajuste = evaluar_modalidades(
+        col("tipo_jubilacion"), anos_totales, edad_actual, col("meses_anticipo"), col("meses_demora")
+    )
+
+    # Pensión
+    base = bases_reguladoras_cartera(col("salario_actual"), col("crecimiento_salarial"), col("ipc_actualizacion"))
+    base = np.minimum(base, calculo.BASE_MAX_ESPANA_2026)
+    pct = np.where(modo_valido, np.minimum(1.0, anos_totales / 37), 0.0)
+    pension_hoy = base * pct * coef_ajuste
+    inflacion = col("inflacion").astype(float)
+    pension_futura_sin_tope = pension_hoy * (1 + col("reval") / 100) ** anos_hasta_jub
+    pension_max_futura = calculo.PENSION_MAX_2026 * (1 + inflacion / 100 + calculo.EXTRA_REVAL) ** anos_hasta_jub
+    limite_aplicado = pension_futura_sin_tope > pension_max_futura
+    pension_futura = np.where(limite_aplicado, pension_max_futura, pension_futura_sin_tope)
+
+    # Nivel de vida, brecha y capital objetivo
+    factor_inflacion = (1 + inflacion / 100) ** anos_hasta_jub
+    mantenimiento = col("porcentaje_mantenimiento") / 100
+    nivel_objetivo = ingresos * mantenimiento * factor_inflacion
+    nivel_gastos = gastos * mantenimiento * factor_inflacion
+    sobre_ingresos = codigos(col("modo_brecha"), calculo.MODOS_BRECHA) == 0
+    nivel_usado = np.where(sobre_ingresos, nivel_objetivo, nivel_gastos)
+    brecha = np.maximum(0.0, nivel_usado - pension_futura)
+    capital_objetivo = brecha * 12 * anos_hasta_jub
+
+    # Plan de ahorro (None en la columna = valor por defecto de la app)
+    hay_brecha = brecha > 0
+    aportacion_inicial = _opcional(col("aportacion_inicial"), np.where(hay_brecha, 0.0, 1000.0))
+    inflacion_media = _opcional(col("inflacion_media"), inflacion)
+    rentabilidad = col("rentabilidad").astype(float)
+
+    recomendada = np.where(
+        hay_brecha,
+        cuotas_recomendadas(capital_objetivo, aportacion_inicial, rentabilidad, n_meses),
+        calculo.CUOTA_SIN_BRECHA,
+    )
+    cuota_aplicada = np.maximum(_opcional(col("cuota_mensual"), recomendada), calculo.CUOTA_MINIMA)
+    cuota_ajustada = np.maximum(
+        cuotas_ajustadas(capital_objetivo, aportacion_inicial, rentabilidad, inflacion_media, n_meses),
+        calculo.CUOTA_MINIMA,
+    )
+
+    factor_capital, factor_infl_plan, suma_cuotas = _factores_plan(rentabilidad, inflacion_media, n_meses)
+    capital_final = aportacion_inicial * factor_capital + cuota_aplicada * suma_cuotas
+
+    return ResultadoCartera(
+        anos_totales=anos_totales,
+        anos_hasta_jub=anos_hasta_jub,
+        modo_valido=modo_valido,
+        coef_ajuste=coef_ajuste,
+        base=base,
+        pension_hoy=pension_hoy,
+        pension_futura=pension_futura,
+        limite_aplicado=limite_aplicado,
+        nivel_vida_futuro_objetivo=nivel_objetivo,
+        nivel_vida_futuro_gastos=nivel_gastos,
+        brecha=brecha,
+        capital_objetivo=capital_objetivo,
+        aportacion_inicial=aportacion_inicial,
+        rentabilidad=rentabilidad,
+        inflacion_media=inflacion_media,
+        cuota_recomendada=recomendada,
+        cuota_ajustada=cuota_ajustada,
+        cuota_aplicada=cuota_aplicada,
+        capital_final=capital_final,
+        total_aportado=aportacion_inicial + cuota_aplicada * n_meses,
+        capital_ajustado_final=capital_final / factor_infl_plan,
+    )
+
+
+def trayectorias_cartera(resultado, meses_max=None, dtype=np.float64):
+    # Matriz clientes × meses del plan aplicado a cada cliente
+    return simular_planes(
+        resultado.cuota_aplicada, resultado.aportacion_inicial, resultado.rentabilidad,
+        resultado.inflacion_media, resultado.anos_hasta_jub * 12, meses_max=meses_max, dtype=dtype,
+    )
+
@@ -0,0 +1,163 @@
+# ============================================================
+# DEPENDENCIAS SRG — valores derivados con recálculo incremental
+# ============================================================
+#
+# Un Grafo guarda, para cada valor derivado (años totales, pensión,
+# brecha, capital objetivo, plan...), la función que lo calcula y los
+# valores de los que depende. Las entradas (los datos de pantalla) se
+# fijan con fijar(); al pedir un nodo con grafo["nombre"] solo se
+# recalcula si desde su último cálculo ha cambiado algo de lo que
+# depende. Si un nodo recalculado da el mismo resultado que antes, los
+# que dependen de él tampoco se recalculan.
+#
+# Los valores se comparan por cache.huella, con el mismo criterio que las
+# cachés de etapa. registrar() escribe en el log las entradas que
+# cambiaron y los nodos recalculados desde la última llamada, así se ve
+# cuánto trabajo provoca cada cambio en un widget.
+
+import json
+from collections import deque
+from dataclasses import dataclass
+from operator import itemgetter
+
+from . import cache, calculo, sesion, tiempos
+
+logger = tiempos.logger_srg("srg.dependencias")
+
+MAX_HISTORIAL = 20
+
+
+@dataclass(frozen=True)
+class Nodo:
+    funcion: object
+    dependencias: tuple
+
+
+class Grafo:
+    def __init__(self, nodos):
+        self.nodos = dict(nodos)
+        self.valores = {}    # entradas y nodos ya calculados
+        self.huellas = {}
+        self.versiones = {}  # cambia cada vez que cambia el valor
+        self.vistas = {}     # nodo → versiones de sus dependencias en su último cálculo
+        self.cambiadas = []  # entradas que cambiaron desde el último registrar()
+        self.recalculados = []
+        self.historial = deque(maxlen=MAX_HISTORIAL)
+
+    def usar(self, **funciones):
+        # Cambia la función de un nodo por otra equivalente (p. ej. con caché o cronometrada)
+        # sin invalidar su valor
+        for nombre, funcion in funciones.items():
+            self.nodos[nombre] = Nodo(funcion, self.nodos[nombre].dependencias)
+
+    def _guardar(self, nombre, valor):
+        huella = cache.huella(valor)
+        cambia = self.huellas.get(nombre) != huella
+        if cambia:
+            self.huellas[nombre] = huella
+            self.versiones[nombre] = self.versiones.get(nombre, 0) + 1
+            self.valores[nombre] = valor
+        return cambia
+
+    def fijar(self, **entradas):
+        for nombre, valor in entradas.items():
+            if nombre in self.nodos:
+                raise ValueError(f"{nombre!r} es un valor derivado, no una entrada")
+            if self._guardar(nombre, valor):
+                self.cambiadas.append(nombre)
+
+    def __getitem__(self, nombre):
+        nodo = self.nodos.get(nombre)
+        if nodo is None:
+            if nombre not in self.valores:
+                raise KeyError(f"Entrada sin fijar: {nombre!r}")
+            return self.valores[nombre]
+
+        argumentos = [self[d] for d in nodo.dependencias]
+        vista = tuple(self.versiones[d] for d in nodo.dependencias)
+        if self.vistas.get(nombre) != vista:
+            self._guardar(nombre, nodo.funcion(*argumentos))
+            self.vistas[nombre] = vista
+            self.recalculados.append(nombre)
+        return self.valores[nombre]
+
+    def registrar(self, origen):
+        # Escribe y devuelve lo ocurrido desde la última llamada
+        resumen = {
+            "evento": "grafo_srg",
+            "origen": origen,
+            "entradas": self.cambiadas,
+            "recalculados": self.recalculados,
+            "nodos": len(self.nodos),
+        }
+        self.cambiadas, self.recalculados = [], []
+        self.historial.append(resumen)
+        logger.info(json.dumps(resumen, ensure_ascii=False))
+        return resumen
+
+
+# ============================================================
+# 🟦 Grafo del simulador
+# ============================================================
+
+def _nivel_vida_futuro(modo_nivel_vida, objetivo, gastos):
+    return objetivo if "Objetivo económico" in modo_nivel_vida else gastos
+
+
+def _nivel_usado(modo_brecha, objetivo, gastos):
+    return objetivo if modo_brecha == "Objetivo económico" else gastos
+
+
+def _cuota_recomendada(brecha, capital_objetivo, aportacion_inicial, rentabilidad, n_meses):
+    if brecha > 0:
+        return calculo.cuota_recomendada(capital_objetivo, aportacion_inicial, rentabilidad, n_meses)
+    return calculo.CUOTA_SIN_BRECHA
+
+
+def _plan(cuota, aportacion_inicial, rentabilidad, inflacion_media, n_meses):
+    # Resultado compacto, como el que se guardaba en la sesión
+    return sesion.compactar_plan(calculo.simular_plan(cuota, aportacion_inicial, rentabilidad, inflacion_media, n_meses))
+
+
+def _componentes(nodos, origen, nombres):
+    # Un nodo por cada elemento de la tupla que devuelve `origen`
+    for i, nombre in enumerate(nombres):
+        nodos[nombre] = Nodo(itemgetter(i), (origen,))
+
+
+def nodos_simulador():
+    # Entradas: edad_actual, edad_prevista_jub, anos_cotizados_hoy, anos_futuros, tipo_jubilacion,
+    # meses_anticipo, meses_demora, salario_actual, crecimiento_salarial, ipc_actualizacion,
+    # inflacion, reval, ingresos_hoy, gastos_hoy, porcentaje_mantenimiento, modo_nivel_vida,
+    # modo_brecha, aportacion_inicial, rentabilidad, inflacion_media y cuota_mensual
+    nodos = {
+        "anos_totales": Nodo(lambda cotizados, futuros: cotizados + futuros, ("anos_cotizados_hoy", "anos_futuros")),
+        "anos_hasta_jub": Nodo(lambda actual, prevista: max(1, prevista - actual), ("edad_actual", "edad_prevista_jub")),
+        "modalidad": Nodo(calculo.evaluar_modalidad, ("tipo_jubilacion", "anos_totales", "edad_actual",
+                                                       "edad_prevista_jub", "meses_anticipo", "meses_demora")),
+        "base": Nodo(calculo.base_reguladora, ("salario_actual", "crecimiento_salarial", "ipc_actualizacion")),
+        "pension": Nodo(calculo.calcular_pension, ("base", "anos_totales", "coef_ajuste", "reval", "inflacion",
+                                                   "anos_hasta_jub", "modo_valido")),
+        "nivel_vida": Nodo(calculo.calcular_nivel_vida, ("ingresos_hoy", "gastos_hoy", "porcentaje_mantenimiento",
+                                                         "inflacion", "anos_hasta_jub")),
+        "nivel_vida_futuro": Nodo(_nivel_vida_futuro, ("modo_nivel_vida", "nivel_vida_futuro_objetivo",
+                                                       "nivel_vida_futuro_gastos")),
+        "nivel_usado": Nodo(_nivel_usado, ("modo_brecha", "nivel_vida_futuro_objetivo", "nivel_vida_futuro_gastos")),
+        "brecha": Nodo(calculo.calcular_brecha, ("nivel_usado", "pension_futura")),
+        "capital_objetivo": Nodo(calculo.calcular_capital_objetivo, ("brecha", "anos_hasta_jub")),
+        "n_meses": Nodo(lambda anos: anos * 12, ("anos_hasta_jub",)),
+        "cuota_recomendada": Nodo(_cuota_recomendada, ("brecha", "capital_objetivo", "aportacion_inicial",
+                                                       "rentabilidad", "n_meses")),
+        "cuota_ajustada": Nodo(calculo.resolver_cuota, ("capital_objetivo", "aportacion_inicial", "rentabilidad",
+                                                        "inflacion_media", "n_meses")),
+        "plan": Nodo(_plan, ("cuota_mensual", "aportacion_inicial", "rentabilidad", "inflacion_media", "n_meses")),
+    }
+    _componentes(nodos, "modalidad", ("modo_valido", "motivo_error", "coef_ajuste", "edad_efectiva"))
+    _componentes(nodos, "pension", ("pct", "pension_hoy", "pension_futura_sin_tope", "limite_aplicado",
+                                    "pension_futura"))
+    _componentes(nodos, "nivel_vida", ("factor_inflacion", "nivel_vida_futuro_objetivo", "nivel_vida_futuro_gastos"))
+    return nodos
+
+
+def grafo_simulador():
+    return Grafo(nodos_simulador())
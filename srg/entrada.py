@@ -0,0 +1,107 @@
+# ============================================================
+# ENTRADA SRG — lectura y validación de escenarios desde JSON
+# ============================================================
+#
+# Convierte objetos JSON (dict) en calculo.Escenario comprobando nombres,
+# tipos y opciones, y agrupa escenarios ya leídos en las columnas que
+# espera srg.cartera. Lo usan la API HTTP y la herramienta de JSONL.
+
+import math
+from dataclasses import fields
+
+import numpy as np
+
+from . import calculo
+
+CAMPOS_ESCENARIO = {f.name: f.type for f in fields(calculo.Escenario)}
+OPCIONALES_ESCENARIO = {f.name for f in fields(calculo.Escenario) if f.default is None}
+OPCIONES_ESCENARIO = {
+    "tipo_jubilacion": calculo.TIPOS_JUBILACION,
+    "modo_nivel_vida": calculo.MODOS_NIVEL_VIDA,
+    "modo_brecha": calculo.MODOS_BRECHA,
+}
+
+# Rangos admitidos (los de los number_input de la app; los campos que allí no tienen
+# máximo se acotan para que los cálculos y los arrays por mes no se disparen)
+LIMITES_ESCENARIO = {
+    "edad_actual": (16, 70),
+    "edad_prevista_jub": (17, 75),
+    "esperanza_vida": (75, 100),
+    "anos_cotizados_hoy": (0, 70 - 16),
+    "anos_futuros": (0, 75 - 16),
+    "meses_anticipo": (1, 48),
+    "meses_demora": (1, 120),
+    "ingresos": (0, 20_000),
+    "gastos": (0, 20_000),
+    "salario_actual": (0, 20_000),
+    "crecimiento_salarial": (0, 10),
+    "ipc_actualizacion": (0, 10),
+    "inflacion": (0, 10),
+    "reval": (0, 5),
+    "porcentaje_mantenimiento": (50, 110),
+    "aportacion_inicial": (0, 10_000_000),
+    "rentabilidad": (0, 20),
+    "inflacion_media": (0, 20),
+    "cuota_mensual": (0, 100_000),
+}
+
+
+class ErrorEntrada(ValueError):
+    # Datos de entrada no válidos (el mensaje se devuelve tal cual al usuario)
+    pass
+
+
+def numero(datos, nombre, entero=False, minimo=None, maximo=None):
+    valor = datos.get(nombre)
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)) or (isinstance(valor, float) and not math.isfinite(valor)):
+        raise ErrorEntrada(f"{nombre!r} debe ser un número")
+    if entero and valor != int(valor):
+        raise ErrorEntrada(f"{nombre!r} debe ser un número entero")
+    if (minimo is not None and valor < minimo) or (maximo is not None and valor > maximo):
+        raise ErrorEntrada(f"{nombre!r} debe estar entre {minimo} y {maximo}")
+    return int(valor) if entero else float(valor)
+
+
+def sin_campos_extra(datos, permitidos):
+    if not isinstance(datos, dict):
+        raise ErrorEntrada("Se esperaba un objeto JSON")
+    extra = sorted(set(datos) - set(permitidos))
+    if extra:
+        raise ErrorEntrada(f"Campos desconocidos: {extra}")
+
+
+def leer_escenario(datos):
+    # dict → calculo.Escenario; los campos que falten toman su valor por defecto
+    sin_campos_extra(datos, CAMPOS_ESCENARIO)
+    valores = {}
+    for nombre, valor in datos.items():
+        tipo = CAMPOS_ESCENARIO[nombre]
+        if tipo is str:
+            if not isinstance(valor, str):
+                raise ErrorEntrada(f"{nombre!r} debe ser un texto")
+            valores[nombre] = valor
+        elif valor is None and nombre in OPCIONALES_ESCENARIO:
+            valores[nombre] = None
+        else:
+            minimo, maximo = LIMITES_ESCENARIO[nombre]
+            valores[nombre] = numero(datos, nombre, entero=tipo is int, minimo=minimo, maximo=maximo)
+
+    for nombre, validas in OPCIONES_ESCENARIO.items():
+        if nombre in valores and valores[nombre] not in validas:
+            raise ErrorEntrada(f"{nombre!r} debe ser uno de {validas}")
+    return calculo.Escenario(**valores)
+
+
+def columnas_escenarios(escenarios):
+    # [Escenario, ...] → dict de columnas para cartera.calcular_cartera
+    # (None → NaN: la cartera aplica entonces el valor por defecto de la app)
+    columnas = {}
+    for nombre, tipo in CAMPOS_ESCENARIO.items():
+        valores = [getattr(e, nombre) for e in escenarios]
+        if tipo is str:
+            columnas[nombre] = np.array(valores, dtype=object)
+        elif tipo is int:
+            columnas[nombre] = np.array(valores, dtype=np.int64)
+        else:
+            columnas[nombre] = np.array([np.nan if v is None else v for v in valores], dtype=float)
+    return columnas
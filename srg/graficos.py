@@ -0,0 +1,60 @@
+# ============================================================
+# GRÁFICOS SRG — reducción de puntos y trazas ligeras
+# ============================================================
+#
+# Las series mensuales largas se reducen con LTTB (Largest-Triangle-
+# Three-Buckets), que conserva la forma de la curva, a un presupuesto de
+# puntos. Si la serie original supera un umbral se usa Scattergl (WebGL),
+# aunque luego se dibujen menos puntos. Los datos
+# van siempre como arrays NumPy tipados: Plotly ≥ 6 los envía al
+# navegador como binario en base64 en lugar de listas JSON de floats.
+
+import numpy as np
+
+MAX_PUNTOS = 500
+UMBRAL_WEBGL = 1000
+
+
+def lttb(x, y, n_puntos):
+    # Índices de los puntos elegidos (el primero y el último siempre entran)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_puntos is None or n_puntos >= n or n_puntos < 3:
+        return np.arange(n)
+
+    # n_puntos - 2 cubos entre el segundo y el penúltimo punto
+    bordes = np.linspace(1, n - 1, n_puntos - 1).astype(int)
+    indices = np.empty(n_puntos, dtype=np.intp)
+    indices[0], indices[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_puntos - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        # Vértice C: media del cubo siguiente (el último punto para el último cubo)
+        sig_inicio = bordes[i + 1]
+        sig_fin = bordes[i + 2] if i + 2 < len(bordes) else n
+        x_c = x[sig_inicio:sig_fin].mean()
+        y_c = y[sig_inicio:sig_fin].mean()
+
+        # Se elige el punto del cubo que forma el triángulo de mayor área con A y C
+        areas = np.abs((x[a] - x_c) * (y[inicio:fin] - y[a]) - (x[a] - x[inicio:fin]) * (y_c - y[a]))
+        a = inicio + int(np.argmax(areas))
+        indices[i + 1] = a
+    return indices
+
+
+def reducir(x, y, n_puntos=MAX_PUNTOS):
+    indices = lttb(x, y, n_puntos)
+    return np.asarray(x)[indices], np.asarray(y, dtype=float)[indices]
+
+
+def traza(x, y, max_puntos=MAX_PUNTOS, umbral_webgl=UMBRAL_WEBGL, **opciones):
+    # go.Scatter (o go.Scattergl si la serie original es larga) con la serie reducida
+    import plotly.graph_objects as go
+
+    clase = go.Scattergl if len(x) > umbral_webgl else go.Scatter
+    x, y = reducir(x, y, max_puntos)
+    if np.issubdtype(x.dtype, np.integer):
+        x = x.astype(np.int32)  # los enteros de 64 bits no tienen array tipado en JS
+    return clase(x=x, y=y, **opciones)
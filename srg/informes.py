@@ -0,0 +1,173 @@
+# ============================================================
+# INFORMES SRG — modo compacto y sin conexión
+# ============================================================
+#
+# Utilidades para que los informes HTML pesen poco y se vean sin red:
+# datos anuales en lugar de mensuales, gráfico SVG en línea, CSS
+# minificado y, solo si se pide, el bundle de Plotly incrustado una vez.
+
+import html
+import re
+from functools import lru_cache
+
+import numpy as np
+
+FORMATO_COMPLETO = "completo"
+FORMATO_COMPACTO = "compacto"
+FORMATO_OFFLINE = "offline"
+FORMATOS = {
+    FORMATO_COMPLETO: "Completo (gráfico interactivo, requiere conexión)",
+    FORMATO_COMPACTO: "Compacto (gráfico estático, sin conexión)",
+    FORMATO_OFFLINE: "Compacto interactivo (incluye Plotly, sin conexión)",
+}
+
+# Colores de las series del gráfico SRG
+SERIES_PLAN = (
+    ("Ahorro con crecimiento", "green", False),
+    ("Ahorro aportado", "blue", False),
+    ("Ahorro ajustado por inflación", "red", True),
+)
+
+
+def indices_anuales(n_meses):
+    # Mes 0 (inicio) más el cierre de cada año y el último mes
+    indices = np.arange(0, n_meses + 1, 12)
+    if indices[-1] != n_meses:
+        indices = np.append(indices, n_meses)
+    return indices
+
+
+def series_anuales(plan):
+    # Decima un calculo.PlanAhorro a resolución anual: (meses, [crecimiento, aportado, ajustado])
+    meses = np.concatenate(([0], plan.meses))
+    capital = np.concatenate(([plan.aportacion_inicial], plan.capital))
+    aportado = plan.aportacion_inicial + plan.cuota * meses
+    ajustado = np.concatenate(([plan.aportacion_inicial], plan.capital_ajustado))
+    idx = indices_anuales(len(plan.meses))
+    return meses[idx], [capital[idx], aportado[idx], ajustado[idx]]
+
+
+# ============================================================
+# 🟦 Gráfico SVG en línea
+# ============================================================
+
+def paso_eje(maximo, divisiones=5):
+    # Paso "redondo" (1, 2, 2.5, 5 × 10^k) para las marcas del eje Y
+    bruto = max(maximo, 1.0) / divisiones
+    potencia = 10 ** np.floor(np.log10(bruto))
+    for m in (1, 2, 2.5, 5, 10):
+        if m * potencia >= bruto:
+            return m * potencia
+    return 10 * potencia
+
+
+def grafico_svg(meses, series, nombres=SERIES_PLAN, ancho=760, alto=340):
+    margen_izq, margen_der, margen_sup, margen_inf = 70, 15, 15, 60
+    ancho_util = ancho - margen_izq - margen_der
+    alto_util = alto - margen_sup - margen_inf
+
+    meses = np.asarray(meses, dtype=float)
+    x_max = max(meses[-1], 1.0)
+    paso = paso_eje(max(float(np.max(s)) for s in series))
+    y_max = paso * np.ceil(max(float(np.max(s)) for s in series) / paso) or paso
+
+    def px(x):
+        return margen_izq + x / x_max * ancho_util
+
+    def py(y):
+        return margen_sup + alto_util - y / y_max * alto_util
+
+    partes = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {ancho} {alto}" '
+        f'width="100%" font-family="Segoe UI,Arial" font-size="11">'
+    ]
+
+    # Rejilla y etiquetas del eje Y (en €)
+    for valor in np.arange(0, y_max + paso / 2, paso):
+        y = py(valor)
+        partes.append(f'<line x1="{margen_izq}" y1="{y:.1f}" x2="{ancho - margen_der}" y2="{y:.1f}" stroke="#ddd"/>')
+        partes.append(f'<text x="{margen_izq - 6}" y="{y + 4:.1f}" text-anchor="end">{valor:,.0f} €</text>')
+
+    # Etiquetas del eje X (años)
+    anos = int(x_max // 12)
+    paso_anos = max(1, int(np.ceil(anos / 10)))
+    for ano in range(0, anos + 1, paso_anos):
+        x = px(ano * 12)
+        partes.append(f'<text x="{x:.1f}" y="{alto - margen_inf + 16}" text-anchor="middle">{ano}</text>')
+    partes.append(f'<text x="{margen_izq + ancho_util / 2:.1f}" y="{alto - margen_inf + 32}" '
+                  f'text-anchor="middle">Años</text>')
+
+    # Series
+    for (nombre, color, discontinua), valores in zip(nombres, series):
+        puntos = " ".join(f"{px(x):.1f},{py(y):.1f}" for x, y in zip(meses, valores))
+        trazo = ' stroke-dasharray="4 3"' if discontinua else ""
+        partes.append(f'<polyline fill="none" stroke="{color}" stroke-width="2"{trazo} points="{puntos}"/>')
+
+    # Leyenda
+    x_leyenda = margen_izq
+    for nombre, color, discontinua in nombres:
+        trazo = ' stroke-dasharray="4 3"' if discontinua else ""
+        partes.append(f'<line x1="{x_leyenda}" y1="{alto - 10}" x2="{x_leyenda + 20}" y2="{alto - 10}" '
+                      f'stroke="{color}" stroke-width="2"{trazo}/>')
+        partes.append(f'<text x="{x_leyenda + 25}" y="{alto - 6}">{html.escape(nombre)}</text>')
+        x_leyenda += 30 + 6.5 * len(nombre)
+
+    partes.append("</svg>")
+    return "".join(partes)
+
+
+# ============================================================
+# 🟦 Plotly sin conexión y HTML compacto
+# ============================================================
+
+@lru_cache(maxsize=1)
+def plotly_js():
+    # Bundle minificado de Plotly: se lee una sola vez por proceso
+    import plotly.offline
+    return plotly.offline.get_plotlyjs()
+
+
+def grafico_plotly_div(meses, series, nombres=SERIES_PLAN):
+    # Gráfico interactivo con los datos anuales y sin <script> de Plotly
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    for (nombre, color, discontinua), valores in zip(nombres, series):
+        fig.add_trace(go.Scatter(x=np.asarray(meses) / 12, y=np.round(valores, 2), mode="lines", name=nombre,
+                                 line=dict(color=color, width=2, dash="dot" if discontinua else None)))
+    fig.update_layout(height=450, template="plotly_white", xaxis_title="Años")
+    return fig.to_html(include_plotlyjs=False, full_html=False)
+
+
+def minificar_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};:,])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+def _quitar_reglas_sin_uso(css, cuerpo):
+    # Elimina reglas de clase (.x {...}) cuya clase no aparece en el cuerpo del HTML
+    def conservar(regla):
+        clases = re.findall(r"\.([\w-]+)", regla.group(1))
+        if clases and not any(f'class="{c}"' in cuerpo or f"{c} " in cuerpo for c in clases):
+            return ""
+        return regla.group(0)
+    return re.sub(r"([^{}]+)\{[^{}]*\}", conservar, css)
+
+
+def compactar_html(documento, incluir_plotly=False):
+    # Minifica el CSS, quita reglas sin uso y la sangría entre etiquetas;
+    # si se pide, incrusta el bundle de Plotly una sola vez en <head>.
+    estilos = re.findall(r"<style>(.*?)</style>", documento, flags=re.S)
+    documento = re.sub(r"\s*<style>.*?</style>", "", documento, flags=re.S)
+    cuerpo = documento
+
+    css = _quitar_reglas_sin_uso(minificar_css(" ".join(estilos)), cuerpo)
+    # Solo se quita la sangría: un salto de línea entre etiquetas en línea sigue siendo un espacio
+    documento = re.sub(r"\s*\n\s*", "\n", documento.strip())
+
+    cabecera = f"<style>{css}</style>"
+    if incluir_plotly:
+        cabecera += f"<script>{plotly_js()}</script>"
+    return documento.replace("<head>", "<head>" + cabecera, 1)
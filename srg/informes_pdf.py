@@ -0,0 +1,350 @@
+# ============================================================
+# INFORMES PDF SRG — informe cliente y técnico con ReportLab
+# ============================================================
+#
+# Genera los mismos informes que la app en HTML, pero como PDF nativo y
+# sin navegador. Las partes estáticas (fuentes de fonts/, logo reducido,
+# estilos y decoración de página) se preparan una sola vez por proceso;
+# por informe solo se maquetan los datos y se dibuja la gráfica en
+# vectorial.
+
+import io
+import threading
+from contextlib import contextmanager
+from html import escape
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from . import graficos, informes, recursos
+
+RAIZ = Path(__file__).resolve().parent.parent
+CARPETA_FUENTES = RAIZ / "fonts"
+PUNTOS_GRAFICA = 200
+
+AZUL_SRG = "#0055A4"
+AZUL_OSCURO = "#003366"
+AMARILLO_SRG = "#fff8dc"
+DORADO_SRG = "#d4af37"
+TEXTO_SRG = "#0A1A2F"
+
+
+# ============================================================
+# 🟦 Recursos estáticos (una vez por proceso)
+# ============================================================
+
+@lru_cache(maxsize=1)
+def fuentes():
+    # (normal, negrita): DejaVu de fonts/ si está, Helvetica si no
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    normal, negrita = CARPETA_FUENTES / "DejaVuSans.ttf", CARPETA_FUENTES / "DejaVuSans-Bold.ttf"
+    if not (normal.exists() and negrita.exists()):
+        return "Helvetica", "Helvetica-Bold"
+    pdfmetrics.registerFont(TTFont("DejaVuSans", str(normal)))
+    pdfmetrics.registerFont(TTFont("DejaVuSans-Bold", str(negrita)))
+    pdfmetrics.registerFontFamily("DejaVuSans", normal="DejaVuSans", bold="DejaVuSans-Bold")
+    return "DejaVuSans", "DejaVuSans-Bold"
+
+
+_cerrojo_a85 = threading.Lock()
+_documentos_sin_a85 = 0
+_a85_original = None
+
+
+@contextmanager
+def flujos_binarios():
+    # Sin la extensión C de ReportLab, codificar los flujos en ASCII85 es lo más lento de
+    # generar el informe (y hace el PDF un 25 % más grande). ReportLab no tiene una opción
+    # por documento: lee rl_config.useA85 mientras construye, así que se desactiva solo
+    # mientras se construye algún informe y se restaura el valor original después.
+    global _documentos_sin_a85, _a85_original
+    from reportlab import rl_config
+
+    with _cerrojo_a85:
+        if _documentos_sin_a85 == 0:
+            _a85_original = rl_config.useA85
+            rl_config.useA85 = 0
+        _documentos_sin_a85 += 1
+    try:
+        yield
+    finally:
+        with _cerrojo_a85:
+            _documentos_sin_a85 -= 1
+            if _documentos_sin_a85 == 0:
+                rl_config.useA85 = _a85_original
+
+
+@lru_cache(maxsize=1)
+def logo():
+    # El PNG original es de 1024 px: se usa la versión reducida de recursos.py
+    # para no incrustarlo entero en cada PDF
+    datos = recursos.imagen_reducida("logo", "JPEG", 90)
+    if datos is None:
+        return None
+    from reportlab.lib.utils import ImageReader
+
+    return ImageReader(io.BytesIO(datos))
+
+
+@lru_cache(maxsize=1)
+def estilos():
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle
+
+    normal, negrita = fuentes()
+    texto = colors.HexColor(TEXTO_SRG)
+    return {
+        "titulo_seccion": ParagraphStyle("titulo_seccion", fontName=negrita, fontSize=13, leading=16,
+                                         textColor=texto, spaceBefore=12, spaceAfter=6),
+        "texto": ParagraphStyle("texto", fontName=normal, fontSize=9.5, leading=13, textColor=texto,
+                                spaceAfter=4),
+    }
+
+
+@lru_cache(maxsize=1)
+def estilo_tabla():
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+
+    normal, negrita = fuentes()
+    return TableStyle([
+        ("FONT", (0, 0), (-1, -1), normal, 8),
+        ("FONT", (0, 0), (-1, 0), negrita, 8),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor(AZUL_SRG)),
+        ("BACKGROUND", (0, 1), (-1, -1), colors.HexColor(AMARILLO_SRG)),
+        ("ALIGN", (0, 0), (-1, 0), "CENTER"),
+        ("ALIGN", (0, 1), (-1, -1), "RIGHT"),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#cccccc")),
+        ("BOX", (0, 0), (-1, -1), 1.2, colors.HexColor(DORADO_SRG)),
+    ])
+
+
+@lru_cache(maxsize=None)
+def _decorar_pagina(titulo, pie):
+    # Cabecera azul con logo y título, y pie con el copyright SRG
+    from reportlab.lib import colors
+
+    normal, negrita = fuentes()
+    imagen = logo()
+
+    def decorar(lienzo, documento):
+        ancho, alto = documento.pagesize
+        lienzo.saveState()
+        lienzo.setFillColor(colors.HexColor(AZUL_OSCURO))
+        lienzo.rect(0, alto - 62, ancho, 62, stroke=0, fill=1)
+        if imagen is not None:
+            lienzo.drawImage(imagen, 36, alto - 56, width=50, height=50)
+        lienzo.setFillColor(colors.white)
+        lienzo.setFont(negrita, 16)
+        lienzo.drawString(100, alto - 38, titulo)
+        lienzo.setFillColor(colors.HexColor(AZUL_SRG))
+        lienzo.rect(0, 0, ancho, 28, stroke=0, fill=1)
+        lienzo.setFillColor(colors.white)
+        lienzo.setFont(normal, 8)
+        lienzo.drawCentredString(ancho / 2, 11, pie)
+        lienzo.drawRightString(ancho - 36, 11, f"Página {documento.page}")
+        lienzo.restoreState()
+
+    return decorar
+
+
+# ============================================================
+# 🟦 Gráfica y tabla
+# ============================================================
+
+def grafica_plan(plan, ancho=480, alto=220, max_puntos=PUNTOS_GRAFICA):
+    # Dibujo vectorial de las tres series del plan (reducidas con LTTB)
+    from reportlab.graphics.shapes import Drawing, Line, PolyLine, String
+    from reportlab.lib import colors
+
+    normal, _ = fuentes()
+    margen_izq, margen_inf, margen_sup = 62, 42, 8
+    ancho_util, alto_util = ancho - margen_izq - 8, alto - margen_inf - margen_sup
+
+    meses = np.concatenate(([0], plan.meses))
+    series = [
+        np.concatenate(([plan.aportacion_inicial], plan.capital)),
+        plan.aportacion_inicial + plan.cuota * meses,
+        np.concatenate(([plan.aportacion_inicial], plan.capital_ajustado)),
+    ]
+    x_max = max(float(meses[-1]), 1.0)
+    maximo = max(float(s.max()) for s in series)
+    paso = informes.paso_eje(maximo)
+    y_max = paso * np.ceil(maximo / paso) or paso
+
+    def px(x):
+        return margen_izq + x / x_max * ancho_util
+
+    def py(y):
+        return margen_inf + y / y_max * alto_util
+
+    dibujo = Drawing(ancho, alto)
+    for valor in np.arange(0, y_max + paso / 2, paso):
+        dibujo.add(Line(margen_izq, py(valor), ancho - 8, py(valor), strokeColor=colors.HexColor("#dddddd"),
+                        strokeWidth=0.5))
+        dibujo.add(String(margen_izq - 4, py(valor) - 3, f"{valor:,.0f} €", fontName=normal, fontSize=7,
+                          textAnchor="end"))
+    anos = int(x_max // 12)
+    for ano in range(0, anos + 1, max(1, int(np.ceil(anos / 10)))):
+        dibujo.add(String(px(ano * 12), margen_inf - 11, str(ano), fontName=normal, fontSize=7,
+                          textAnchor="middle"))
+
+    x_leyenda = margen_izq
+    for (nombre, color, discontinua), valores in zip(informes.SERIES_PLAN, series):
+        x, y = graficos.reducir(meses, valores, max_puntos)
+        puntos = np.column_stack((px(x.astype(float)), py(y))).ravel().tolist()
+        trazo = dict(strokeColor=getattr(colors, color), strokeWidth=1.5,
+                     strokeDashArray=[3, 2] if discontinua else None)
+        dibujo.add(PolyLine(puntos, **trazo))
+        dibujo.add(Line(x_leyenda, 6, x_leyenda + 16, 6, **trazo))
+        dibujo.add(String(x_leyenda + 20, 3, nombre, fontName=normal, fontSize=7))
+        x_leyenda += 30 + 4.2 * len(nombre)
+    return dibujo
+
+
+def tabla_anual(plan):
+    # Una fila por año (cierre de cada año y último mes), como el informe HTML compacto
+    from reportlab.platypus import Table
+
+    filas = informes.indices_anuales(len(plan.meses))[1:] - 1
+    datos = [["Mes", "Aportación\nmensual (€)", "Capital\ninicio (€)", "Intereses\nganados (€)",
+              "Capital\nfinal (€)", "Capital ajustado\ninflación (€)"]]
+    for i in filas:
+        datos.append([f"{plan.meses[i]}", f"{plan.cuota:,.2f}", f"{plan.capital_inicio[i]:,.2f}",
+                      f"{plan.intereses[i]:,.2f}", f"{plan.capital[i]:,.2f}", f"{plan.capital_ajustado[i]:,.2f}"])
+    tabla = Table(datos, repeatRows=1, hAlign="CENTER")
+    tabla.setStyle(estilo_tabla())
+    return tabla
+
+
+# ============================================================
+# 🟦 Contenido de los informes
+# ============================================================
+
+def _euros(valor):
+    return f"{valor:,.0f} €"
+
+
+def _secciones_cliente(c):
+    return [
+        ("1. Resumen de tu situación", [
+            f"Pensión futura estimada: <b>{_euros(c['pension_futura'])}</b>",
+            f"Nivel de vida futuro: <b>{_euros(c['nivel_vida'])}</b>",
+            f"Brecha mensual: <b>{_euros(c['brecha'])}</b>",
+        ]),
+        ("2. Recomendación SRG", [
+            f"Cuota mensual aplicada: <b>{_euros(c['cuota_recomendada'])}</b>",
+            f"Capital estimado al jubilarte: <b>{_euros(c['capital_final'])}</b>",
+            f"Capital objetivo: <b>{_euros(c['capital_objetivo'])}</b>",
+            f"Capital ajustado por inflación: <b>{_euros(c['capital_ajustado_final'])}</b>",
+            f"Rentabilidad neta del plan: <b>{c['rentabilidad_neta']:.2f} %</b>",
+        ]),
+    ], [
+        ("5. ¿Cómo hemos calculado tu resultado?", [
+            "<b>1. Tu pensión futura:</b><br/>Hemos utilizado tu base reguladora estimada y el porcentaje "
+            f"que te corresponde según tus años cotizados. Resultado: <b>{_euros(c['pension_futura'])}</b> al mes.",
+            "<b>2. Tu nivel de vida futuro:</b><br/>Partimos de tu gasto mensual actual y lo actualizamos con "
+            f"la inflación media anual del periodo. Resultado: <b>{_euros(c['nivel_vida'])}</b> al mes.",
+            "<b>3. Tu brecha mensual:</b><br/>Diferencia entre tu pensión futura y tu nivel de vida futuro. "
+            f"Resultado: <b>{_euros(c['brecha'])}</b> al mes.",
+            "<b>4. Capital necesario para cubrir esa brecha:</b><br/>Brecha × 12 meses × años hasta la "
+            f"jubilación. Resultado: <b>{_euros(c['capital_objetivo'])}</b>.",
+            "<b>5. Cuota mensual recomendada:</b><br/>Calculamos la aportación mensual necesaria para alcanzar "
+            "ese capital, teniendo en cuenta la rentabilidad y la inflación. "
+            f"Resultado: <b>{_euros(c['cuota_recomendada'])}</b>.",
+            "<b>6. Resultado final del plan:</b><br/>Con la cuota aplicada, tu ahorro estimado al jubilarte "
+            f"será: <b>{_euros(c['capital_final'])}</b>.",
+        ]),
+    ]
+
+
+def _secciones_agente(c):
+    return [
+        ("1. Datos técnicos considerados", [
+            f"Pensión futura estimada: <b>{_euros(c['pension_futura'])}</b>",
+            f"Nivel de vida objetivo: <b>{_euros(c['nivel_vida'])}</b>",
+            f"Brecha mensual: <b>{_euros(c['brecha'])}</b>",
+            f"Rentabilidad media anual: <b>{c['rentabilidad']} %</b>",
+            f"Inflación media anual: <b>{c['inflacion_media']} %</b>",
+        ]),
+        ("2. Resultados del plan", [
+            f"Cuota aplicada: <b>{_euros(c['cuota_recomendada'])}</b>",
+            f"Capital final estimado: <b>{_euros(c['capital_final'])}</b>",
+            f"Capital objetivo: <b>{_euros(c['capital_objetivo'])}</b>",
+            f"Capital ajustado final: <b>{_euros(c['capital_ajustado_final'])}</b>",
+            f"Rentabilidad neta: <b>{c['rentabilidad_neta']:.2f} %</b>",
+        ]),
+    ], [
+        ("5. Trazabilidad técnica del cálculo SRG", [
+            "<b>1. Pensión futura (PF):</b><br/>PF = BR × porcentaje según años cotizados. "
+            f"Resultado: <b>{_euros(c['pension_futura'])}</b>.",
+            "<b>2. Nivel de vida futuro (NVF):</b><br/>NVF = gasto_actual × (1 + inflación_media) ^ años. "
+            f"Resultado: <b>{_euros(c['nivel_vida'])}</b>.",
+            f"<b>3. Brecha mensual (BM):</b><br/>BM = NVF − PF. Resultado: <b>{_euros(c['brecha'])}</b>.",
+            "<b>4. Capital objetivo (CO):</b><br/>CO = BM × 12 × años_hasta_jubilación. "
+            f"Resultado: <b>{_euros(c['capital_objetivo'])}</b>.",
+            "<b>5. Cuota recomendada (CR):</b><br/>CR = (CO − A × (1+r)^n) × r / ((1+r)^n − 1), con "
+            "A = aportación inicial, r = rentabilidad mensual y n = meses hasta jubilación. "
+            f"Resultado: <b>{_euros(c['cuota_recomendada'])}</b>.",
+            "<b>6. Capital final del plan (CF):</b><br/>Evolución mensual del ahorro con capitalización "
+            f"compuesta. Resultado: <b>{_euros(c['capital_final'])}</b>.",
+            "<b>7. Capital ajustado por inflación (CAI):</b><br/>CAI = CF / (1 + inflación_media) ^ años. "
+            f"Resultado: <b>{_euros(c['capital_ajustado_final'])}</b>.",
+            "<b>8. Rentabilidad neta del plan:</b><br/>RN = (CF / total_aportado − 1) × 100. "
+            f"Resultado: <b>{c['rentabilidad_neta']:.2f} %</b>.",
+        ]),
+    ]
+
+
+TIPOS_INFORME = {
+    "cliente": ("Informe Cliente SRG", "Simulador SRG — © 2026 Samuel Ruiz González",
+                _secciones_cliente, ("3. Evolución de tu ahorro", "4. Gráfica del plan")),
+    "agente": ("Informe Técnico SRG", "Informe Técnico SRG — © 2026 Samuel Ruiz González",
+               _secciones_agente, ("3. Evolución del ahorro", "4. Gráfica del plan")),
+}
+
+
+def informe_pdf(tipo, contexto, plan):
+    # tipo: "cliente" o "agente"; contexto: el mismo dict que usan los informes HTML;
+    # plan: calculo.PlanAhorro del escenario. Devuelve los bytes del PDF.
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import Frame, PageTemplate, Paragraph, BaseDocTemplate, Spacer
+
+    if tipo not in TIPOS_INFORME:
+        raise ValueError(f"Tipo de informe desconocido: {tipo!r}")
+    titulo, pie, secciones, (titulo_tabla, titulo_grafica) = TIPOS_INFORME[tipo]
+    estilo = estilos()
+
+    destino = io.BytesIO()
+    documento = BaseDocTemplate(destino, pagesize=A4, title=titulo, author="SRG",
+                                leftMargin=42, rightMargin=42, topMargin=78, bottomMargin=44)
+    marco = Frame(documento.leftMargin, documento.bottomMargin, documento.width, documento.height, id="cuerpo")
+    documento.addPageTemplates([PageTemplate(id="srg", frames=[marco], onPage=_decorar_pagina(titulo, pie))])
+
+    cabecera = [
+        Paragraph(f"Cliente: <b>{escape(contexto['nombre_cliente'])}</b> — Tel: {escape(contexto['telefono'])} — "
+                  f"Email: {escape(contexto['email'])}", estilo["texto"]),
+        Paragraph(f"Fecha: {escape(contexto['fecha'])}", estilo["texto"]),
+    ]
+    antes, despues = secciones(contexto)
+
+    def bloque(seccion):
+        nombre, parrafos = seccion
+        return [Paragraph(nombre, estilo["titulo_seccion"])] + [Paragraph(p, estilo["texto"]) for p in parrafos]
+
+    historia = list(cabecera)
+    for seccion in antes:
+        historia += bloque(seccion)
+    historia += [Paragraph(titulo_tabla, estilo["titulo_seccion"]), tabla_anual(plan)]
+    historia += [Paragraph(titulo_grafica, estilo["titulo_seccion"]), grafica_plan(plan), Spacer(1, 6)]
+    for seccion in despues:
+        historia += bloque(seccion)
+
+    with flujos_binarios():
+        documento.build(historia)
+    return destino.getvalue()
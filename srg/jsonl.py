@@ -0,0 +1,135 @@
+# ============================================================
+# JSONL SRG — escenarios por lotes desde la línea de comandos
+# ============================================================
+#
+# Lee un escenario por línea (objeto JSON con los campos de
+# calculo.Escenario y un "id" opcional que se devuelve tal cual) y
+# escribe un resultado por línea, en el mismo orden:
+#
+#   python -m srg.jsonl escenarios.jsonl -o resultados.jsonl
+#   cat escenarios.jsonl | python -m srg.jsonl > resultados.jsonl
+#
+# Todo va encadenado con generadores: se lee, se valida y se calcula por
+# bloques de TAM_BLOQUE líneas con srg.cartera (las mismas reglas que
+# calcular_escenario: pensión → brecha → capital objetivo → cuota →
+# plan), así que la memoria no crece con el tamaño de la entrada. Las
+# líneas no válidas (fuera de rango, ver entrada.LIMITES_ESCENARIO) y
+# las que dan un resultado no finito producen {"linea": n, "error": "..."}
+# y no detienen el proceso. Al terminar se informa de las filas por
+# segundo en stderr.
+
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from . import cartera
+from .entrada import ErrorEntrada, columnas_escenarios, leer_escenario
+
+TAM_BLOQUE = 1024
+
+# Un solo codificador: json.dumps con opciones crea uno nuevo en cada llamada.
+# Sin NaN ni Infinity, que no son JSON válido
+_codificador = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), allow_nan=False)
+
+
+def leer_lineas(fichero):
+    # (número de línea, objeto o error de JSON) por cada línea no vacía
+    for n, linea in enumerate(fichero, 1):
+        if not linea.strip():
+            continue
+        try:
+            yield n, json.loads(linea)
+        except json.JSONDecodeError as error:
+            yield n, ErrorEntrada(f"JSON no válido: {error.msg}")
+
+
+def leer_escenarios(lineas):
+    # (número de línea, id, Escenario o ErrorEntrada)
+    for n, datos in lineas:
+        if isinstance(datos, ErrorEntrada):
+            yield n, None, datos
+            continue
+        identificador = datos.pop("id", None) if isinstance(datos, dict) else None
+        try:
+            yield n, identificador, leer_escenario(datos)
+        except ErrorEntrada as error:
+            yield n, identificador, error
+
+
+def en_bloques(iterable, tamano):
+    bloque = []
+    for elemento in iterable:
+        bloque.append(elemento)
+        if len(bloque) == tamano:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+def resultados(escenarios, tam_bloque=TAM_BLOQUE):
+    # Un dict por escenario, en el orden de entrada
+    for bloque in en_bloques(escenarios, tam_bloque):
+        validos = [(n, escenario) for n, _, escenario in bloque if not isinstance(escenario, ErrorEntrada)]
+        filas = {}
+        if validos:
+            with np.errstate(over="ignore", invalid="ignore"):  # los no finitos se tratan por fila
+                resultado = cartera.calcular_cartera(columnas_escenarios([e for _, e in validos]))
+            columnas = resultado.como_dict()
+            finitas = np.logical_and.reduce(
+                [np.isfinite(v) for v in columnas.values() if v.dtype.kind == "f"]).tolist()
+            columnas = {nombre: valores.tolist() for nombre, valores in columnas.items()}
+            for j, (n, _) in enumerate(validos):
+                filas[n] = ({nombre: valores[j] for nombre, valores in columnas.items()} if finitas[j]
+                            else ErrorEntrada("Con estos datos el resultado no es un número finito"))
+
+        for n, identificador, escenario in bloque:
+            salida = {"linea": n}
+            if identificador is not None:
+                salida["id"] = identificador
+            fila = escenario if isinstance(escenario, ErrorEntrada) else filas[n]
+            if isinstance(fila, ErrorEntrada):
+                salida["error"] = str(fila)
+            else:
+                salida.update(fila)
+            yield salida
+
+
+def procesar(entrada, salida, tam_bloque=TAM_BLOQUE):
+    # Devuelve (filas, errores)
+    filas = errores = 0
+    for resultado in resultados(leer_escenarios(leer_lineas(entrada)), tam_bloque):
+        salida.write(_codificador.encode(resultado) + "\n")
+        filas += 1
+        errores += "error" in resultado
+    return filas, errores
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Calcula escenarios SRG de un fichero JSONL")
+    parser.add_argument("entrada", nargs="?", default="-", help="fichero JSONL (por defecto, stdin)")
+    parser.add_argument("-o", "--salida", default="-", help="fichero JSONL de resultados (por defecto, stdout)")
+    parser.add_argument("--tam-bloque", type=int, default=TAM_BLOQUE)
+    args = parser.parse_args(argumentos)
+
+    entrada = sys.stdin if args.entrada == "-" else open(args.entrada, encoding="utf-8")
+    salida = sys.stdout if args.salida == "-" else open(args.salida, "w", encoding="utf-8")
+    inicio = time.perf_counter()
+    try:
+        filas, errores = procesar(entrada, salida, args.tam_bloque)
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if salida is not sys.stdout:
+            salida.close()
+    segundos = time.perf_counter() - inicio
+    print(f"{filas:,} filas ({errores:,} con error) en {segundos:.2f} s · "
+          f"{filas / segundos if segundos > 0 else 0:,.0f} filas/s", file=sys.stderr)
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+# ============================================================
+# LOTES SRG — informes de toda una cartera en un ZIP
+# ============================================================
+#
+# Calcula la cartera de una vez con el motor vectorizado y reparte la
+# maquetación de los PDF entre procesos. Los informes se escriben en el
+# ZIP en cuanto llegan y en el orden de la tabla: en memoria solo están
+# los que aún se están generando (una ventana acotada por proceso).
+
+import os
+import re
+import sys
+import tempfile
+import time
+import weakref
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from . import calculo, cartera, informes_pdf
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TIPOS_INFORME = ("cliente", "agente")
+PENDIENTES_POR_TRABAJADOR = 4
+
+# Procesos como máximo cuando el lote se lanza desde la app: salen del servidor de
+# Streamlit, que atiende a la vez al resto de sesiones
+MAX_TRABAJADORES_APP = int(os.environ.get("SRG_TRABAJADORES_LOTE", "2"))
+
+
+@dataclass
+class ResultadoLote:
+    n_clientes: int
+    n_informes: int
+    segundos: float
+    informes_por_segundo: float
+    rss_max_mb: float              # pico del proceso principal durante el lote (muestreado)
+    rss_max_trabajadores_mb: float  # pico del mayor trabajador de este lote (0 sin trabajadores,
+                                    # NaN sin el módulo resource)
+    bytes_zip: int
+
+
+def _rss_max_mb():
+    # Pico del proceso actual; ru_maxrss está en KB en Linux y en bytes en macOS
+    if resource is None:
+        return float("nan")
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maximo / 1024 ** 2 if sys.platform == "darwin" else maximo / 1024
+
+
+def _texto(tabla, nombre, n):
+    nombres = getattr(getattr(tabla, "dtype", None), "names", None)
+    presente = nombre in nombres if nombres is not None else nombre in tabla
+    if not presente:
+        return [""] * n
+    return ["" if v is None or v != v else str(v) for v in np.asarray(tabla[nombre], dtype=object)]
+
+
+def _nombre_archivo(indice, nombre, tipo):
+    limpio = re.sub(r"[^\w-]+", "_", nombre).strip("_") or "cliente"
+    return f"{indice + 1:05d}_{limpio}_{tipo}.pdf"
+
+
+def tareas_cartera(tabla, fecha=None):
+    # Devuelve (n, tareas): una tarea por cliente (índice, contexto del informe, clave del plan),
+    # creadas a medida que se piden
+    resultado = cartera.calcular_cartera(tabla)
+    n = len(resultado)
+    nombres, telefonos, emails = (_texto(tabla, c, n) for c in ("nombre", "telefono", "email"))
+    por_objetivo = cartera.codigos(cartera.columna(tabla, "modo_nivel_vida", n), calculo.MODOS_NIVEL_VIDA) == 0
+    nivel_vida = np.where(por_objetivo, resultado.nivel_vida_futuro_objetivo, resultado.nivel_vida_futuro_gastos)
+    total = resultado.total_aportado
+    rentabilidad_neta = np.where(total > 0, (resultado.capital_final / np.where(total > 0, total, 1) - 1) * 100, 0.0)
+    fecha = fecha or time.strftime("%d/%m/%Y")
+    return n, _tareas(resultado, nombres, telefonos, emails, nivel_vida, rentabilidad_neta, fecha)
+
+
+def _tareas(resultado, nombres, telefonos, emails, nivel_vida, rentabilidad_neta, fecha):
+    for i in range(len(resultado)):
+        contexto = {
+            "nombre_cliente": nombres[i] or f"Cliente {i + 1}",
+            "telefono": telefonos[i],
+            "email": emails[i],
+            "fecha": fecha,
+            "pension_futura": float(resultado.pension_futura[i]),
+            "nivel_vida": float(nivel_vida[i]),
+            "brecha": float(resultado.brecha[i]),
+            "cuota_recomendada": float(resultado.cuota_aplicada[i]),
+            "capital_final": float(resultado.capital_final[i]),
+            "capital_objetivo": float(resultado.capital_objetivo[i]),
+            "capital_ajustado_final": float(resultado.capital_ajustado_final[i]),
+            "rentabilidad_neta": float(rentabilidad_neta[i]),
+            "rentabilidad": float(resultado.rentabilidad[i]),
+            "inflacion_media": float(resultado.inflacion_media[i]),
+        }
+        clave_plan = (float(resultado.cuota_aplicada[i]), float(resultado.aportacion_inicial[i]),
+                      float(resultado.rentabilidad[i]), float(resultado.inflacion_media[i]),
+                      int(resultado.anos_hasta_jub[i]) * 12)
+        yield i, contexto, clave_plan
+
+
+def informes_cliente(tarea, tipos=TIPOS_INFORME):
+    # Se ejecuta en el trabajador: devuelve [(nombre en el ZIP, bytes del PDF), ...]
+    indice, contexto, clave_plan = tarea
+    plan = calculo.simular_plan(*clave_plan)
+    return [(_nombre_archivo(indice, contexto["nombre_cliente"], tipo), informes_pdf.informe_pdf(tipo, contexto, plan))
+            for tipo in tipos]
+
+
+def _rss_actual_mb():
+    # Memoria residente ahora mismo (Linux); en otros sistemas, el pico del proceso
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (OSError, ValueError, AttributeError):
+        return _rss_max_mb()
+
+
+def _informes_trabajador(tarea, tipos):
+    # Como informes_cliente, más el pico de memoria del trabajador. Los trabajadores se
+    # crean con cada lote, así que es el pico de este lote (RUSAGE_CHILDREN acumularía
+    # todos los hijos que haya tenido el proceso)
+    return informes_cliente(tarea, tipos), _rss_max_mb()
+
+
+def generar_zip(tabla, destino, tipos=TIPOS_INFORME, trabajadores=None, progreso=None, fecha=None,
+                compresion=zipfile.ZIP_STORED):
+    # destino: ruta o fichero binario. progreso(hechos, total, informes_por_segundo) tras cada cliente.
+    # Los PDF ya van comprimidos, así que por defecto se guardan sin volver a comprimir.
+    total, tareas = tareas_cartera(tabla, fecha)
+    trabajadores = trabajadores or os.cpu_count() or 1
+    inicio = time.perf_counter()
+    n_informes = 0
+    rss_principal = _rss_actual_mb()
+    rss_trabajadores = float("nan") if resource is None else 0.0
+
+    def escribir(archivo, entradas, hechos):
+        nonlocal n_informes, rss_principal
+        for nombre, datos in entradas:
+            archivo.writestr(zipfile.ZipInfo(nombre, time.localtime()[:6]), datos, compress_type=compresion)
+        n_informes += len(entradas)
+        rss_principal = max(rss_principal, _rss_actual_mb())
+        if progreso is not None:
+            progreso(hechos, total, n_informes / max(time.perf_counter() - inicio, 1e-9))
+
+    with zipfile.ZipFile(destino, "w", compression=compresion) as archivo:
+        if trabajadores == 1:
+            for hechos, tarea in enumerate(tareas, 1):
+                escribir(archivo, informes_cliente(tarea, tipos), hechos)
+        else:
+            with ProcessPoolExecutor(max_workers=trabajadores) as pool:
+                # Ventana acotada: se envían tareas a medida que se escriben los resultados
+                pendientes = deque()
+                siguientes = iter(tareas)
+                for tarea in siguientes:
+                    pendientes.append(pool.submit(_informes_trabajador, tarea, tipos))
+                    if len(pendientes) >= trabajadores * PENDIENTES_POR_TRABAJADOR:
+                        break
+                hechos = 0
+                while pendientes:
+                    entradas, rss = pendientes.popleft().result()
+                    rss_trabajadores = max(rss_trabajadores, rss)
+                    siguiente = next(siguientes, None)
+                    if siguiente is not None:
+                        pendientes.append(pool.submit(_informes_trabajador, siguiente, tipos))
+                    hechos += 1
+                    escribir(archivo, entradas, hechos)
+
+    segundos = time.perf_counter() - inicio
+    bytes_zip = os.path.getsize(destino) if isinstance(destino, (str, os.PathLike)) else destino.tell()
+    return ResultadoLote(
+        n_clientes=total,
+        n_informes=n_informes,
+        segundos=segundos,
+        informes_por_segundo=n_informes / segundos if segundos > 0 else 0.0,
+        rss_max_mb=rss_principal,
+        rss_max_trabajadores_mb=rss_trabajadores,
+        bytes_zip=bytes_zip,
+    )
+
+
+def trabajadores_app():
+    return max(1, min(os.cpu_count() or 1, MAX_TRABAJADORES_APP))
+
+
+# ============================================================
+# 🟦 ZIP temporal de una sesión
+# ============================================================
+
+def _borrar_fichero(ruta):
+    if os.path.exists(ruta):
+        os.unlink(ruta)
+
+
+class ZipTemporal:
+    # El ZIP de un lote en disco, para guardarlo en st.session_state y descargarlo las veces
+    # que haga falta. El fichero se borra con borrar() (al generar el siguiente lote) o, si no,
+    # cuando el objeto deja de usarse (al cerrarse la sesión) o termina el proceso.
+    def __init__(self):
+        fichero = tempfile.NamedTemporaryFile(suffix=".zip", delete=False)
+        fichero.close()
+        self.ruta = fichero.name
+        self.resultado = None
+        self.borrar = weakref.finalize(self, _borrar_fichero, self.ruta)
+
+    def existe(self):
+        return os.path.exists(self.ruta)
+
+    def leer(self):
+        with open(self.ruta, "rb") as fichero:
+            return fichero.read()
@@ -0,0 +1,103 @@
+# ============================================================
+# MONTE CARLO SRG — rentabilidad e inflación aleatorias
+# ============================================================
+#
+# Simula N trayectorias mensuales (trayectorias × meses) del mismo plan
+# que calculo.simular_plan, con rentabilidad e inflación normales
+# alrededor de sus medias. Las trayectorias se procesan por bloques para
+# que la memoria no dependa del número total de trayectorias.
+
+from dataclasses import dataclass
+
+import numpy as np
+
+PERCENTILES = (5, 25, 50, 75, 95)
+TAM_BLOQUE = 5000
+
+
+@dataclass
+class ResultadoMonteCarlo:
+    n_trayectorias: int
+    percentiles: tuple
+    meses: np.ndarray          # meses de control (cada año y el último)
+    bandas_nominal: np.ndarray  # percentiles × meses de control
+    bandas_real: np.ndarray
+    final_nominal: np.ndarray  # percentiles del capital final
+    final_real: np.ndarray
+    prob_objetivo: float       # P(capital real final ≥ capital objetivo)
+    prob_objetivo_nominal: float
+
+    def percentil(self, p, real=False):
+        fila = self.percentiles.index(p)
+        return (self.final_real if real else self.final_nominal)[fila]
+
+
+def meses_control(n_meses):
+    meses = np.arange(12, n_meses + 1, 12)
+    if len(meses) == 0 or meses[-1] != n_meses:
+        meses = np.append(meses, n_meses)
+    return meses
+
+
+def _bloque(rng, n, n_meses, cuota, aportacion, r, vol_r, inf, vol_inf, indices, dtype):
+    # Rendimientos e inflación mensuales: n trayectorias × n_meses
+    rend = rng.standard_normal((n, n_meses), dtype=dtype)
+    rend *= dtype(vol_r)
+    rend += dtype(r)
+    np.log1p(rend, out=rend)
+    np.cumsum(rend, axis=1, out=rend)
+    crecimiento = np.exp(rend, out=rend)  # G_m = Π(1 + r_k)
+
+    # capital_m = G_m · (A + cuota · Σ_{k≤m} 1/G_k)
+    inversa = np.reciprocal(crecimiento)
+    np.cumsum(inversa, axis=1, out=inversa)
+    capital = crecimiento[:, indices] * (dtype(aportacion) + dtype(cuota) * inversa[:, indices])
+
+    infl = rng.standard_normal((n, n_meses), dtype=dtype)
+    infl *= dtype(vol_inf)
+    infl += dtype(inf)
+    np.log1p(infl, out=infl)
+    np.cumsum(infl, axis=1, out=infl)
+    capital_real = capital / np.exp(infl[:, indices])
+    return capital, capital_real
+
+
+def simular_montecarlo(cuota, aportacion_inicial, rentabilidad_anual, inflacion_anual, n_meses,
+                       capital_objetivo=0.0, volatilidad_anual=8.0, volatilidad_inflacion=1.0,
+                       n_trayectorias=10_000, tam_bloque=TAM_BLOQUE, percentiles=PERCENTILES,
+                       semilla=None, float32=False):
+    # Las medias mensuales coinciden con las de simular_plan (anual / 12);
+    # las volatilidades anuales se escalan por √12.
+    dtype = np.float32 if float32 else np.float64
+    n_meses = int(n_meses)
+    r = rentabilidad_anual / 100 / 12
+    inf = inflacion_anual / 100 / 12
+    vol_r = volatilidad_anual / 100 / np.sqrt(12)
+    vol_inf = volatilidad_inflacion / 100 / np.sqrt(12)
+
+    meses = meses_control(n_meses)
+    indices = meses - 1
+    nominal = np.empty((n_trayectorias, len(meses)), dtype=dtype)
+    real = np.empty((n_trayectorias, len(meses)), dtype=dtype)
+
+    rng = np.random.default_rng(semilla)
+    for inicio in range(0, n_trayectorias, tam_bloque):
+        n = min(tam_bloque, n_trayectorias - inicio)
+        nominal[inicio:inicio + n], real[inicio:inicio + n] = _bloque(
+            rng, n, n_meses, cuota, aportacion_inicial, r, vol_r, inf, vol_inf, indices, dtype
+        )
+
+    bandas_nominal = np.percentile(nominal, percentiles, axis=0)
+    bandas_real = np.percentile(real, percentiles, axis=0)
+
+    return ResultadoMonteCarlo(
+        n_trayectorias=n_trayectorias,
+        percentiles=tuple(percentiles),
+        meses=meses,
+        bandas_nominal=bandas_nominal,
+        bandas_real=bandas_real,
+        final_nominal=bandas_nominal[:, -1],
+        final_real=bandas_real[:, -1],
+        prob_objetivo=float(np.mean(real[:, -1] >= capital_objetivo)),
+        prob_objetivo_nominal=float(np.mean(nominal[:, -1] >= capital_objetivo)),
+    )
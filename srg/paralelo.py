@@ -0,0 +1,136 @@
+# ============================================================
+# PARALELO SRG — cartera repartida entre procesos
+# ============================================================
+#
+# Para carteras muy grandes el motor vectorizado (srg.cartera) satura un
+# núcleo. Aquí la tabla se pasa a columnas NumPy en memoria compartida,
+# se divide en trozos de tam_trozo clientes y cada proceso calcula sus
+# trozos con cartera.calcular_cartera leyendo directamente de esa
+# memoria. Los resultados se escriben también en memoria compartida, en
+# la posición de cada cliente, así que salen en el orden de entrada sin
+# copiar ni serializar los arrays entre procesos.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from . import calculo, cartera
+
+TAM_TROZO = 50_000
+
+# Columnas de texto: se pasan como códigos enteros (índice en la lista de opciones)
+OPCIONES_TEXTO = {
+    "tipo_jubilacion": calculo.TIPOS_JUBILACION,
+    "modo_nivel_vida": calculo.MODOS_NIVEL_VIDA,
+    "modo_brecha": calculo.MODOS_BRECHA,
+}
+CAMPOS_ESCENARIO = [f.name for f in fields(calculo.Escenario)]
+CAMPOS_RESULTADO = [f.name for f in fields(cartera.ResultadoCartera)]
+
+
+# ============================================================
+# 🟦 Columnas en memoria compartida
+# ============================================================
+
+class BloqueCompartido:
+    # Varias columnas de n elementos en un único segmento de memoria compartida
+    def __init__(self, campos, n, nombre=None):
+        self.campos = [(c, np.dtype(t).str) for c, t in campos]
+        self.n = n
+        self.desplazamientos = []
+        tamano = 0
+        for _, dtype in self.campos:
+            self.desplazamientos.append(tamano)
+            tamano += -(-n * np.dtype(dtype).itemsize // 8) * 8  # alineado a 8 bytes
+        if nombre is None:
+            self.memoria = shared_memory.SharedMemory(create=True, size=max(tamano, 1))
+        else:
+            self.memoria = shared_memory.SharedMemory(name=nombre)
+        self.columnas = {
+            campo: np.ndarray((n,), dtype=dtype, buffer=self.memoria.buf, offset=desplazamiento)
+            for (campo, dtype), desplazamiento in zip(self.campos, self.desplazamientos)
+        }
+
+    def descriptor(self):
+        # Lo necesario para abrir el bloque desde otro proceso
+        return self.campos, self.n, self.memoria.name
+
+    @classmethod
+    def abrir(cls, descriptor):
+        campos, n, nombre = descriptor
+        return cls(campos, n, nombre)
+
+    def cerrar(self, liberar=False):
+        self.columnas = {}
+        self.memoria.close()
+        if liberar:
+            self.memoria.unlink()
+
+
+def columnas_entrada(tabla):
+    # Columnas numéricas presentes en la tabla (las de texto, como códigos enteros)
+    edad_actual = cartera.columna(tabla, "edad_actual")
+    n = len(edad_actual)
+    columnas = {}
+    for nombre in CAMPOS_ESCENARIO:
+        try:
+            valores = cartera.columna(tabla, nombre)
+        except KeyError:
+            continue
+        if nombre in OPCIONES_TEXTO:
+            valores = cartera.codigos(valores, OPCIONES_TEXTO[nombre])
+        elif valores.dtype.kind not in "iufb":
+            valores = np.asarray(valores, dtype=float)  # None → NaN en las columnas opcionales
+        columnas[nombre] = valores
+    return n, columnas
+
+
+# ============================================================
+# 🟦 Trabajadores
+# ============================================================
+
+_entrada = None
+_salida = None
+
+
+def _iniciar(descriptor_entrada, descriptor_salida):
+    global _entrada, _salida
+    _entrada = BloqueCompartido.abrir(descriptor_entrada)
+    _salida = BloqueCompartido.abrir(descriptor_salida)
+
+
+def _calcular_trozo(inicio, fin):
+    # Lee los clientes [inicio, fin) de la entrada compartida y escribe sus resultados en la salida
+    trozo = {nombre: valores[inicio:fin] for nombre, valores in _entrada.columnas.items()}
+    resultado = cartera.calcular_cartera(trozo)
+    for nombre in CAMPOS_RESULTADO:
+        _salida.columnas[nombre][inicio:fin] = getattr(resultado, nombre)
+    return fin - inicio
+
+
+def calcular_cartera_paralelo(tabla, trabajadores=None, tam_trozo=TAM_TROZO):
+    # Mismo resultado que cartera.calcular_cartera(tabla), repartido entre procesos
+    n, columnas = columnas_entrada(tabla)
+    trabajadores = trabajadores or os.cpu_count() or 1
+    if trabajadores == 1 or n <= tam_trozo:
+        return cartera.calcular_cartera(columnas)
+
+    # Tipos de cada columna de salida: los de un cliente de muestra
+    muestra = cartera.calcular_cartera({nombre: valores[:1] for nombre, valores in columnas.items()})
+    entrada = BloqueCompartido([(nombre, valores.dtype) for nombre, valores in columnas.items()], n)
+    salida = BloqueCompartido([(nombre, getattr(muestra, nombre).dtype) for nombre in CAMPOS_RESULTADO], n)
+    try:
+        for nombre, valores in columnas.items():
+            entrada.columnas[nombre][:] = valores
+        trozos = [(inicio, min(inicio + tam_trozo, n)) for inicio in range(0, n, tam_trozo)]
+        with ProcessPoolExecutor(max_workers=min(trabajadores, len(trozos)), initializer=_iniciar,
+                                 initargs=(entrada.descriptor(), salida.descriptor())) as pool:
+            for hecho in [pool.submit(_calcular_trozo, inicio, fin) for inicio, fin in trozos]:
+                hecho.result()
+        return cartera.ResultadoCartera(**{nombre: salida.columnas[nombre].copy() for nombre in CAMPOS_RESULTADO})
+    finally:
+        entrada.cerrar(liberar=True)
+        salida.cerrar(liberar=True)
@@ -0,0 +1,96 @@
+# ============================================================
+# RECURSOS SRG — CSS, fuentes e imágenes preparados una vez
+# ============================================================
+#
+# Los estilos globales viven en estilos/srg.css. Aquí se minifican y se
+# les añade la fuente Dancing Script de fonts/ incrustada en base64 (sin
+# pedirla a Google Fonts).
+#
+# Las imágenes del repositorio pesan cientos de KB (logo.png es de 1024 px
+# y mapaSRG copia.png pasa de 1 MB): imagen_reducida() las reduce al lado
+# con que se usan y las recomprime una sola vez por proceso, también en
+# los procesos de lote.py, donde no hay Streamlit. imagen_data_uri() da
+# el resultado en base64 para incrustarlo en HTML.
+#
+# Las funciones son puras y deterministas; la app las envuelve con
+# st.cache_resource para ejecutarlas una sola vez por proceso.
+
+import base64
+import io
+import json
+from functools import lru_cache
+from pathlib import Path
+
+from . import informes
+
+RAIZ = Path(__file__).resolve().parent.parent
+CARPETA_FUENTES = RAIZ / "fonts"
+RUTA_CSS = RAIZ / "estilos" / "srg.css"
+RUTA_LOGO = RAIZ / "logo.png"
+RUTA_MAPA = RAIZ / "mapaSRG copia.png"
+
+# nombre → (fichero, lado máximo en px con que se usa)
+IMAGENES = {
+    "logo": (RUTA_LOGO, 160),
+    "mapa": (RUTA_MAPA, 1200),
+}
+
+# (familia CSS, fichero en fonts/, rango de pesos de la fuente variable)
+FUENTES_WEB = (("Dancing Script", "DancingScript-VariableFont_wght.ttf", "400 700"),)
+
+ID_ESTILOS = "srg-estilos"
+
+
+def fuente_css(familia, fichero, pesos):
+    # Regla @font-face con la fuente incrustada (vacía si el fichero no está)
+    ruta = CARPETA_FUENTES / fichero
+    if not ruta.exists():
+        return ""
+    datos = base64.b64encode(ruta.read_bytes()).decode("ascii")
+    return (f"@font-face{{font-family:'{familia}';font-weight:{pesos};font-display:swap;"
+            f"src:url(data:font/ttf;base64,{datos}) format('truetype')}}")
+
+
+def css_global():
+    # Fuentes locales + estilos/srg.css, minificado
+    fuentes = "".join(fuente_css(*fuente) for fuente in FUENTES_WEB)
+    return fuentes + informes.minificar_css(RUTA_CSS.read_text(encoding="utf-8"))
+
+
+@lru_cache(maxsize=None)
+def imagen_reducida(nombre, formato="WEBP", calidad=85):
+    # Bytes de la imagen reducida a su lado máximo y recomprimida (None si no existe)
+    ruta, lado = IMAGENES[nombre]
+    if not ruta.exists():
+        return None
+    from PIL import Image
+
+    imagen = Image.open(ruta)
+    imagen.thumbnail((lado, lado))
+    salida = io.BytesIO()
+    if formato.upper() == "PNG":
+        imagen.save(salida, "PNG", optimize=True)
+    else:
+        if formato.upper() == "JPEG":
+            imagen = imagen.convert("RGB")
+        imagen.save(salida, formato, quality=calidad, method=6 if formato.upper() == "WEBP" else 0)
+    return salida.getvalue()
+
+
+def imagen_data_uri(nombre, formato="WEBP", calidad=85):
+    datos = imagen_reducida(nombre, formato, calidad)
+    if datos is None:
+        return None
+    tipo = "jpeg" if formato.upper() == "JPEG" else formato.lower()
+    return f"data:image/{tipo};base64,{base64.b64encode(datos).decode('ascii')}"
+
+
+def inyector_css(css, identificador=ID_ESTILOS):
+    # <script> que añade el CSS al <head> de la página una sola vez. El <style>
+    # queda fuera del árbol de Streamlit, así que no hay que reenviarlo en cada rerun.
+    texto = json.dumps(css).replace("</", "<\\/")
+    return (f"<script>(function(){{var d=window.parent.document;"
+            f"if(d.getElementById('{identificador}'))return;"
+            f"var s=d.createElement('style');s.id='{identificador}';s.textContent={texto};"
+            f"d.head.appendChild(s);}})();</script>")
+
@@ -0,0 +1,67 @@
+# ============================================================
+# SENSIBILIDAD SRG — rejilla rentabilidad × inflación × edad
+# ============================================================
+#
+# Evalúa brecha, capital objetivo y cuotas de un mismo escenario sobre
+# todas las combinaciones de rentabilidad, inflación y edad prevista de
+# jubilación. La rejilla se expande por broadcasting y se calcula en una
+# sola llamada al motor de cartera.
+
+from dataclasses import asdict, dataclass
+
+import numpy as np
+
+from . import cartera
+
+
+@dataclass
+class ResultadoSensibilidad:
+    rentabilidades: np.ndarray
+    inflaciones: np.ndarray
+    edades: np.ndarray
+    # Arrays de forma (rentabilidades, inflaciones, edades)
+    pension_futura: np.ndarray
+    brecha: np.ndarray
+    capital_objetivo: np.ndarray
+    cuota_recomendada: np.ndarray
+    cuota_ajustada: np.ndarray
+    capital_final: np.ndarray
+
+
+def rejilla_sensibilidad(escenario, rentabilidades, inflaciones, edades_jubilacion):
+    rentabilidades = np.asarray(rentabilidades, dtype=float)
+    inflaciones = np.asarray(inflaciones, dtype=float)
+    edades = np.asarray(edades_jubilacion)
+
+    rent, infl, edad = np.broadcast_arrays(
+        rentabilidades[:, None, None], inflaciones[None, :, None], edades[None, None, :]
+    )
+    forma = rent.shape
+
+    # El resto de datos del escenario es común a toda la rejilla
+    tabla = {
+        nombre: np.broadcast_to(np.asarray(np.nan if valor is None else valor), forma).ravel()
+        for nombre, valor in asdict(escenario).items()
+    }
+    tabla["rentabilidad"] = rent.ravel()
+    tabla["inflacion"] = infl.ravel()
+    tabla["inflacion_media"] = infl.ravel()
+    tabla["edad_prevista_jub"] = edad.ravel()
+    # Igual que en la app: no se puede cotizar más años de los que faltan hasta jubilarse
+    tabla["anos_futuros"] = np.minimum(
+        tabla["anos_futuros"], np.maximum(0, tabla["edad_prevista_jub"] - escenario.edad_actual)
+    )
+
+    resultado = cartera.calcular_cartera(tabla)
+
+    return ResultadoSensibilidad(
+        rentabilidades=rentabilidades,
+        inflaciones=inflaciones,
+        edades=edades,
+        pension_futura=resultado.pension_futura.reshape(forma),
+        brecha=resultado.brecha.reshape(forma),
+        capital_objetivo=resultado.capital_objetivo.reshape(forma),
+        cuota_recomendada=resultado.cuota_recomendada.reshape(forma),
+        cuota_ajustada=resultado.cuota_ajustada.reshape(forma),
+        capital_final=resultado.capital_final.reshape(forma),
+    )
@@ -0,0 +1,140 @@
+# ============================================================
+# SESIÓN SRG — resultado compacto y presupuesto de memoria
+# ============================================================
+#
+# Cada usuario conectado guarda en st.session_state el resultado de su
+# simulación. En lugar de un DataFrame (seis columnas con nombres largos,
+# índice y float64) se guarda un ResultadoSesion: un array estructurado
+# float32 con una fila por mes y los totales como floats. Los DataFrame
+# se construyen solo para mostrarlos.
+#
+# tamano() estima los bytes que ocupa un valor del estado y
+# aplicar_presupuesto() descarta entradas regenerables cuando una sesión
+# supera su presupuesto (SRG_PRESUPUESTO_SESION_KB, 256 KB por defecto).
+# Los ficheros de st.file_uploader no cuentan para el presupuesto: los
+# guarda Streamlit mientras siguen en el widget, y descartar otras claves
+# no los libera.
+
+import io
+import logging
+import os
+import sys
+from dataclasses import dataclass, fields, is_dataclass
+
+import numpy as np
+
+logger = logging.getLogger("srg.sesion")
+
+PRESUPUESTO_SESION_KB = int(os.environ.get("SRG_PRESUPUESTO_SESION_KB", "256"))
+
+DTYPE_FILAS = np.dtype([
+    ("mes", np.int32),
+    ("capital_inicio", np.float32),
+    ("intereses", np.float32),
+    ("capital", np.float32),
+    ("capital_ajustado", np.float32),
+])
+
+
+@dataclass(slots=True)
+class ResultadoSesion:
+    cuota: float
+    aportacion_inicial: float
+    filas: np.ndarray  # DTYPE_FILAS, una fila por mes
+    capital_final: float
+    total_aportado: float
+    beneficio_intereses: float
+    capital_ajustado_final: float
+    rentabilidad_neta: float
+
+    @property
+    def nbytes(self):
+        return self.filas.nbytes + 7 * sys.getsizeof(0.0)
+
+    def columnas(self):
+        # Columnas de la tabla mensual, con los mismos nombres que la tabla de la app
+        return {
+            "Mes": self.filas["mes"],
+            "Aportación mensual (€)": np.full(len(self.filas), self.cuota, dtype=np.float32),
+            "Capital inicio (€)": self.filas["capital_inicio"],
+            "Intereses ganados (€)": self.filas["intereses"],
+            "Capital final (€)": self.filas["capital"],
+            "Capital ajustado por inflación (€)": self.filas["capital_ajustado"],
+        }
+
+
+def compactar_plan(plan):
+    # PlanAhorro → ResultadoSesion (los totales se conservan en doble precisión)
+    filas = np.empty(len(plan.meses), dtype=DTYPE_FILAS)
+    filas["mes"] = plan.meses
+    filas["capital_inicio"] = plan.capital_inicio
+    filas["intereses"] = plan.intereses
+    filas["capital"] = plan.capital
+    filas["capital_ajustado"] = plan.capital_ajustado
+    return ResultadoSesion(
+        cuota=float(plan.cuota),
+        aportacion_inicial=float(plan.aportacion_inicial),
+        filas=filas,
+        capital_final=float(plan.capital_final),
+        total_aportado=float(plan.total_aportado),
+        beneficio_intereses=float(plan.beneficio_intereses),
+        capital_ajustado_final=float(plan.capital_ajustado_final),
+        rentabilidad_neta=float(plan.rentabilidad_neta),
+    )
+
+
+# ============================================================
+# 🟦 Medida y presupuesto del estado de sesión
+# ============================================================
+
+def tamano(valor, _vistos=None):
+    # Bytes aproximados de un valor, contando su contenido (arrays, ficheros subidos, DataFrames...)
+    vistos = set() if _vistos is None else _vistos
+    if id(valor) in vistos:
+        return 0
+    vistos.add(id(valor))
+
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, (str, bytes, bytearray, int, float, bool)) or valor is None:
+        return sys.getsizeof(valor)
+    if isinstance(valor, io.BytesIO):  # st.file_uploader devuelve un BytesIO
+        return sys.getsizeof(valor) + valor.getbuffer().nbytes
+    if hasattr(valor, "memory_usage") and hasattr(valor, "columns"):  # DataFrame de pandas
+        return int(valor.memory_usage(index=True, deep=True).sum())
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(tamano(k, vistos) + tamano(v, vistos) for k, v in valor.items())
+    if isinstance(valor, (list, tuple, set, frozenset)):
+        return sys.getsizeof(valor) + sum(tamano(v, vistos) for v in valor)
+    if is_dataclass(valor) and not isinstance(valor, type):
+        return sys.getsizeof(valor) + sum(tamano(getattr(valor, f.name), vistos) for f in fields(valor))
+    if hasattr(valor, "__dict__") and not isinstance(valor, type):  # p. ej. dependencias.Grafo
+        return sys.getsizeof(valor) + tamano(vars(valor), vistos)
+    return sys.getsizeof(valor)
+
+
+def bytes_por_clave(estado):
+    return {str(clave): tamano(valor) for clave, valor in estado.items()}
+
+
+def es_fichero_subido(valor):
+    return isinstance(valor, io.BytesIO)  # UploadedFile hereda de BytesIO
+
+
+def aplicar_presupuesto(estado, descartables, presupuesto_kb=None):
+    # Si el estado (sin los ficheros subidos) supera el presupuesto, borra las claves
+    # descartables (las más grandes primero) hasta quedar por debajo.
+    # Devuelve (bytes totales, claves borradas).
+    presupuesto = (PRESUPUESTO_SESION_KB if presupuesto_kb is None else presupuesto_kb) * 1024
+    por_clave = bytes_por_clave({clave: valor for clave, valor in estado.items() if not es_fichero_subido(valor)})
+    total = sum(por_clave.values())
+    borradas = []
+    for clave in sorted((c for c in descartables if c in por_clave), key=por_clave.get, reverse=True):
+        if total <= presupuesto:
+            break
+        del estado[clave]
+        total -= por_clave[clave]
+        borradas.append(clave)
+    if total > presupuesto:
+        logger.warning("La sesión ocupa %.1f KB y supera el presupuesto de %d KB", total / 1024, presupuesto // 1024)
+    return total, borradas
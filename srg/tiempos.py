@@ -0,0 +1,121 @@
+# ============================================================
+# TIEMPOS SRG — cronómetro por bloque del script
+# ============================================================
+#
+# Un Cronometro por rerun: marca() cierra el tramo anterior del script y
+# abre el siguiente (BLOQUE 1, BLOQUE 2...), y envolver() mide cada
+# llamada a una función caliente (simulación, cuota, informes). Al final
+# se emite una línea de log JSON con los totales del rerun.
+#
+# En un rerun solo de un fragmento (st.fragment) no se ejecuta ni el
+# principio ni el final del script: abrir_fragmento() reutiliza el
+# cronómetro del último rerun completo, que ya está finalizado, y lo
+# reinicia para medir solo el fragmento, que lo finaliza al terminar.
+#
+# Desactivado se usa INACTIVO: marca() no hace nada y envolver() devuelve
+# la función tal cual, así que no se añade ningún envoltorio.
+
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+
+def logger_srg(nombre):
+    # Logger INFO con su propio manejador: Streamlit no configura el logger raíz y sin
+    # esto las líneas INFO se perderían. Lo usa también srg.dependencias
+    logger = logging.getLogger(nombre)
+    if not logger.handlers:
+        manejador = logging.StreamHandler()
+        manejador.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+        logger.addHandler(manejador)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+logger = logger_srg("srg.tiempos")
+
+
+class Cronometro:
+    activo = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self.inicio = time.perf_counter()
+        self._tramo = None
+        self._inicio_tramo = self.inicio
+        self.bloques = {}  # tramos del script, en orden
+        self.llamadas = defaultdict(lambda: [0, 0.0])  # nombre → [llamadas, segundos]
+        self.finalizado = False
+
+    def marca(self, nombre):
+        ahora = time.perf_counter()
+        if self._tramo is not None:
+            self.bloques[self._tramo] = self.bloques.get(self._tramo, 0.0) + ahora - self._inicio_tramo
+        self._tramo, self._inicio_tramo = nombre, ahora
+
+    def envolver(self, nombre, funcion):
+        def cronometrada(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                duracion = time.perf_counter() - inicio
+                with self._lock:
+                    medida = self.llamadas[nombre]
+                    medida[0] += 1
+                    medida[1] += duracion
+        cronometrada.__name__ = getattr(funcion, "__name__", nombre)
+        cronometrada.__wrapped__ = funcion
+        return cronometrada
+
+    def finalizar(self, **extra):
+        # Cierra el último tramo y devuelve el resumen del rerun (también lo escribe en el log)
+        self.marca(None)
+        resumen = {
+            "evento": "rerun_srg",
+            "total_ms": round((time.perf_counter() - self.inicio) * 1000, 3),
+            "bloques_ms": {k: round(v * 1000, 3) for k, v in self.bloques.items()},
+            "llamadas": {k: {"n": n, "ms": round(s * 1000, 3)} for k, (n, s) in self.llamadas.items()},
+            **extra,
+        }
+        logger.info(json.dumps(resumen, ensure_ascii=False))
+        self.finalizado = True
+        return resumen
+
+    def abrir_fragmento(self, nombre):
+        # Devuelve True si es un rerun solo del fragmento: entonces el fragmento debe
+        # llamar a finalizar() al terminar. Dentro de un rerun completo no hace nada.
+        if not self.finalizado:
+            return False
+        self._reiniciar()
+        self.marca(nombre)
+        return True
+
+
+class _Inactivo:
+    activo = False
+
+    def marca(self, nombre):
+        pass
+
+    def envolver(self, nombre, funcion):
+        return funcion
+
+    def abrir_fragmento(self, nombre):
+        return False
+
+    def finalizar(self, **extra):
+        return None
+
+
+INACTIVO = _Inactivo()
+
+
+def cronometro(activo):
+    return Cronometro() if activo else INACTIVO